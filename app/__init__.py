@@ -10,19 +10,35 @@ def create_app(config_name='default'):
     
     # Initialize extensions
     db.init_app(app)
+    
+    # Socket packets splice pre-encoded payloads instead of re-serializing them
+    from app.services.payload_cache import SocketJSON
     socketio.init_app(
         app,
+        json=SocketJSON,
         message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'],
         async_mode=app.config['SOCKETIO_ASYNC_MODE'],
         cors_allowed_origins="*"
     )
     
+    # psycopg2 waits yield to the eventlet hub
+    from app.services.green_db import green_db
+    green_db.init_app(app)
+    
     # Initialize Redis
     redis_client.init_app(app)
     
     # Initialize CSRF Protection
     csrf.init_app(app)
     
+    # In-memory question bank for the game hot path
+    from app.services.question_bank import question_bank
+    question_bank.init_app(app)
+    
+    # Server-side question timers
+    from app.services.game_scheduler import game_scheduler
+    game_scheduler.init_app(app)
+    
     # Register blueprints
     from app.routes import main_bp, game_bp, admin_bp, api_bp
     app.register_blueprint(main_bp)
@@ -30,6 +46,10 @@ def create_app(config_name='default'):
     app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(api_bp, url_prefix='/api')
     
+    # CLI commands (flask leaderboard rebuild, ...)
+    from app.cli import register_commands
+    register_commands(app)
+    
     # Register SocketIO events
     from app.services import socket_events
     socket_events.register_handlers(socketio)
@@ -0,0 +1,107 @@
+from flask.cli import AppGroup
+import click
+import os
+
+
+schema_cli = AppGroup('schema', help='Database schema')
+
+
+@schema_cli.command('upgrade')
+def upgrade_schema():
+    """Create missing tables and add new columns/indexes to existing ones"""
+    from app.services.schema_upgrade import upgrade_schema
+    applied = upgrade_schema()
+    click.echo(f"✅ Schema up to date{': added ' + ', '.join(applied) if applied else ''}")
+
+
+leaderboard_cli = AppGroup('leaderboard', help='Global XP leaderboard (Redis)')
+
+
+@leaderboard_cli.command('rebuild')
+def rebuild_leaderboard():
+    """Rebuild the XP ranking from users.xp"""
+    from app.services import xp_leaderboard
+    count = xp_leaderboard.rebuild()
+    click.echo(f'✅ XP leaderboard rebuilt ({count} users)')
+
+
+stats_cli = AppGroup('stats', help='Player statistics')
+
+
+@stats_cli.command('percentiles')
+def build_percentiles():
+    """Build the XP/accuracy percentile snapshot now"""
+    from app.services import stats_service
+    snapshot = stats_service.build_percentile_snapshot()
+    players = snapshot['xp']['n'] if snapshot['xp'] else 0
+    click.echo(f'✅ Percentile snapshot built ({players} players, {len(snapshot["lernfelder"])} Lernfelder)')
+
+
+achievements_cli = AppGroup('achievements', help='Achievement engine')
+
+
+@achievements_cli.command('reload')
+def reload_achievements():
+    """Make all workers reload the achievement rules (after changing achievements)"""
+    from app.services.achievement_engine import achievement_engine
+    achievement_engine.invalidate()
+    click.echo('✅ Achievement rules will be reloaded')
+
+
+questions_cli = AppGroup('questions', help='Question bank')
+
+
+@questions_cli.command('import')
+@click.argument('sources', nargs=-1, required=True)
+@click.option('--dry-run', is_flag=True, help='Only report what would change')
+@click.option('--workers', type=int, default=os.cpu_count(), show_default=True, help='Validation processes')
+@click.option('--batch-size', type=int, help='Questions per bulk batch')
+def import_question_files(sources, dry_run, workers, batch_size):
+    """Import question JSON files, directories or glob patterns"""
+    from app.services.question_import import import_questions, resolve_sources
+    try:
+        paths = resolve_sources(sources)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    report = import_questions(paths, dry_run=dry_run, batch_size=batch_size, workers=workers)
+    for path, result in report['files'].items():
+        click.echo(f"{path}: {result['inserted']} new, {result['updated']} updated, "
+                   f"{result['skipped']} skipped, {len(result['errors'])} errors")
+        for index, message in result['errors']:
+            click.echo(f'  ❌ Question {index}: {message}')
+    click.echo(f"{'🔍 Dry run' if dry_run else '✅ Import'}: {report['inserted']} new, {report['updated']} updated, "
+               f"{report['skipped']} skipped, {report['errors']} errors in {len(paths)} files")
+
+
+@questions_cli.command('compile')
+def compile_question_bank():
+    """Compile the question bank artifact and make all workers swap to it"""
+    from app.services.question_bank import question_bank
+    if not question_bank.artifact_path:
+        raise click.ClickException('QUESTION_BANK_ARTIFACT is not configured')
+    question_bank.invalidate()
+    click.echo(f'✅ Question bank compiled to {question_bank.artifact_path} (version {question_bank.version})')
+
+
+@questions_cli.command('calibrate')
+@click.option('--dry-run', is_flag=True, help='Only report, write nothing')
+@click.option('--min-answers', type=int, help='Answers a question needs for a calibrated rating')
+def calibrate_questions(dry_run, min_answers):
+    """Compute item statistics from all answers and calibrate question difficulty"""
+    from app.services.item_calibration import calibrate
+    report = calibrate(min_answers=min_answers, dry_run=dry_run)
+    for frage_id, flags in sorted(report['flagged'].items()):
+        click.echo(f"  ⚠️  Frage {frage_id}: {', '.join(flags)}")
+    click.echo(f"{'🔍 Dry run' if dry_run else '✅ Calibration'}: {report['events']} answers, "
+               f"{report['questions']} questions, {report['calibrated']} calibrated, "
+               f"{len(report['flagged'])} flagged (load {report['load_seconds']}s, compute {report['compute_seconds']}s)")
+
+
+def register_commands(app):
+    """Register the flask CLI commands"""
+    app.cli.add_command(schema_cli)
+    app.cli.add_command(leaderboard_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(achievements_cli)
+    app.cli.add_command(questions_cli)
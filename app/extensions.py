@@ -42,10 +42,10 @@ class RedisClient:
         """Get value from Redis"""
         return self.client.get(key) if self.client else None
     
-    def set(self, key, value, ex=None):
-        """Set value in Redis with optional expiration"""
+    def set(self, key, value, ex=None, nx=False, px=None):
+        """Set value in Redis with optional expiration (nx: only if missing)"""
         if self.client:
-            return self.client.set(key, value, ex=ex)
+            return self.client.set(key, value, ex=ex, px=px, nx=nx)
         return None
     
     def delete(self, key):
@@ -60,10 +60,16 @@ class RedisClient:
             return self.client.hget(name, key)
         return None
     
-    def hset(self, name, key, value):
-        """Set hash field value"""
+    def hset(self, name, key=None, value=None, mapping=None):
+        """Set hash field value (or several fields via mapping)"""
         if self.client:
-            return self.client.hset(name, key, value)
+            return self.client.hset(name, key, value, mapping=mapping)
+        return None
+    
+    def hincrby(self, name, key, amount=1):
+        """Increment integer hash field"""
+        if self.client:
+            return self.client.hincrby(name, key, amount)
         return None
     
     def hgetall(self, name):
@@ -96,6 +102,36 @@ class RedisClient:
             return self.client.smembers(name)
         return set()
     
+    def smismember(self, name, values):
+        """Membership flag (0/1) for each value"""
+        if self.client:
+            return self.client.smismember(name, values)
+        return [0] * len(values)
+    
+    def scard(self, name):
+        """Get number of set members"""
+        if self.client:
+            return self.client.scard(name)
+        return 0
+    
+    def rpush(self, name, *values):
+        """Append values to list"""
+        if self.client:
+            return self.client.rpush(name, *values)
+        return None
+    
+    def lpop(self, name):
+        """Pop first list element"""
+        if self.client:
+            return self.client.lpop(name)
+        return None
+    
+    def llen(self, name):
+        """Get list length"""
+        if self.client:
+            return self.client.llen(name)
+        return 0
+    
     def exists(self, key):
         """Check if key exists"""
         if self.client:
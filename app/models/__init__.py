@@ -1,7 +1,8 @@
 from app.models.user import User
 from app.models.lernfeld import Lernfeld
-from app.models.frage import Frage, Antwort
-from app.models.spiel import SpielSitzung, Teilnahme
+from app.models.frage import Frage, Antwort, Tag, frage_tags, FrageStatistik
+from app.models.spiel import SpielSitzung, Teilnahme, AnswerEvent, UserLernfeldStats
+from app.models.wiederholung import Wiederholung
 from app.models.achievement import Achievement, user_achievements
 
 __all__ = [
@@ -9,8 +10,14 @@ __all__ = [
     'Lernfeld',
     'Frage',
     'Antwort',
+    'Tag',
+    'frage_tags',
+    'FrageStatistik',
     'SpielSitzung',
     'Teilnahme',
+    'AnswerEvent',
+    'UserLernfeldStats',
+    'Wiederholung',
     'Achievement',
     'user_achievements'
 ]
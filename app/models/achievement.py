@@ -33,21 +33,10 @@ class Achievement(db.Model):
     @staticmethod
     def check_and_award(user, criteria_type, current_value):
         """Check if user should receive achievements based on criteria"""
-        from app.extensions import db
+        from app.services.achievement_engine import achievement_engine
         
-        # Get all achievements of this type that user doesn't have
-        eligible_achievements = Achievement.query.filter(
-            Achievement.criteria_type == criteria_type,
-            Achievement.criteria_value <= current_value,
-            ~Achievement.users.any(id=user.id)
-        ).all()
+        # Cached rules + unlocked set, bulk insert (see AchievementEngine)
+        unlocked = achievement_engine.evaluate({user.id: {criteria_type: current_value}})
+        ids = [rule.id for rule in unlocked.get(user.id, [])]
         
-        newly_awarded = []
-        for achievement in eligible_achievements:
-            user.achievements.append(achievement)
-            newly_awarded.append(achievement)
-        
-        if newly_awarded:
-            db.session.commit()
-        
-        return newly_awarded
+        return Achievement.query.filter(Achievement.id.in_(ids)).all() if ids else []
@@ -1,5 +1,33 @@
 from app.extensions import db
+from datetime import datetime
 import json
+import re
+
+
+# Normalized tags: one row per distinct tag, linked to the questions
+frage_tags = db.Table('frage_tags',
+    db.Column('frage_id', db.Integer, db.ForeignKey('fragen.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True, index=True)
+)
+
+
+class Tag(db.Model):
+    """Normalized question tag (filterable, see frage_tags)"""
+    __tablename__ = 'tags'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    slug = db.Column(db.String(100), unique=True, nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    
+    fragen = db.relationship('Frage', secondary=frage_tags, back_populates='tag_entries', lazy='dynamic')
+    
+    @staticmethod
+    def slugify(name):
+        """Lookup key of a tag name: trimmed, casefolded, single spaces"""
+        return re.sub(r'\s+', ' ', str(name or '')).strip().casefold()[:100]
+    
+    def __repr__(self):
+        return f'<Tag {self.slug}>'
 
 
 class Frage(db.Model):
@@ -24,14 +52,21 @@ class Frage(db.Model):
     code_snippet = db.Column(db.Text)
     bild_idee = db.Column(db.Text)
     erklaerung = db.Column(db.Text)
+    loesung_keywords = db.Column(db.Text)  # JSON list of accepted keywords (text/math questions)
     
-    # Tags stored as JSON array
+    # Tags stored as JSON array (display copy, filtering uses frage_tags)
     tags = db.Column(db.Text, default='[]')
     
+    # Import identity (hash of Lernfeld + question text) and hash of the full
+    # imported content, see app/services/question_import.py
+    import_key = db.Column(db.String(64), unique=True, index=True)
+    content_hash = db.Column(db.String(64))
+    
     # Relationships
     lernfeld = db.relationship('Lernfeld', back_populates='fragen')
     antworten = db.relationship('Antwort', back_populates='frage', lazy='dynamic', cascade='all, delete-orphan')
     spiel_sitzungen = db.relationship('SpielSitzung', back_populates='frage', lazy='dynamic')
+    tag_entries = db.relationship('Tag', secondary=frage_tags, back_populates='fragen')
     
     def __repr__(self):
         return f'<Frage {self.id}: {self.frage_text[:50]}...>'
@@ -96,3 +131,32 @@ class Antwort(db.Model):
             'text': self.text,
             'reihenfolge': self.reihenfolge
         }
+
+
+class FrageStatistik(db.Model):
+    """Empirical item statistics of a question - written by the calibration job (item_calibration)"""
+    __tablename__ = 'frage_statistiken'
+    
+    frage_id = db.Column(db.Integer, db.ForeignKey('fragen.id', ondelete='CASCADE'), primary_key=True)
+    
+    # Item statistics over all recorded answers
+    answered = db.Column(db.Integer, default=0, nullable=False)
+    p_value = db.Column(db.Float)  # Share of correct answers
+    discrimination = db.Column(db.Float)  # Point-biserial correlation with the players' rest score
+    avg_time = db.Column(db.Float)
+    distractor_rates = db.Column(db.Text, default='{}')  # JSON {antwort_id: share of answers}
+    
+    # Calibrated difficulty on the adaptive (Elo) scale, None below the answer minimum
+    rating = db.Column(db.Float)
+    flags = db.Column(db.Text, default='[]')  # JSON list, e.g. ["mislabelled:Schwer", "negative_discrimination"]
+    
+    calibrated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def get_flags(self):
+        try:
+            return json.loads(self.flags or '[]')
+        except ValueError:
+            return []
+    
+    def __repr__(self):
+        return f'<FrageStatistik Frage:{self.frage_id}>'
@@ -13,7 +13,7 @@ class SpielSitzung(db.Model):
     host_user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     
     # Game configuration
-    modus = db.Column(db.String(20), nullable=False)  # 'multiplayer', 'survival_normal', 'survival_hardcore'
+    modus = db.Column(db.String(20), nullable=False)  # 'multiplayer', 'survival_normal', 'survival_hardcore', 'practice'
     schwierigkeit = db.Column(db.String(20))  # Filter: 'Leicht', 'Mittel', 'Schwer', 'Profi', or None for all
     
     # Current question
@@ -60,3 +60,57 @@ class Teilnahme(db.Model):
     
     def __repr__(self):
         return f'<Teilnahme User:{self.user_id} Spiel:{self.spiel_id}>'
+
+
+class AnswerEvent(db.Model):
+    """Answer event - append-only log of every submitted answer (source of all answer statistics)"""
+    __tablename__ = 'answer_events'
+    __table_args__ = (
+        db.Index('ix_answer_events_user_lernfeld', 'user_id', 'lernfeld_id', 'correct'),
+        db.Index('ix_answer_events_lernfeld_frage', 'lernfeld_id', 'frage_id'),
+        db.Index('ix_answer_events_frage_correct', 'frage_id', 'correct'),
+        db.Index('ix_answer_events_spiel_user', 'spiel_id', 'user_id'),
+    )
+    
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    
+    # Foreign keys (lernfeld_id denormalized from the question for cheap grouping)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    spiel_id = db.Column(db.Integer, db.ForeignKey('spiel_sitzungen.id', ondelete='CASCADE'), nullable=False)
+    frage_id = db.Column(db.Integer, db.ForeignKey('fragen.id', ondelete='CASCADE'), nullable=False)
+    lernfeld_id = db.Column(db.Integer, db.ForeignKey('lernfelder.id'), nullable=False)
+    antwort_id = db.Column(db.Integer)  # Chosen answer (distractor analysis), no FK: answers are replaced on re-import
+    
+    # Answer
+    correct = db.Column(db.Boolean, nullable=False)
+    time_taken = db.Column(db.Float, nullable=False)
+    score = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Timestamps
+    answered_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<AnswerEvent User:{self.user_id} Frage:{self.frage_id}>'
+
+
+class UserLernfeldStats(db.Model):
+    """Per-user competence rollup per Lernfeld - incrementally updated from answer events at game end"""
+    __tablename__ = 'user_lernfeld_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    lernfeld_id = db.Column(db.Integer, db.ForeignKey('lernfelder.id', ondelete='CASCADE'), primary_key=True)
+    
+    # Aggregates
+    answered = db.Column(db.Integer, default=0, nullable=False)
+    correct = db.Column(db.Integer, default=0, nullable=False)
+    total_time = db.Column(db.Float, default=0, nullable=False)  # Sum of answer times (average = total_time / answered)
+    
+    # Timestamps
+    last_played_at = db.Column(db.DateTime)
+    
+    @property
+    def avg_time(self):
+        return self.total_time / self.answered if self.answered else 0
+    
+    def __repr__(self):
+        return f'<UserLernfeldStats User:{self.user_id} Lernfeld:{self.lernfeld_id}>'
@@ -1,6 +1,5 @@
 from app.extensions import db
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 import json
 
 
@@ -14,7 +13,7 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     
     # Gamification
-    xp = db.Column(db.Integer, default=0, nullable=False)
+    xp = db.Column(db.Integer, default=0, nullable=False, index=True)
     level = db.Column(db.Integer, default=1, nullable=False)
     
     # Avatar configuration (JSON)
@@ -33,12 +32,19 @@ class User(db.Model):
         return f'<User {self.username}>'
     
     def set_password(self, password):
-        """Hash and set user password"""
-        self.password_hash = generate_password_hash(password)
+        """Hash and set user password (off the eventlet hub)"""
+        from app.services import password_service
+        self.password_hash = password_service.hash_password(password)
     
     def check_password(self, password):
-        """Check if provided password matches hash"""
-        return check_password_hash(self.password_hash, password)
+        """Check if provided password matches hash (off the eventlet hub)"""
+        from app.services import password_service
+        return password_service.verify_password(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """True if the stored hash uses outdated cost parameters"""
+        from app.services import password_service
+        return password_service.needs_rehash(self.password_hash)
     
     def get_avatar_config(self):
         """Parse avatar config from JSON"""
@@ -51,38 +57,47 @@ class User(db.Model):
         """Set avatar config as JSON"""
         self.avatar_config = json.dumps(config_dict)
     
-    def add_xp(self, amount):
-        """Add XP and handle level-up"""
-        self.xp += amount
-        # Simple level formula: level = floor(sqrt(xp / 100)) + 1
-        new_level = int((self.xp / 100) ** 0.5) + 1
-        if new_level > self.level:
-            self.level = new_level
-            return True  # Level up occurred
-        return False
-    
     def get_stats_by_lernfeld(self):
-        """Get user performance statistics grouped by Lernfeld"""
-        from app.models.spiel import Teilnahme, SpielSitzung
-        from app.models.frage import Frage
+        """Get user performance statistics grouped by Lernfeld (from the rollup table)"""
+        from app.models.spiel import UserLernfeldStats
+        from app.models.lernfeld import Lernfeld
+        
+        return db.session.query(
+            Lernfeld.name,
+            UserLernfeldStats.answered.label('total_questions'),
+            UserLernfeldStats.correct.label('correct_answers')
+        ).join(
+            Lernfeld, UserLernfeldStats.lernfeld_id == Lernfeld.id
+        ).filter(
+            UserLernfeldStats.user_id == self.id
+        ).all()
+    
+    def get_stats_from_events(self):
+        """Recompute the per-Lernfeld statistics from the full answer event log"""
+        from app.services.green_db import green_db
+        
+        # Heavy aggregate: runs off the eventlet hub when green DB access is on
+        return green_db.fetch_all(self.stats_by_lernfeld_query().statement)
+    
+    def stats_by_lernfeld_query(self):
+        """Aggregate query behind get_stats_from_events"""
+        from app.models.spiel import AnswerEvent
         from app.models.lernfeld import Lernfeld
         from sqlalchemy import func
         
-        # Query to get correct answers per Lernfeld
+        # Correct answers per Lernfeld from the answer event log
         stats = db.session.query(
             Lernfeld.name,
-            func.count(Teilnahme.id).label('total_questions'),
-            func.sum(db.case((Teilnahme.punkte > 0, 1), else_=0)).label('correct_answers')
+            func.count(AnswerEvent.id).label('total_questions'),
+            func.sum(db.case((AnswerEvent.correct, 1), else_=0)).label('correct_answers')
+        ).select_from(
+            AnswerEvent
         ).join(
-            SpielSitzung, Teilnahme.spiel_id == SpielSitzung.id
-        ).join(
-            Frage, SpielSitzung.frage_id == Frage.id
-        ).join(
-            Lernfeld, Frage.lernfeld_id == Lernfeld.id
+            Lernfeld, AnswerEvent.lernfeld_id == Lernfeld.id
         ).filter(
-            Teilnahme.user_id == self.id
+            AnswerEvent.user_id == self.id
         ).group_by(
             Lernfeld.name
-        ).all()
+        )
         
         return stats
@@ -0,0 +1,26 @@
+from app.extensions import db
+from datetime import datetime
+
+
+class Wiederholung(db.Model):
+    """Spaced-repetition card - SM-2 schedule of one question for one user (live copy in Redis, see practice_service)"""
+    __tablename__ = 'wiederholungen'
+    __table_args__ = (
+        db.Index('ix_wiederholungen_user_due', 'user_id', 'due_at'),
+    )
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    frage_id = db.Column(db.Integer, db.ForeignKey('fragen.id', ondelete='CASCADE'), primary_key=True)
+    
+    # SM-2 state
+    ease_factor = db.Column(db.Float, default=2.5, nullable=False)
+    interval_days = db.Column(db.Float, default=0, nullable=False)  # Gap to the next review (0 = relearning)
+    repetitions = db.Column(db.Integer, default=0, nullable=False)  # Correct reviews in a row
+    lapses = db.Column(db.Integer, default=0, nullable=False)  # Times forgotten
+    
+    # Timestamps
+    due_at = db.Column(db.DateTime, nullable=False)
+    last_reviewed_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<Wiederholung User:{self.user_id} Frage:{self.frage_id}>'
@@ -20,8 +20,10 @@ def admin_dashboard():
     if not is_admin():
         return redirect(url_for('main.index'))
     
-    # Get active games
-    active_games = SpielSitzung.query.filter_by(status='active').all()
+    # Get active games (solo practice sessions cannot be controlled)
+    active_games = SpielSitzung.query.filter(
+        SpielSitzung.status == 'active', SpielSitzung.modus != 'practice'
+    ).all()
     
     # Get statistics
     total_users = User.query.count()
@@ -62,7 +64,8 @@ def control_game(game_id):
     elif action == 'skip':
         # Emit skip event via SocketIO
         from app.extensions import socketio
-        socketio.emit('admin_skip', {'room': spiel.room_code}, room=spiel.room_code)
+        from app.services.socket_events import host_room
+        socketio.emit('admin_skip', {'room': spiel.room_code}, room=host_room(spiel.room_code))
     elif action == 'annul':
         # Mark current question as annulled
         redis_client.hset(f'room:{spiel.room_code}', 'annulled', 'true')
@@ -100,12 +103,46 @@ def manage_questions():
     
     page = request.args.get('page', 1, type=int)
     per_page = 50
+    query = request.args.get('q', '').strip()
+    
+    if query:
+        # Ranked full-text hits instead of paging by id
+        from app.services.question_search import question_search
+        hits = question_search.search(query, limit=per_page)
+        rows = {f.id: f for f in Frage.query.filter(Frage.id.in_([fid for fid, _ in hits]))}
+        results = [(rows[fid], score) for fid, score in hits if fid in rows]
+        return render_template('admin/questions.html', questions=None, query=query, results=results)
     
     questions = Frage.query.order_by(Frage.id.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
-    return render_template('admin/questions.html', questions=questions)
+    return render_template('admin/questions.html', questions=questions, query='', results=None)
+
+
+@admin_bp.route('/questions/reload', methods=['POST'])
+def reload_questions():
+    """Invalidate the in-memory question bank after questions were edited"""
+    if not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    from app.services.question_bank import question_bank
+    question_bank.invalidate()
+    
+    return jsonify({'success': True, 'questions': len(question_bank), 'version': question_bank.version})
+
+
+@admin_bp.route('/metrics/sockets')
+def socket_delivery_metrics():
+    """Websocket emits and deliveries per event (this worker)"""
+    if not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    from app.services import socket_metrics
+    if request.args.get('reset'):
+        socket_metrics.reset()
+    
+    return jsonify(socket_metrics.snapshot())
 
 
 @admin_bp.route('/users')
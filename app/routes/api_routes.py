@@ -1,7 +1,29 @@
-from flask import jsonify, request, session
+from flask import jsonify, request, session, current_app
 from app.routes import api_bp
-from app.models import User, Frage, Lernfeld
+from app.models import User
 from app.extensions import db
+from app.services import deck_service, profile_cache, stats_service, xp_leaderboard
+from app.services.question_bank import question_bank
+from app.services.question_search import question_search
+import random
+
+
+def _bank_etag():
+    """ETag of responses derived only from the question bank"""
+    return f'qb-{question_bank.version}'
+
+
+def _cacheable(response, etag):
+    """Attach the bank ETag and Cache-Control, answering 304 on a match"""
+    response.set_etag(etag, weak=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['QUESTIONS_API_MAX_AGE']
+    return response.make_conditional(request)
+
+
+def _list_arg(name):
+    """Query parameter given repeatedly and/or comma-separated -> list"""
+    return [value.strip() for raw in request.args.getlist(name) for value in raw.split(',') if value.strip()]
 
 
 @api_bp.route('/user/avatar', methods=['PUT'])
@@ -17,6 +39,8 @@ def update_avatar():
     user.set_avatar_config(avatar_config)
     db.session.commit()
     
+    profile_cache.invalidate(user_id)
+    
     return jsonify({'success': True, 'avatar': avatar_config})
 
 
@@ -27,82 +51,132 @@ def get_user_stats():
     if not user_id:
         return jsonify({'error': 'Not authenticated'}), 401
     
-    user = User.query.get_or_404(user_id)
-    stats = user.get_stats_by_lernfeld()
+    # Cached radar payload (one rollup lookup on a cache miss)
+    radar = stats_service.get_user_radar_data(user_id)
     
-    # Format for Chart.js radar chart
-    labels = []
-    data = []
-    
-    for stat in stats:
-        labels.append(stat.name)
-        # Calculate percentage correct
-        if stat.total_questions > 0:
-            percentage = (stat.correct_answers / stat.total_questions) * 100
-        else:
-            percentage = 0
-        data.append(round(percentage, 1))
+    # Global rank/XP from the leaderboard set, percentiles from the snapshot
+    ranking = xp_leaderboard.rank(user_id)
+    xp = ranking['xp'] if ranking else User.query.get_or_404(user_id).xp
     
+    # Format for Chart.js radar chart
     return jsonify({
-        'labels': labels,
-        'data': data
+        'labels': radar['labels'],
+        'data': radar['datasets'][0]['data'],
+        'details': radar['details'],
+        'rank': ranking['rank'] if ranking else None,
+        'percentiles': stats_service.get_user_percentiles(xp, radar['details'])
     })
 
 
 @api_bp.route('/questions')
 def get_questions():
-    """Get questions with filters"""
+    """Get random questions with filters (sampled from the in-memory question bank)"""
     schwierigkeit = request.args.get('schwierigkeit')
     lernfeld = request.args.get('lernfeld')
     typ = request.args.get('typ')
+    tags = _list_arg('tags')
     limit = request.args.get('limit', 10, type=int)
+    limit = max(1, min(limit, current_app.config['QUESTIONS_API_MAX_LIMIT']))
     
-    query = Frage.query
-    
-    if schwierigkeit:
-        query = query.filter_by(schwierigkeit=schwierigkeit)
-    
-    if lernfeld:
-        lernfeld_obj = Lernfeld.query.filter_by(name=lernfeld).first()
-        if lernfeld_obj:
-            query = query.filter_by(lernfeld_id=lernfeld_obj.id)
+    # Unknown Lernfeld names do not filter (as before)
+    if lernfeld not in {lf.name for lf in question_bank.lernfelder()}:
+        lernfeld = None
     
-    if typ:
-        query = query.filter_by(typ=typ)
+    ids = question_bank.ids(schwierigkeit=schwierigkeit, lernfeld=lernfeld, typ=typ, tags=tags)
+    sample = random.sample(ids, min(limit, len(ids)))
     
-    questions = query.order_by(db.func.random()).limit(limit).all()
-    
-    return jsonify({
-        'questions': [q.to_dict() for q in questions]
+    # A fresh sample on every call: nothing to revalidate or reuse
+    response = jsonify({
+        'questions': [question_bank.get(frage_id).to_dict() for frage_id in sample]
     })
+    response.cache_control.no_store = True
+    return response
+
+
+@api_bp.route('/questions/facets')
+def get_question_facets():
+    """Question counts per filter value plus the number matching the given filters"""
+    etag = _bank_etag()
+    if request.if_none_match.contains_weak(etag):
+        return _cacheable(current_app.response_class(status=304), etag)
+    
+    # Same filters as a game deck: Lernfelder, types and tags may be lists
+    total = deck_service.count_matching(
+        schwierigkeit=request.args.get('schwierigkeit') or None,
+        lernfelder=_list_arg('lernfelder'),
+        typen=_list_arg('typen'),
+        tags=_list_arg('tags')
+    )
+    
+    return _cacheable(jsonify({'total': total, 'facets': question_bank.facets()}), etag)
+
+
+@api_bp.route('/questions/search')
+def search_questions():
+    """BM25 full-text search over questions, explanations, tags and answers"""
+    query = request.args.get('q', '').strip()
+    limit = request.args.get('limit', 20, type=int)
+    limit = max(1, min(limit, current_app.config['QUESTION_SEARCH_MAX_LIMIT']))
+    if not query:
+        return jsonify({'error': 'Missing query'}), 400
+    
+    results = []
+    for frage_id, score in question_search.search(query, limit):
+        frage = question_bank.get(frage_id)
+        if frage is None:
+            # Deleted by a question bank swap between the index sync and this lookup
+            continue
+        results.append({
+            'id': frage.id,
+            'frage_text': frage.frage_text,
+            'lernfeld': frage.lernfeld,
+            'themenbereich': frage.themenbereich,
+            'schwierigkeit': frage.schwierigkeit,
+            'typ': frage.typ,
+            'score': round(score, 3)
+        })
+    
+    return jsonify({'query': query, 'results': results})
 
 
 @api_bp.route('/lernfelder')
 def get_lernfelder():
     """Get all learning fields"""
-    lernfelder = Lernfeld.query.all()
-    
-    return jsonify({
-        'lernfelder': [{'id': lf.id, 'name': lf.name, 'beschreibung': lf.beschreibung} 
-                       for lf in lernfelder]
-    })
+    etag = _bank_etag()
+    if request.if_none_match.contains_weak(etag):
+        return _cacheable(current_app.response_class(status=304), etag)
+    
+    return _cacheable(jsonify({
+        'lernfelder': [{'id': lf.id, 'name': lf.name, 'beschreibung': lf.beschreibung}
+                       for lf in question_bank.lernfelder()]
+    }), etag)
 
 
 @api_bp.route('/leaderboard')
 def get_leaderboard():
-    """Get top players by XP"""
+    """Get top players by XP (cursor = user id of the last entry of the previous page)"""
     limit = request.args.get('limit', 10, type=int)
+    limit = max(1, min(limit, current_app.config['LEADERBOARD_PAGE_MAX']))
+    cursor = request.args.get('cursor', type=int)
     
-    users = User.query.order_by(User.xp.desc()).limit(limit).all()
+    xp_leaderboard.ensure()
+    entries, next_cursor = xp_leaderboard.page(limit, cursor)
+    profiles = profile_cache.get_profiles(e['user_id'] for e in entries)
+    
+    user_id = session.get('user_id')
     
     return jsonify({
         'leaderboard': [
             {
-                'username': u.username,
-                'xp': u.xp,
-                'level': u.level,
-                'avatar': u.get_avatar_config()
+                'rank': e['rank'],
+                'user_id': e['user_id'],
+                'username': profiles[e['user_id']]['username'],
+                'xp': e['xp'],
+                'level': e['level'],
+                'avatar': profiles[e['user_id']]['avatar']
             }
-            for u in users
-        ]
+            for e in entries if e['user_id'] in profiles
+        ],
+        'next_cursor': next_cursor,
+        'you': xp_leaderboard.rank(user_id) if user_id else None
     })
@@ -1,7 +1,10 @@
-from flask import render_template, session, redirect, url_for, request, jsonify
+from flask import render_template, session, redirect, url_for, request, jsonify, current_app
 from app.routes import game_bp
 from app.models import User, SpielSitzung, Teilnahme
 from app.extensions import db, redis_client
+from app.services import room_service
+from flask_babel import get_locale
+import json
 import random
 import string
 
@@ -21,7 +24,11 @@ def create_game():
     if not user_id:
         return redirect(url_for('main.index'))
     
-    return render_template('game/create.html')
+    from app.services.question_bank import question_bank
+    lernfelder = [lf.name for lf in question_bank.lernfelder()]
+    tags = question_bank.facets()['tags']
+    
+    return render_template('game/create.html', lernfelder=lernfelder, tags=tags)
 
 
 @game_bp.route('/create', methods=['POST'])
@@ -34,6 +41,22 @@ def create_game_post():
     modus = request.json.get('modus', 'multiplayer')
     schwierigkeit = request.json.get('schwierigkeit')
     
+    # Deck settings: length plus optional Lernfeld/type/tag mix
+    try:
+        anzahl_fragen = int(request.json.get('anzahl_fragen') or current_app.config['QUESTIONS_PER_GAME'])
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid number of questions'}), 400
+    anzahl_fragen = max(1, min(anzahl_fragen, current_app.config['MAX_QUESTIONS_PER_GAME']))
+    tags = request.json.get('tags') or None
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(',') if tag.strip()] or None
+    deck_config = {
+        'anzahl_fragen': anzahl_fragen,
+        'lernfelder': request.json.get('lernfelder') or None,
+        'typen': request.json.get('typen') or None,
+        'tags': tags
+    }
+    
     # Create game session
     room_code = generate_room_code()
     spiel = SpielSitzung(
@@ -48,9 +71,18 @@ def create_game_post():
     db.session.commit()
     
     # Initialize Redis state for real-time game
-    redis_client.hset(f'room:{room_code}', 'status', 'waiting')
-    redis_client.hset(f'room:{room_code}', 'host_id', user_id)
-    redis_client.hset(f'room:{room_code}', 'current_question', 0)
+    redis_client.hset(f'room:{room_code}', mapping={
+        'status': 'waiting',
+        'host_id': user_id,
+        'spiel_id': spiel.id,
+        'modus': modus,
+        'schwierigkeit': schwierigkeit or '',
+        'deck_config': json.dumps(deck_config),
+        'auto_advance': 1 if request.json.get('auto_advance') else 0,
+        'large_room': 1 if request.json.get('large_room') else 0,
+        'locale': str(get_locale() or current_app.config['BABEL_DEFAULT_LOCALE']),
+        'current_question': 0
+    })
     
     return jsonify({
         'room_code': room_code,
@@ -93,17 +125,26 @@ def controller_view(room_code):
     # Check if user already joined
     teilnahme = Teilnahme.query.filter_by(spiel_id=spiel.id, user_id=user_id).first()
     if not teilnahme:
+        # Add to Redis set (enforces the room capacity)
+        if not room_service.admit_player(room_code, user_id):
+            return render_template('game/join.html', error='Der Raum ist voll'), 403
+        
         # Create participation record
         teilnahme = Teilnahme(spiel_id=spiel.id, user_id=user_id)
         db.session.add(teilnahme)
         db.session.commit()
-        
-        # Add to Redis set
-        redis_client.sadd(f'room:{room_code}:players', user_id)
     
     return render_template('game/controller.html', spiel=spiel, user=user, room_code=room_code)
 
 
+@game_bp.route('/spectate/<room_code>')
+def spectator_view(room_code):
+    """Spectator view - read-only beamer display"""
+    spiel = SpielSitzung.query.filter_by(room_code=room_code).first_or_404()
+    
+    return render_template('game/host.html', spiel=spiel, room_code=room_code, spectator=True)
+
+
 @game_bp.route('/survival')
 def survival_mode():
     """Survival mode selection"""
@@ -112,3 +153,115 @@ def survival_mode():
         return redirect(url_for('main.index'))
     
     return render_template('game/survival.html')
+
+
+@game_bp.route('/practice')
+def practice_mode():
+    """Practice mode (spaced repetition) start page"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return redirect(url_for('main.index'))
+    
+    from app.services.question_bank import question_bank
+    from app.services import practice_service
+    lernfelder = [lf.name for lf in question_bank.lernfelder()]
+    
+    return render_template('game/practice.html', lernfelder=lernfelder, room_code=None,
+                           due_count=practice_service.due_count(user_id))
+
+
+@game_bp.route('/practice', methods=['POST'])
+def practice_start():
+    """Start a solo practice session"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    from app.services import practice_service
+    from datetime import datetime
+    data = request.get_json(silent=True) or {}
+    lernfeld = data.get('lernfeld') or None
+    schwierigkeit = data.get('schwierigkeit') or None
+    
+    room_code = generate_room_code()
+    spiel = SpielSitzung(
+        room_code=room_code,
+        host_user_id=user_id,
+        modus='practice',
+        schwierigkeit=schwierigkeit,
+        status='active',
+        started_at=datetime.utcnow()
+    )
+    db.session.add(spiel)
+    db.session.flush()
+    db.session.add(Teilnahme(spiel_id=spiel.id, user_id=user_id))
+    db.session.commit()
+    
+    practice_service.start_session(room_code, spiel.id, user_id, lernfeld=lernfeld, schwierigkeit=schwierigkeit)
+    
+    return jsonify({
+        'room_code': room_code,
+        'redirect': url_for('game.practice_view', room_code=room_code)
+    })
+
+
+@game_bp.route('/practice/<room_code>')
+def practice_view(room_code):
+    """Practice session view"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return redirect(url_for('main.index'))
+    
+    spiel = SpielSitzung.query.filter_by(room_code=room_code, modus='practice').first_or_404()
+    if spiel.host_user_id != user_id:
+        return redirect(url_for('game.practice_mode'))
+    
+    return render_template('game/practice.html', spiel=spiel, room_code=room_code)
+
+
+# HTTP status of rejected practice requests (keyed by practice_service status)
+PRACTICE_ERRORS = {
+    'not_in_game': 403,
+    'finished': 409,
+    'stale': 409
+}
+
+
+def _practice_response(result):
+    if result['status'] in PRACTICE_ERRORS:
+        return jsonify({'error': result['status']}), PRACTICE_ERRORS[result['status']]
+    return jsonify(result)
+
+
+@game_bp.route('/practice/<room_code>/next', methods=['POST'])
+def practice_next(room_code):
+    """Next due (or new) question of a practice session"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    from app.services import practice_service
+    return _practice_response(practice_service.next_question(room_code, user_id))
+
+
+@game_bp.route('/practice/<room_code>/answer', methods=['POST'])
+def practice_answer(room_code):
+    """Grade an answer and reschedule the question"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    from app.services import practice_service
+    antwort_id = (request.get_json(silent=True) or {}).get('answer_id')
+    return _practice_response(practice_service.submit_answer(room_code, user_id, antwort_id))
+
+
+@game_bp.route('/practice/<room_code>/finish', methods=['POST'])
+def practice_finish(room_code):
+    """End a practice session"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    from app.services import practice_service
+    return _practice_response(practice_service.finish_session(room_code, user_id))
@@ -20,10 +20,8 @@ def dashboard():
     
     user = User.query.get_or_404(user_id)
     
-    # Get user stats by Lernfeld for radar chart
-    stats = user.get_stats_by_lernfeld()
-    
-    return render_template('dashboard/safehouse.html', user=user, stats=stats)
+    # Radar chart data is fetched from /api/user/stats (cached rollup)
+    return render_template('dashboard/safehouse.html', user=user)
 
 
 @main_bp.route('/avatar-editor')
@@ -60,6 +58,10 @@ def login():
             session['user_id'] = user.id
             session.permanent = True  # Use permanent session
             user.last_login = db.func.now()
+            
+            # Upgrade hashes created with an older cost profile
+            if user.password_needs_rehash():
+                user.set_password(password)
             db.session.commit()
             return redirect(url_for('main.dashboard'))
         else:
@@ -1,3 +1,3 @@
-from app.services import stats_service, socket_events
+from app.services import stats_service, question_bank, socket_events
 
-__all__ = ['stats_service', 'socket_events']
+__all__ = ['stats_service', 'question_bank', 'socket_events']
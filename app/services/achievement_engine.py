@@ -0,0 +1,221 @@
+from app.extensions import db, redis_client
+from app.models import Achievement, Teilnahme, SpielSitzung, UserLernfeldStats, user_achievements
+from app.services.socket_metrics import broadcast
+from bisect import bisect_right
+from collections import namedtuple
+import threading
+
+
+AchievementRule = namedtuple('AchievementRule', 'id name beschreibung icon criteria_type criteria_value')
+
+# Bumped whenever achievements are added or changed (see invalidate)
+GENERATION_KEY = 'achievements:generation'
+
+# Placeholder member so that "no achievements yet" is cached as well
+EMPTY_MEMBER = '0'
+
+
+def unlocked_key(user_id):
+    """Redis set of the achievement ids a user has unlocked"""
+    return f'user:{user_id}:achievements'
+
+
+class AchievementEngine:
+    """
+    Batch achievement evaluation
+
+    Rules (criteria_type/criteria_value) are cached in memory, sorted by
+    threshold per type, so checking a metric is a bisect. Unlocked ids live in
+    a Redis set per user. A finished game is evaluated for all participants
+    in one pass: one query per metric that actually has rules, one bulk
+    insert into user_achievements and one socket event per unlock.
+    """
+
+    def __init__(self):
+        self._rules = {}
+        self._thresholds = {}
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Make all workers reload the rule set"""
+        redis_client.client.incr(GENERATION_KEY)
+
+    def _current(self):
+        """Rules grouped per criteria type, reloaded when the generation changed"""
+        generation = redis_client.get(GENERATION_KEY) or '0'
+        with self._lock:
+            if generation != self._generation:
+                rules = {}
+                for a in Achievement.query.order_by(Achievement.criteria_value, Achievement.id):
+                    rules.setdefault(a.criteria_type, []).append(AchievementRule(
+                        a.id, a.name, a.beschreibung, a.icon, a.criteria_type, a.criteria_value
+                    ))
+                self._rules = rules
+                self._thresholds = {t: [r.criteria_value for r in rs] for t, rs in rules.items()}
+                self._generation = generation
+            return self._rules, self._thresholds
+
+    def criteria_types(self):
+        """Criteria types that have at least one rule"""
+        return set(self._current()[0])
+
+    def _load_unlocked(self, user_ids):
+        """Make sure the unlocked sets of these users are cached in Redis"""
+        pipe = redis_client.client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.exists(unlocked_key(user_id))
+        missing = [uid for uid, cached in zip(user_ids, pipe.execute()) if not cached]
+        if not missing:
+            return
+
+        unlocked = {uid: [EMPTY_MEMBER] for uid in missing}
+        rows = db.session.query(user_achievements.c.user_id, user_achievements.c.achievement_id).filter(
+            user_achievements.c.user_id.in_(missing)
+        )
+        for user_id, achievement_id in rows:
+            unlocked[user_id].append(achievement_id)
+
+        pipe = redis_client.client.pipeline(transaction=False)
+        for user_id, ids in unlocked.items():
+            pipe.sadd(unlocked_key(user_id), *ids)
+        pipe.execute()
+
+    def evaluate(self, metrics):
+        """
+        Award every achievement whose threshold the users' metrics reach
+
+        Args:
+            metrics: {user_id: {criteria_type: value}}
+
+        Returns:
+            dict: {user_id: [AchievementRule, ...]} newly unlocked
+        """
+        rules, thresholds = self._current()
+        user_ids = [int(uid) for uid in metrics]
+        if not rules or not user_ids:
+            return {}
+
+        # Candidates: rules at or below each metric value (bisect per type)
+        candidates = []
+        for user_id in user_ids:
+            for criteria_type, value in metrics[user_id].items():
+                if criteria_type not in rules or value is None:
+                    continue
+                reached = bisect_right(thresholds[criteria_type], value)
+                candidates.extend((user_id, rule) for rule in rules[criteria_type][:reached])
+        if not candidates:
+            return {}
+
+        # SADD decides atomically (across workers) which unlocks are new
+        self._load_unlocked(user_ids)
+        pipe = redis_client.client.pipeline(transaction=False)
+        for user_id, rule in candidates:
+            pipe.sadd(unlocked_key(user_id), rule.id)
+        new = [c for c, added in zip(candidates, pipe.execute()) if added]
+        if not new:
+            return {}
+
+        try:
+            db.session.execute(user_achievements.insert(), [
+                {'user_id': user_id, 'achievement_id': rule.id} for user_id, rule in new
+            ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            pipe = redis_client.client.pipeline(transaction=False)
+            for user_id, rule in new:
+                pipe.srem(unlocked_key(user_id), rule.id)
+            pipe.execute()
+            raise
+
+        unlocked = {}
+        for user_id, rule in new:
+            unlocked.setdefault(user_id, []).append(rule)
+        return unlocked
+
+    def game_metrics(self, room_code):
+        """
+        Metrics of all participants of a finished game
+
+        Live values come from the room's Redis state; lifetime counters are
+        queried in bulk, and only for criteria types that have rules.
+        """
+        types = self.criteria_types()
+        prefix = f'room:{room_code}'
+
+        pipe = redis_client.client.pipeline(transaction=False)
+        pipe.zrevrange(f'{prefix}:leaderboard', 0, -1, withscores=True)
+        pipe.hgetall(f'{prefix}:xp')
+        pipe.hgetall(f'{prefix}:levels')
+        pipe.hgetall(f'{prefix}:best_streaks')
+        leaderboard, xp, levels, best_streaks = pipe.execute()
+
+        user_ids = [int(uid) for uid, _ in leaderboard]
+        if not user_ids:
+            return {}
+        scores = {int(uid): int(score) for uid, score in leaderboard}
+
+        metrics = {uid: {
+            'xp_threshold': int(xp.get(str(uid), 0)),
+            'level': int(levels.get(str(uid), 1)),
+            'streak': int(best_streaks.get(str(uid), 0)),
+            'score': scores[uid]
+        } for uid in user_ids}
+
+        if 'games_played' in types:
+            rows = db.session.query(Teilnahme.user_id, db.func.count(Teilnahme.id)).join(
+                SpielSitzung, Teilnahme.spiel_id == SpielSitzung.id
+            ).filter(
+                Teilnahme.user_id.in_(user_ids), SpielSitzung.status == 'finished',
+                SpielSitzung.modus != 'practice'
+            ).group_by(Teilnahme.user_id)
+            for user_id, count in rows:
+                metrics[user_id]['games_played'] = count
+
+        if 'games_won' in types:
+            # Games where the user had the top score (ties share the win);
+            # solo practice sessions are not games
+            best = db.session.query(
+                Teilnahme.spiel_id, db.func.max(Teilnahme.punkte).label('punkte')
+            ).filter(
+                Teilnahme.spiel_id.in_(
+                    db.select(Teilnahme.spiel_id).join(
+                        SpielSitzung, Teilnahme.spiel_id == SpielSitzung.id
+                    ).where(Teilnahme.user_id.in_(user_ids), SpielSitzung.modus != 'practice')
+                )
+            ).group_by(Teilnahme.spiel_id).subquery()
+            rows = db.session.query(Teilnahme.user_id, db.func.count(Teilnahme.id)).join(
+                best, (Teilnahme.spiel_id == best.c.spiel_id) & (Teilnahme.punkte == best.c.punkte)
+            ).filter(
+                Teilnahme.user_id.in_(user_ids), Teilnahme.punkte > 0
+            ).group_by(Teilnahme.user_id)
+            for user_id, count in rows:
+                metrics[user_id]['games_won'] = count
+
+        if 'correct_answers' in types:
+            rows = db.session.query(UserLernfeldStats.user_id, db.func.sum(UserLernfeldStats.correct)).filter(
+                UserLernfeldStats.user_id.in_(user_ids)
+            ).group_by(UserLernfeldStats.user_id)
+            for user_id, correct in rows:
+                metrics[user_id]['correct_answers'] = int(correct or 0)
+
+        return metrics
+
+    def evaluate_game(self, room_code):
+        """Evaluate all participants of a finished game and notify unlocks"""
+        if not self.criteria_types():
+            return {}
+
+        unlocked = self.evaluate(self.game_metrics(room_code))
+        for user_id, rules in unlocked.items():
+            broadcast('achievement_unlocked', {
+                'achievements': [
+                    {'id': r.id, 'name': r.name, 'beschreibung': r.beschreibung, 'icon': r.icon}
+                    for r in rules
+                ]
+            }, f'user_{user_id}')
+        return unlocked
+
+
+achievement_engine = AchievementEngine()
@@ -0,0 +1,233 @@
+from app.extensions import redis_client
+from app.services.question_bank import question_bank
+from bisect import bisect_left
+import json
+import math
+import random
+import threading
+
+
+# Game modes in which every player gets their own adaptive question stream
+SURVIVAL_MODES = ('survival_normal', 'survival_hardcore')
+
+# Elo scale of question difficulty (labelled schwierigkeit -> rating)
+DIFFICULTY_RATINGS = {'Leicht': 800, 'Mittel': 1000, 'Schwer': 1200, 'Profi': 1400}
+START_RATING = 1000
+
+# Ability change per answer (Elo K factor)
+K_FACTOR = 32
+
+# Questions are picked where the player is expected to succeed this often
+TARGET_SUCCESS = 0.6
+
+# Width (rating points) of one difficulty bucket
+BUCKET_WIDTH = 50
+
+# Ability of every player carried over from game to game
+ABILITY_KEY = 'survival:ability'
+
+# Questions checked against the player's seen set per round trip
+SEEN_CHECK_BATCH = 16
+
+
+def expected(ability, rating):
+    """Elo/Rasch probability that a player of this ability answers correctly"""
+    return 1 / (1 + 10 ** ((rating - ability) / 400))
+
+
+def update(ability, rating, correct):
+    """New ability after one answer"""
+    return ability + K_FACTOR * ((1.0 if correct else 0.0) - expected(ability, rating))
+
+
+def target_rating(ability):
+    """Question rating with a TARGET_SUCCESS chance for this ability"""
+    return ability - 400 * math.log10(TARGET_SUCCESS / (1 - TARGET_SUCCESS))
+
+
+def question_rating(frage):
+    """Difficulty rating of a question record (calibrated, else from its label)"""
+    if frage.rating is not None:
+        return frage.rating
+    return DIFFICULTY_RATINGS.get(frage.schwierigkeit, START_RATING)
+
+
+class _Ladder:
+    """Candidate questions of a deck configuration grouped into rating buckets"""
+
+    def __init__(self, ratings):
+        buckets = {}
+        for frage_id, rating in ratings.items():
+            buckets.setdefault(round(rating / BUCKET_WIDTH), []).append(frage_id)
+        self.keys = sorted(buckets)
+        self.buckets = [tuple(sorted(buckets[key])) for key in self.keys]
+
+    def pick(self, rating, seen):
+        """
+        Random unseen question from the bucket closest to rating
+
+        Binary search for the bucket, then neighbouring buckets outward
+        until one has a question the player has not seen yet. seen(ids)
+        returns a seen flag per id, so only the checked candidates are
+        looked up instead of the player's whole history.
+        """
+        if not self.keys:
+            return None
+        position = bisect_left(self.keys, rating / BUCKET_WIDTH)
+        lower, upper = position - 1, position
+        while lower >= 0 or upper < len(self.keys):
+            if upper >= len(self.keys) or (
+                lower >= 0 and rating / BUCKET_WIDTH - self.keys[lower] <= self.keys[upper] - rating / BUCKET_WIDTH
+            ):
+                bucket, lower = self.buckets[lower], lower - 1
+            else:
+                bucket, upper = self.buckets[upper], upper + 1
+            frage_id = self._unseen(bucket, seen)
+            if frage_id is not None:
+                return frage_id
+        return None
+
+    @staticmethod
+    def _unseen(bucket, seen):
+        """Scan a bucket circularly from a random start, SEEN_CHECK_BATCH ids per check"""
+        start = random.randrange(len(bucket))
+        candidates = bucket[start:] + bucket[:start]
+        for offset in range(0, len(candidates), SEEN_CHECK_BATCH):
+            batch = candidates[offset:offset + SEEN_CHECK_BATCH]
+            for frage_id, flag in zip(batch, seen(batch)):
+                if not flag:
+                    return frage_id
+        return None
+
+
+class AdaptiveEngine:
+    """
+    Adaptive difficulty for the survival modes
+
+    Every player has an Elo ability estimate that moves after each answer
+    (questions keep their rating: calibrated by item_calibration, else
+    derived from the schwierigkeit label). The next question is drawn from the rating
+    bucket where the player succeeds with TARGET_SUCCESS probability. The
+    buckets of a deck configuration are built once per question bank version
+    and shared by all rooms of this worker, so a pick is a binary search
+    plus a short scan. Abilities, seen questions and the per-player stream
+    state live in Redis.
+    """
+
+    def __init__(self):
+        self._ladders = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def stream_key(room_code, user_id):
+        """Redis hash with the player's current question, number and deadline"""
+        return f'room:{room_code}:stream:{user_id}'
+
+    @staticmethod
+    def seen_key(room_code, user_id):
+        return f'room:{room_code}:seen:{user_id}'
+
+    @staticmethod
+    def ability_key(room_code):
+        return f'room:{room_code}:ability'
+
+    @staticmethod
+    def done_key(room_code):
+        """Players whose stream is over (deck length reached, eliminated or out of questions)"""
+        return f'room:{room_code}:done'
+
+    def _ratings(self, deck_config):
+        """Rating of every question the deck configuration allows"""
+        from app.services import deck_service
+
+        pool = deck_service.candidate_ids(
+            lernfelder=deck_config.get('lernfelder'),
+            typen=deck_config.get('typen'),
+            tags=deck_config.get('tags')
+        )
+        ratings = {}
+        for schwierigkeit, rating in DIFFICULTY_RATINGS.items():
+            for frage_id in question_bank.ids(schwierigkeit=schwierigkeit):
+                if frage_id in pool:
+                    ratings[frage_id] = rating
+
+        # Calibrated ratings (item_calibration) replace the labels
+        for frage_id, rating in question_bank.ratings().items():
+            if frage_id in pool:
+                ratings[frage_id] = rating
+        return ratings
+
+    def ladder(self, deck_config):
+        """Rating buckets of a deck configuration (cached per bank version)"""
+        version = question_bank.version
+        key = json.dumps([deck_config.get(k) for k in ('lernfelder', 'typen', 'tags')], sort_keys=True)
+        with self._lock:
+            if version != self._version:
+                self._ladders = {}
+                self._version = version
+            ladder = self._ladders.get(key)
+        if ladder is None:
+            ladder = _Ladder(self._ratings(deck_config))
+            with self._lock:
+                self._ladders[key] = ladder
+        return ladder
+
+    def start_ability(self, room_code, user_id, schwierigkeit=None):
+        """
+        Ability of a player entering the room
+
+        The estimate from earlier survival games, else the rating of the
+        room's difficulty (or START_RATING).
+        """
+        known = redis_client.hget(self.ability_key(room_code), user_id) or redis_client.hget(ABILITY_KEY, user_id)
+        ability = float(known) if known else float(DIFFICULTY_RATINGS.get(schwierigkeit, START_RATING))
+        redis_client.hset(self.ability_key(room_code), user_id, ability)
+        return ability
+
+    def next_question(self, room_code, user_id, deck_config):
+        """
+        Pick and mark the player's next question
+
+        Returns:
+            int: Question id, or None if the player has seen every candidate
+        """
+        ability = redis_client.hget(self.ability_key(room_code), user_id)
+        ability = float(ability) if ability else START_RATING
+        seen_key = self.seen_key(room_code, user_id)
+
+        frage_id = self.ladder(deck_config).pick(
+            target_rating(ability), lambda ids: redis_client.smismember(seen_key, ids)
+        )
+        if frage_id is not None:
+            redis_client.sadd(seen_key, frage_id)
+        return frage_id
+
+    def record_answer(self, room_code, user_id, frage, correct):
+        """
+        Move the player's ability after an answer (or a timeout)
+
+        Returns:
+            float: New ability
+        """
+        ability = redis_client.hget(self.ability_key(room_code), user_id)
+        ability = update(float(ability) if ability else START_RATING, question_rating(frage), correct)
+
+        pipe = redis_client.client.pipeline(transaction=False)
+        pipe.hset(self.ability_key(room_code), user_id, ability)
+        pipe.hset(ABILITY_KEY, user_id, ability)
+        pipe.execute()
+        return ability
+
+    def expire_room(self, room_code, user_ids, seconds):
+        """Let the adaptive state of a finished room expire"""
+        keys = [self.ability_key(room_code), self.done_key(room_code)]
+        for user_id in user_ids:
+            keys.extend((self.stream_key(room_code, user_id), self.seen_key(room_code, user_id)))
+        pipe = redis_client.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.expire(key, seconds)
+        pipe.execute()
+
+
+adaptive_engine = AdaptiveEngine()
@@ -0,0 +1,131 @@
+from flask import current_app
+from app.extensions import db, redis_client
+from app.models import AnswerEvent
+from sqlalchemy.exc import DataError, IntegrityError, SQLAlchemyError
+from datetime import datetime
+import json
+
+
+# Redis list buffering answer events until the next bulk insert. The answer
+# script appends to it atomically with the score update.
+BUFFER_KEY = 'answer_events:buffer'
+
+# Redis list of raw events that can never be inserted (bad JSON, FK
+# violations after a question was deleted); kept for inspection
+DEAD_LETTER_KEY = 'answer_events:dead'
+
+
+def drain(limit):
+    """Atomically take up to limit buffered (JSON) events off the Redis list"""
+    pipe = redis_client.client.pipeline(transaction=True)
+    pipe.lrange(BUFFER_KEY, 0, limit - 1)
+    pipe.ltrim(BUFFER_KEY, limit, -1)
+    raw, _ = pipe.execute()
+    return raw
+
+
+def _row(item):
+    """answer_events row of a buffered event (None if it cannot be decoded)"""
+    try:
+        event = json.loads(item)
+        return {
+            'user_id': event['user_id'],
+            'spiel_id': event['spiel_id'],
+            'frage_id': event['frage_id'],
+            'lernfeld_id': event['lernfeld_id'],
+            'antwort_id': event.get('antwort_id'),
+            'correct': event['correct'],
+            'time_taken': event['time_taken'],
+            'score': event['score'],
+            'answered_at': datetime.utcfromtimestamp(event['answered_at'])
+        }
+    except (ValueError, TypeError, KeyError, OverflowError):
+        return None
+
+
+def _insert_rows(table, rows, raw):
+    """
+    Insert a batch that was rejected as a whole row by row
+
+    Every row gets its own savepoint; rows the database rejects go to the
+    dead-letter list.
+
+    Returns:
+        int: Number of rows written
+    """
+    written = 0
+    dead = []
+    for row, item in zip(rows, raw):
+        try:
+            with db.session.begin_nested():
+                db.session.execute(table.insert(), [row])
+            written += 1
+        except (IntegrityError, DataError):
+            dead.append(item)
+    db.session.commit()
+    if dead:
+        redis_client.client.rpush(DEAD_LETTER_KEY, *dead)
+        current_app.logger.warning(f'{len(dead)} answer events moved to {DEAD_LETTER_KEY}')
+    return written
+
+
+def flush():
+    """
+    Bulk insert all buffered answer events into answer_events
+
+    Drains the buffer in batches of ANSWER_EVENT_BATCH_SIZE; each batch is
+    one multi-row INSERT and its own commit. Called at question end (from any
+    worker, the buffer is shared), so it never raises: events that cannot be
+    inserted go to DEAD_LETTER_KEY, and a batch that fails twice for other
+    reasons (database unavailable) goes back to the buffer for the next flush.
+
+    Returns:
+        int: Number of events written, None if a batch was put back (events
+        buffered before the call may not be in answer_events yet)
+    """
+    if not redis_client.client:
+        return 0
+
+    batch_size = current_app.config['ANSWER_EVENT_BATCH_SIZE']
+    table = AnswerEvent.__table__
+    written = 0
+
+    while True:
+        raw = drain(batch_size)
+        if not raw:
+            break
+
+        decoded = [(item, _row(item)) for item in raw]
+        broken = [item for item, row in decoded if row is None]
+        if broken:
+            redis_client.client.rpush(DEAD_LETTER_KEY, *broken)
+            current_app.logger.warning(f'{len(broken)} undecodable answer events moved to {DEAD_LETTER_KEY}')
+        valid = [item for item, row in decoded if row is not None]
+        rows = [row for _, row in decoded if row is not None]
+
+        for attempt in (1, 2):
+            try:
+                try:
+                    if rows:
+                        db.session.execute(table.insert(), rows)
+                        db.session.commit()
+                    written += len(rows)
+                except (IntegrityError, DataError):
+                    # Some rows can never be written: keep the others
+                    db.session.rollback()
+                    written += _insert_rows(table, rows, valid)
+                break
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                if attempt == 2:
+                    # Put the batch back so a later flush retries it
+                    redis_client.client.lpush(BUFFER_KEY, *reversed(valid))
+                    current_app.logger.warning(
+                        f'Answer event flush failed after {written} events, {len(valid)} events kept: {e}'
+                    )
+                    return None
+
+        if len(raw) < batch_size:
+            break
+
+    return written
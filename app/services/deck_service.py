@@ -0,0 +1,123 @@
+from app.extensions import redis_client
+from app.services.question_bank import question_bank
+import json
+import random
+
+
+def deck_key(room_code):
+    """Redis list holding the remaining question ids of a room"""
+    return f'room:{room_code}:deck'
+
+
+# Question types the game clients can answer. text/math need free-text
+# input and order an ordering UI, so those are imported but never dealt;
+# type filters are narrowed to these.
+PLAYABLE_TYPES = ('mc',)
+
+
+def _pool(schwierigkeit, lernfeld, typen, tags):
+    """Candidate ids of one Lernfeld (union over the allowed, playable types)"""
+    ids = set()
+    for typ in typen or PLAYABLE_TYPES:
+        if typ not in PLAYABLE_TYPES:
+            continue
+        ids.update(question_bank.ids(schwierigkeit=schwierigkeit, lernfeld=lernfeld, typ=typ, tags=tags))
+    return ids
+
+
+def candidate_ids(schwierigkeit=None, lernfelder=None, typen=None, tags=None):
+    """Set of all question ids a deck with these filters can draw from"""
+    ids = set()
+    for name in lernfelder or [None]:
+        ids.update(_pool(schwierigkeit, name, typen, tags))
+    return ids
+
+
+def count_matching(schwierigkeit=None, lernfelder=None, typen=None, tags=None):
+    """Number of questions a deck with these filters can draw from"""
+    return sum(len(_pool(schwierigkeit, name, typen, tags)) for name in (lernfelder or [None]))
+
+
+def build_deck(length, schwierigkeit=None, lernfelder=None, typen=None, tags=None):
+    """
+    Draw a shuffled, duplicate-free list of question ids from the question bank
+
+    Args:
+        length: Number of questions in the deck
+        schwierigkeit: Optional difficulty filter
+        lernfelder: Optional list of Lernfeld names or {name: weight} mix
+        typen: Optional list of question types (mc, text, order, math)
+        tags: Optional list of tags (questions with any of them)
+
+    Returns:
+        list: Question ids in play order
+    """
+    if isinstance(lernfelder, dict):
+        weights = {name: max(float(w), 0) for name, w in lernfelder.items()}
+    elif lernfelder:
+        weights = {name: 1.0 for name in lernfelder}
+    else:
+        weights = {None: 1.0}
+
+    pools = {name: list(_pool(schwierigkeit, name, typen, tags)) for name in weights}
+
+    quotas = _allocate(length, weights, {name: len(ids) for name, ids in pools.items()})
+
+    deck = []
+    for name, quota in quotas.items():
+        deck.extend(random.sample(pools[name], quota))
+    random.shuffle(deck)
+    return deck
+
+
+def _allocate(length, weights, capacities):
+    """Split length across pools proportionally to weights, capped by pool size"""
+    quotas = {name: 0 for name in weights}
+    remaining = min(length, sum(capacities[n] for n, w in weights.items() if w > 0))
+
+    while remaining > 0:
+        open_pools = {n: w for n, w in weights.items() if w > 0 and quotas[n] < capacities[n]}
+        total_weight = sum(open_pools.values())
+        shares = {n: remaining * w / total_weight for n, w in open_pools.items()}
+
+        # Integer parts first, then the rest by largest remainder
+        grants = {n: int(share) for n, share in shares.items()}
+        leftover = remaining - sum(grants.values())
+        for name in sorted(shares, key=lambda n: shares[n] - grants[n], reverse=True)[:leftover]:
+            grants[name] += 1
+
+        # Pools that run dry hand their surplus to the others in the next pass
+        for name, grant in grants.items():
+            grant = min(grant, capacities[name] - quotas[name])
+            quotas[name] += grant
+            remaining -= grant
+
+    return quotas
+
+
+def store_deck(room_code, deck):
+    """Replace the room's deck in Redis"""
+    redis_client.delete(deck_key(room_code))
+    if deck:
+        redis_client.rpush(deck_key(room_code), *deck)
+    redis_client.hset(f'room:{room_code}', 'deck_size', len(deck))
+
+
+def draw_question(room_code):
+    """Pop the next question off the room's deck (None when exhausted)"""
+    while True:
+        frage_id = redis_client.lpop(deck_key(room_code))
+        if not frage_id:
+            return None
+        # Skip questions deleted since the deck was built
+        frage = question_bank.get(frage_id)
+        if frage:
+            return frage
+
+
+def parse_deck_config(raw):
+    """Decode the deck settings stored in the room hash"""
+    try:
+        return json.loads(raw) if raw else {}
+    except ValueError:
+        return {}
@@ -0,0 +1,84 @@
+from app.extensions import socketio
+import heapq
+import itertools
+import threading
+import time
+
+
+class GameScheduler:
+    """
+    Timed game jobs for all rooms of this worker.
+
+    One background task (a green thread under eventlet) keeps a heap of due
+    jobs and spawns each job as a short-lived task when it is due, so a slow
+    job never delays the timers of other rooms and there is no timer thread
+    per room. Jobs run inside an app context.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._running = False
+        self._deadlines = {}
+
+    def init_app(self, app):
+        """Bind the scheduler to the app"""
+        self.app = app
+        app.extensions['game_scheduler'] = self
+
+    def call_at(self, when, func, *args):
+        """Run func(*args) at the given unix time"""
+        with self._lock:
+            heapq.heappush(self._heap, (when, next(self._seq), func, args))
+        self._ensure_running()
+
+    def call_later(self, delay, func, *args):
+        """Run func(*args) after delay seconds"""
+        self.call_at(time.time() + delay, func, *args)
+
+    def set_deadline(self, room_code, frage_id, deadline):
+        """Remember a question's answer deadline for cheap local late checks"""
+        self._deadlines[room_code] = (frage_id, deadline)
+
+    def clear_deadline(self, room_code):
+        self._deadlines.pop(room_code, None)
+
+    def is_late(self, room_code, frage_id, now=None):
+        """True if this worker knows the question is already closed"""
+        known = self._deadlines.get(room_code)
+        return known is not None and known[0] == frage_id and (now or time.time()) > known[1]
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        socketio.start_background_task(self._run)
+
+    def _run(self):
+        tick = self.app.config['SCHEDULER_TICK']
+        while True:
+            now = time.time()
+            due = []
+            with self._lock:
+                while self._heap and self._heap[0][0] <= now:
+                    due.append(heapq.heappop(self._heap))
+                next_due = self._heap[0][0] if self._heap else None
+
+            for _, _, func, args in due:
+                socketio.start_background_task(self._execute, func, args)
+
+            delay = tick if next_due is None else min(tick, next_due - time.time())
+            socketio.sleep(max(delay, 0))
+
+    def _execute(self, func, args):
+        with self.app.app_context():
+            try:
+                func(*args)
+            except Exception:
+                self.app.logger.exception(f'Scheduled job {func.__name__}{args} failed')
+
+
+game_scheduler = GameScheduler()
@@ -0,0 +1,109 @@
+from app.extensions import db
+import threading
+
+
+class GreenDB:
+    """
+    Cooperative Postgres access for the eventlet worker
+
+    psycopg2 blocks in C while it waits for the server, which freezes the
+    eventlet hub and with it every socket of the worker. With a wait callback
+    installed, psycopg2 hands every wait back to Python: in green threads it
+    yields to the hub (trampoline), in native threads (tpool) it falls back to
+    the unpatched select(). Heavy analytic queries can additionally be run in
+    eventlet's native thread pool with fetch_all, so decoding large results
+    does not stall the hub either.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self._hub_thread = None
+        self._engine = None
+        self._engine_lock = threading.Lock()
+        self._semaphore = None
+
+    def init_app(self, app):
+        """Install the green wait callback for eventlet + Postgres setups"""
+        self.app = app
+        app.extensions['green_db'] = self
+
+        if (not app.config['DB_GREEN']
+                or app.config['SOCKETIO_ASYNC_MODE'] != 'eventlet'
+                or not app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql')):
+            return
+
+        from eventlet import patcher
+        from eventlet.semaphore import BoundedSemaphore
+        from psycopg2 import extensions
+
+        # Green threads all live on the native thread running the hub
+        self._hub_thread = patcher.original('_thread').get_ident()
+        self._semaphore = BoundedSemaphore(app.config['HEAVY_QUERY_CONCURRENCY'])
+        extensions.set_wait_callback(self._wait_callback)
+        self.enabled = True
+        app.logger.info('✅ Cooperative (green) Postgres access enabled')
+
+    def _wait_callback(self, conn, timeout=None):
+        """psycopg2 wait callback: yield to the hub instead of blocking in C"""
+        from eventlet import patcher
+        from eventlet.hubs import trampoline
+        from psycopg2 import extensions, OperationalError
+
+        native = patcher.original('_thread').get_ident() != self._hub_thread
+        select = patcher.original('select').select
+
+        while True:
+            state = conn.poll()
+            if state == extensions.POLL_OK:
+                return
+            if state == extensions.POLL_READ:
+                if native:
+                    select([conn.fileno()], [], [])
+                else:
+                    trampoline(conn.fileno(), read=True)
+            elif state == extensions.POLL_WRITE:
+                if native:
+                    select([], [conn.fileno()], [])
+                else:
+                    trampoline(conn.fileno(), write=True)
+            else:
+                raise OperationalError(f'Bad result from poll: {state}')
+
+    def _heavy_engine(self):
+        """Engine for native-thread queries (NullPool: no shared pool state)"""
+        with self._engine_lock:
+            if self._engine is None:
+                from sqlalchemy import create_engine
+                from sqlalchemy.pool import NullPool
+                self._engine = create_engine(self.app.config['SQLALCHEMY_DATABASE_URI'], poolclass=NullPool)
+            return self._engine
+
+    def fetch_all(self, statement):
+        """
+        Execute a heavy read-only statement and return all rows
+
+        With green access enabled the statement runs in eventlet's native
+        thread pool on its own connection, at most HEAVY_QUERY_CONCURRENCY at
+        a time; otherwise it runs on the request's session.
+
+        Args:
+            statement: SQLAlchemy selectable (e.g. Query.statement)
+
+        Returns:
+            list: Result rows
+        """
+        if not self.enabled:
+            return db.session.execute(statement).all()
+
+        from eventlet import tpool
+
+        def run():
+            with self._heavy_engine().connect() as conn:
+                return conn.execute(statement).all()
+
+        with self._semaphore:
+            return tpool.execute(run)
+
+
+green_db = GreenDB()
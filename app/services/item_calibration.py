@@ -0,0 +1,235 @@
+from flask import current_app
+from app.extensions import db
+from app.models import AnswerEvent, FrageStatistik
+from app.services.question_bank import question_bank
+from app.services.adaptive_engine import DIFFICULTY_RATINGS, START_RATING
+from datetime import datetime
+import numpy as np
+import json
+import time
+
+
+# Answer events fetched per round-trip while loading
+LOAD_CHUNK = 100000
+
+# One answer event as loaded for calibration (antwort_id 0 = not recorded)
+EVENT_DTYPE = np.dtype([
+    ('frage_id', np.int64),
+    ('user_id', np.int64),
+    ('antwort_id', np.int64),
+    ('correct', np.int8),
+    ('time_taken', np.float64)
+])
+
+# p-values are clipped before the logit (all or none correct is infinitely easy/hard)
+P_CLIP = (0.02, 0.98)
+
+# Flag thresholds
+LOW_DISCRIMINATION = 0.1  # Point-biserial below this separates players poorly
+DEAD_DISTRACTOR = 0.02  # Wrong answers chosen less often than this fool nobody
+
+
+def load_events():
+    """All answer events as one structured array (streamed in chunks)"""
+    statement = db.select(
+        AnswerEvent.frage_id,
+        AnswerEvent.user_id,
+        db.func.coalesce(AnswerEvent.antwort_id, 0),
+        db.case((AnswerEvent.correct, 1), else_=0),
+        AnswerEvent.time_taken
+    ).execution_options(stream_results=True, yield_per=LOAD_CHUNK)
+
+    chunks = [
+        np.fromiter(map(tuple, partition), dtype=EVENT_DTYPE, count=len(partition))
+        for partition in db.session.execute(statement).partitions()
+    ]
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=EVENT_DTYPE)
+
+
+def item_statistics(events):
+    """
+    Per-question statistics with vectorized group-bys (no per-row Python)
+
+    Discrimination is the point-biserial correlation between answering a
+    question correctly and the player's rest score (share correct over all
+    their other answers). The rating puts the question on the adaptive Elo
+    scale: a question that its players solve exactly as often as they solve
+    everything else gets START_RATING.
+
+    Args:
+        events: Structured array of EVENT_DTYPE
+
+    Returns:
+        dict: Per-question arrays aligned with 'frage_ids' ('answered',
+        'p_value', 'discrimination', 'avg_time', 'rating') plus per chosen
+        answer 'answer_ids', 'answer_frage_ids' and 'answer_rates'
+    """
+    frage_ids, item = np.unique(events['frage_id'], return_inverse=True)
+    _, user = np.unique(events['user_id'], return_inverse=True)
+    k = frage_ids.size
+    x = events['correct'].astype(np.float64)
+
+    answered = np.bincount(item, minlength=k).astype(np.float64)
+    p_value = np.bincount(item, weights=x, minlength=k) / answered
+    avg_time = np.bincount(item, weights=events['time_taken'], minlength=k) / answered
+
+    # Rest score of the player behind every event
+    user_answered = np.bincount(user).astype(np.float64)
+    user_correct = np.bincount(user, weights=x)
+    others = user_answered[user] - 1
+    valid = others > 0
+    rest = np.divide(user_correct[user] - x, others, out=np.zeros_like(x), where=valid)
+
+    # Pearson correlation per question from grouped sums (x is 0/1: sum x^2 = sum x)
+    w = valid.astype(np.float64)
+    n = np.bincount(item, weights=w, minlength=k)
+    sx = np.bincount(item, weights=x * w, minlength=k)
+    sy = np.bincount(item, weights=rest * w, minlength=k)
+    sxy = np.bincount(item, weights=x * rest * w, minlength=k)
+    syy = np.bincount(item, weights=rest * rest * w, minlength=k)
+    variance = (n * sx - sx * sx) * (n * syy - sy * sy)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        discrimination = np.where(variance > 0, (n * sxy - sx * sy) / np.sqrt(variance), np.nan)
+        mean_rest = np.where(n > 0, sy / n, x.mean())
+
+    # Odds of the players on everything else vs. odds on this question
+    p = np.clip(p_value, *P_CLIP)
+    q = np.clip(mean_rest, *P_CLIP)
+    rating = START_RATING + 400 * (np.log10(q / (1 - q)) - np.log10(p / (1 - p)))
+
+    # Share of each chosen answer among the recorded choices of its question
+    chosen = events['antwort_id'] > 0
+    answer_ids, first, counts = np.unique(events['antwort_id'][chosen], return_index=True, return_counts=True)
+    answer_item = item[chosen][first]
+    choices = np.bincount(item[chosen], minlength=k)
+
+    return {
+        'frage_ids': frage_ids,
+        'answered': answered.astype(np.int64),
+        'p_value': p_value,
+        'discrimination': discrimination,
+        'avg_time': avg_time,
+        'rating': rating,
+        'answer_ids': answer_ids,
+        'answer_frage_ids': frage_ids[answer_item],
+        'answer_rates': counts / choices[answer_item]
+    }
+
+
+def _nearest_label(rating):
+    return min(DIFFICULTY_RATINGS, key=lambda label: abs(DIFFICULTY_RATINGS[label] - rating))
+
+
+def _flags(frage, rating, discrimination, rates):
+    """Warnings for a question with enough answers (discrimination None: undefined, not flagged)"""
+    flags = []
+    label = _nearest_label(rating)
+    if label != frage.schwierigkeit:
+        flags.append(f'mislabelled:{label}')
+    if discrimination is not None:
+        if discrimination < 0:
+            flags.append('negative_discrimination')
+        elif discrimination < LOW_DISCRIMINATION:
+            flags.append('low_discrimination')
+
+    if rates:
+        correct_rate = sum(rates.get(a.id, 0.0) for a in frage.antworten if a.korrekt)
+        for antwort in frage.antworten:
+            if antwort.korrekt:
+                continue
+            rate = rates.get(antwort.id, 0.0)
+            if rate > correct_rate:
+                flags.append(f'distractor_dominates:{antwort.id}')
+            elif rate < DEAD_DISTRACTOR:
+                flags.append(f'dead_distractor:{antwort.id}')
+    return flags
+
+
+def calibrate(min_answers=None, dry_run=False):
+    """
+    Calibrate all questions from the recorded answers
+
+    Computes the item statistics, flags mislabelled and suspicious
+    questions and upserts frage_statistiken. Questions with at least
+    CALIBRATION_MIN_ANSWERS answers get a calibrated rating, which the
+    question bank hands to the adaptive survival selection.
+
+    Args:
+        min_answers: Answers needed for a rating (default CALIBRATION_MIN_ANSWERS)
+        dry_run: Compute and report only
+
+    Returns:
+        dict: {'events', 'questions', 'calibrated', 'flagged': {frage_id: [flag]},
+        'load_seconds', 'compute_seconds'}
+    """
+    min_answers = min_answers or current_app.config['CALIBRATION_MIN_ANSWERS']
+
+    started = time.perf_counter()
+    events = load_events()
+    loaded = time.perf_counter()
+    report = {'events': int(events.size), 'questions': 0, 'calibrated': 0, 'flagged': {},
+              'load_seconds': round(loaded - started, 2), 'compute_seconds': 0.0}
+    if not events.size:
+        return report
+
+    stats = item_statistics(events)
+    rates_by_frage = {}
+    for antwort_id, frage_id, rate in zip(
+        stats['answer_ids'].tolist(), stats['answer_frage_ids'].tolist(), stats['answer_rates'].tolist()
+    ):
+        rates_by_frage.setdefault(frage_id, {})[antwort_id] = rate
+
+    now = datetime.utcnow()
+    rows = []
+    for frage_id, answered, p_value, discrimination, avg_time, rating in zip(
+        stats['frage_ids'].tolist(), stats['answered'].tolist(), stats['p_value'].tolist(),
+        stats['discrimination'].tolist(), stats['avg_time'].tolist(), stats['rating'].tolist()
+    ):
+        frage = question_bank.get(frage_id)
+        if not frage:
+            continue  # Deleted since it was answered
+
+        rates = rates_by_frage.get(frage_id, {})
+        discrimination = None if np.isnan(discrimination) else round(discrimination, 4)
+        calibrated = answered >= min_answers
+        flags = _flags(frage, rating, discrimination, rates) if calibrated else []
+        if flags:
+            report['flagged'][frage_id] = flags
+
+        rows.append({
+            'frage_id': frage_id,
+            'answered': answered,
+            'p_value': round(p_value, 4),
+            'discrimination': discrimination,
+            'avg_time': round(avg_time, 2),
+            'distractor_rates': json.dumps({
+                a.id: round(rates.get(a.id, 0.0), 4) for a in frage.antworten if not a.korrekt
+            }),
+            'rating': round(rating, 1) if calibrated else None,
+            'flags': json.dumps(flags),
+            'calibrated_at': now
+        })
+    report['questions'] = len(rows)
+    report['calibrated'] = sum(1 for row in rows if row['rating'] is not None)
+    report['compute_seconds'] = round(time.perf_counter() - loaded, 2)
+
+    if dry_run or not rows:
+        return report
+
+    if db.engine.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+
+    table = FrageStatistik.__table__
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.frage_id],
+        set_={column: statement.excluded[column] for column in rows[0] if column != 'frage_id'}
+    )
+    db.session.execute(statement, rows)
+    db.session.commit()
+
+    # New ratings reach every worker's question bank (and the survival ladders)
+    question_bank.invalidate()
+    return report
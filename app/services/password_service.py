@@ -0,0 +1,53 @@
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+from app.extensions import socketio
+import threading
+
+
+_semaphore = None
+_semaphore_lock = threading.Lock()
+
+
+def _limit():
+    """Semaphore bounding concurrent hash jobs (green under eventlet)"""
+    global _semaphore
+    with _semaphore_lock:
+        if _semaphore is None:
+            size = current_app.config['PASSWORD_HASH_CONCURRENCY']
+            if getattr(socketio, 'async_mode', None) == 'eventlet':
+                from eventlet.semaphore import BoundedSemaphore
+                _semaphore = BoundedSemaphore(size)
+            else:
+                _semaphore = threading.BoundedSemaphore(size)
+        return _semaphore
+
+
+def _run(func, *args):
+    """
+    Run a CPU-heavy hash function without blocking the eventlet hub
+
+    Under eventlet the call goes to a native thread of eventlet's tpool (the
+    hashlib KDFs release the GIL), so websockets keep being served while a
+    login is verified. At most PASSWORD_HASH_CONCURRENCY jobs run at once.
+    In threading mode the caller already is a native thread.
+    """
+    with _limit():
+        if getattr(socketio, 'async_mode', None) == 'eventlet':
+            from eventlet import tpool
+            return tpool.execute(func, *args)
+        return func(*args)
+
+
+def hash_password(password):
+    """Hash a password with the configured cost profile"""
+    return _run(generate_password_hash, password, current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def verify_password(pwhash, password):
+    """Check a password against a stored hash"""
+    return _run(check_password_hash, pwhash, password)
+
+
+def needs_rehash(pwhash):
+    """True if a hash was created with other cost parameters than configured"""
+    return pwhash.split('$', 1)[0] != current_app.config['PASSWORD_HASH_METHOD']
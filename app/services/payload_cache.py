@@ -0,0 +1,114 @@
+from flask import current_app
+from app.services.question_bank import question_bank
+import json
+import threading
+
+
+# Reused encoders (json.dumps with options builds a new encoder per call)
+_packet_encoder = json.JSONEncoder(separators=(',', ':'))
+_payload_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+class RawJSON(str):
+    """Already encoded JSON, spliced verbatim into socket packets"""
+    __slots__ = ()
+
+
+def _encode(obj, depth):
+    if isinstance(obj, RawJSON):
+        return obj
+    if isinstance(obj, str):
+        return json.dumps(obj)  # Event names: default encoder, no per-call setup
+    if depth and isinstance(obj, list):
+        return '[' + ','.join(_encode(item, depth - 1) for item in obj) + ']'
+    if depth and isinstance(obj, dict) and any(isinstance(v, RawJSON) for v in obj.values()):
+        return '{' + ','.join(
+            _packet_encoder.encode(str(k)) + ':' + _encode(v, depth - 1) for k, v in obj.items()
+        ) + '}'
+    return _packet_encoder.encode(obj)
+
+
+class SocketJSON:
+    """
+    json module for python-socketio that passes RawJSON through
+
+    A packet is [event, *args]; RawJSON args (or RawJSON values of dict
+    args) are written as-is instead of being serialized again per emit.
+    Everything else is encoded compactly, like python-socketio does.
+    """
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return _encode(obj, 2)
+
+    @staticmethod
+    def loads(s, **kwargs):
+        return json.loads(s, **kwargs)
+
+
+def question_fields(frage):
+    """Public question data sent to players and screens (no solutions)"""
+    return {
+        'id': frage.id,
+        'frage_text': frage.frage_text,
+        'typ': frage.typ,
+        'zeit_sekunden': frage.zeit_sekunden,
+        'code_snippet': frage.code_snippet,
+        'antworten': [{'id': a.id, 'text': a.text} for a in frage.antworten]
+    }
+
+
+def _splice(dynamic, static):
+    """Merge a small dict of per-room fields into a pre-encoded JSON object"""
+    head = _payload_encoder.encode(dynamic)
+    return RawJSON(f'{head[:-1]},{static[1:]}' if dynamic else static)
+
+
+class PayloadCache:
+    """
+    Pre-encoded per-question socket payloads
+
+    Per (question id, locale) the player-safe question (no solutions) and
+    the reveal part (correct ids + erklaerung) are serialized once; emits and
+    spectator snapshots only splice in the per-room fields. Entries are dropped whenever the
+    question bank version changes.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _entry(self, frage, locale):
+        version = question_bank.version
+        key = (frage.id, locale or current_app.config['BABEL_DEFAULT_LOCALE'])
+        with self._lock:
+            if version != self._version:
+                self._entries = {}
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = (
+                    _payload_encoder.encode(question_fields(frage)),
+                    _payload_encoder.encode({
+                        'frage_id': frage.id,
+                        'correct_ids': sorted(frage.correct_ids),
+                        'erklaerung': frage.erklaerung
+                    })
+                )
+                self._entries[key] = entry
+            return entry
+
+    def question(self, frage, question_number, total_questions, locale=None):
+        """new_question payload (RawJSON) for a room"""
+        static = self._entry(frage, locale)[0]
+        return RawJSON(
+            f'{{"question_number":{int(question_number)},"total_questions":{int(total_questions)},{static[1:]}'
+        )
+
+    def reveal(self, frage, locale=None, **fields):
+        """question_closed payload (RawJSON): solution plus the given per-room fields"""
+        return _splice(fields, self._entry(frage, locale)[1])
+
+
+payload_cache = PayloadCache()
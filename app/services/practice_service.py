@@ -0,0 +1,494 @@
+from collections import namedtuple
+from flask import current_app
+from app.extensions import db, redis_client
+from app.models import Wiederholung
+from app.services import answer_log, deck_service
+from app.services.payload_cache import question_fields
+from app.services.question_bank import question_bank
+from datetime import datetime, timedelta
+import json
+import random
+import time
+
+
+# SM-2 ease factor of a new card and its floor
+START_EASE = 2.5
+MIN_EASE = 1.3
+
+DAY = 86400
+
+# Random unseen candidates probed per round-trip when introducing a new card
+NEW_SAMPLE = 8
+
+# Global set of '{user_id}:{frage_id}' cards changed since the last flush
+DIRTY_KEY = 'practice:dirty'
+
+
+class Card(namedtuple('Card', ['ease_factor', 'interval_days', 'repetitions', 'lapses', 'due', 'reviewed'])):
+    """SM-2 state of one question for one user (due/reviewed as unix timestamps, reviewed 0 = never)"""
+    __slots__ = ()
+
+    def encode(self):
+        return f'{self.ease_factor:.4f},{self.interval_days:.4f},{self.repetitions},{self.lapses},{self.due:.3f},{self.reviewed:.3f}'
+
+    @classmethod
+    def decode(cls, raw):
+        ease_factor, interval_days, repetitions, lapses, due, reviewed = raw.split(',')
+        return cls(float(ease_factor), float(interval_days), int(repetitions), int(lapses), float(due), float(reviewed))
+
+
+def cards_key(user_id):
+    """Redis hash frage_id -> encoded Card of a user"""
+    return f'practice:{user_id}:cards'
+
+
+def due_key(user_id):
+    """Redis sorted set frage_id -> due timestamp of a user (lowest score = next due)"""
+    return f'practice:{user_id}:due'
+
+
+def loaded_key(user_id):
+    """Marker that the user's schedule is in Redis (also set for users without cards)"""
+    return f'practice:{user_id}:loaded'
+
+
+def session_key(room_code):
+    """Redis hash holding the state of a practice session"""
+    return f'practice:session:{room_code}'
+
+
+def _timestamp(value):
+    return (value - datetime(1970, 1, 1)).total_seconds() if value else 0.0
+
+
+def grade(correct, time_taken, zeit_sekunden):
+    """
+    SM-2 quality (0-5) of an answer
+
+    Correct answers grade by speed: 5 within the first third of the time
+    limit, 4 within two thirds, 3 after that. Wrong answers grade 1,
+    running out of time 0.
+    """
+    if not correct:
+        return 1 if time_taken < zeit_sekunden else 0
+    share = time_taken / max(zeit_sekunden, 1)
+    if share <= 1 / 3:
+        return 5
+    return 4 if share <= 2 / 3 else 3
+
+
+def schedule(card, quality, now, relearn_delay):
+    """
+    Next SM-2 state of a card after a review
+
+    Passed reviews (quality >= 3) space the card out to 1 day, 6 days and
+    then the previous interval times the ease factor. A failed review counts
+    a lapse, restarts the repetitions and brings the card back after
+    relearn_delay seconds (same session). The ease factor follows the SM-2
+    update and never drops below MIN_EASE.
+    """
+    ease_factor = max(MIN_EASE, card.ease_factor + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    if quality < 3:
+        return Card(ease_factor, 0.0, 0, card.lapses + 1, now + relearn_delay, now)
+
+    repetitions = card.repetitions + 1
+    if repetitions == 1:
+        interval_days = 1.0
+    elif repetitions == 2:
+        interval_days = 6.0
+    else:
+        interval_days = card.interval_days * card.ease_factor
+    return Card(ease_factor, interval_days, repetitions, card.lapses, now + interval_days * DAY, now)
+
+
+def load_schedule(user_id):
+    """
+    Copy a user's cards from Postgres into Redis unless they are there already
+
+    One indexed range query and one pipeline per user and PRACTICE_STATE_TTL;
+    afterwards every scheduling decision is served from Redis.
+    """
+    if redis_client.exists(loaded_key(user_id)):
+        return
+
+    rows = Wiederholung.query.filter_by(user_id=user_id).all()
+    ttl = current_app.config['PRACTICE_STATE_TTL']
+    pipe = redis_client.client.pipeline(transaction=True)
+    if rows:
+        cards = {
+            row.frage_id: Card(
+                row.ease_factor, row.interval_days, row.repetitions, row.lapses,
+                _timestamp(row.due_at), _timestamp(row.last_reviewed_at)
+            ) for row in rows
+        }
+        pipe.hset(cards_key(user_id), mapping={frage_id: card.encode() for frage_id, card in cards.items()})
+        pipe.zadd(due_key(user_id), {frage_id: card.due for frage_id, card in cards.items()})
+        pipe.expire(cards_key(user_id), ttl)
+        pipe.expire(due_key(user_id), ttl)
+    pipe.set(loaded_key(user_id), 1, ex=ttl)
+    pipe.execute()
+
+
+def due_count(user_id, now=None):
+    """Number of cards due for review (O(log n))"""
+    load_schedule(user_id)
+    return redis_client.client.zcount(due_key(user_id), '-inf', now or time.time())
+
+
+def next_due(user_id, now):
+    """Id of the most overdue question (None when nothing is due)"""
+    while True:
+        entries = redis_client.client.zrange(due_key(user_id), 0, 0, withscores=True)
+        if not entries or entries[0][1] > now:
+            return None
+        frage_id = int(entries[0][0])
+        if question_bank.get(frage_id):
+            return frage_id
+        # Drop cards of questions deleted since they were scheduled
+        pipe = redis_client.client.pipeline(transaction=False)
+        pipe.zrem(due_key(user_id), frage_id)
+        pipe.hdel(cards_key(user_id), frage_id)
+        pipe.execute()
+
+
+def pick_new(user_id, pool):
+    """Random question of pool the user has no card for yet (None when all are known)"""
+    if not pool:
+        return None
+
+    # Usually a handful of random probes finds one, without listing the cards
+    sample = random.sample(pool, min(NEW_SAMPLE, len(pool)))
+    pipe = redis_client.client.pipeline(transaction=False)
+    for frage_id in sample:
+        pipe.hexists(cards_key(user_id), frage_id)
+    for frage_id, known in zip(sample, pipe.execute()):
+        if not known:
+            return frage_id
+
+    known = {int(frage_id) for frage_id in redis_client.client.hkeys(cards_key(user_id))}
+    unseen = [frage_id for frage_id in pool if frage_id not in known]
+    return random.choice(unseen) if unseen else None
+
+
+def start_session(room_code, spiel_id, user_id, lernfeld=None, schwierigkeit=None):
+    """Initialize the Redis state of a practice session"""
+    load_schedule(user_id)
+    key = session_key(room_code)
+    pipe = redis_client.client.pipeline(transaction=True)
+    pipe.hset(key, mapping={
+        'user_id': user_id,
+        'spiel_id': spiel_id,
+        'lernfeld': lernfeld or '',
+        'schwierigkeit': schwierigkeit or '',
+        'status': 'active',
+        'current_question': '',
+        'question_start_time': 0,
+        'new_cards': 0,
+        'answered': 0,
+        'correct': 0
+    })
+    pipe.expire(key, current_app.config['PRACTICE_SESSION_TTL'])
+    pipe.execute()
+
+
+def _session(room_code, user_id):
+    """Session state, or an error status when it is not the user's running session"""
+    state = redis_client.hgetall(session_key(room_code))
+    if not state or int(state['user_id']) != user_id:
+        return None, 'not_in_game'
+    if state['status'] != 'active':
+        return None, 'finished'
+    return state, 'ok'
+
+
+def _progress(state, user_id, now):
+    return {
+        'answered': int(state['answered']),
+        'correct_count': int(state['correct']),
+        'due': redis_client.client.zcount(due_key(user_id), '-inf', now)
+    }
+
+
+def next_question(room_code, user_id, now=None):
+    """
+    Question to practice next
+
+    Due reviews come first, most overdue first, from all Lernfelder. When
+    nothing is due, up to PRACTICE_NEW_PER_SESSION unseen questions of the
+    session's Lernfeld/difficulty are introduced. An unanswered question is
+    handed out again (reloads).
+
+    Returns:
+        dict: 'status' ('ok', 'done', 'not_in_game', 'finished'); for 'ok'
+        the public 'question' and whether it is 'new', for 'done' the time
+        the next card becomes due ('next_due_at', None without cards); both
+        with the session progress
+    """
+    now = now or time.time()
+    state, status = _session(room_code, user_id)
+    if not state:
+        return {'status': status}
+    load_schedule(user_id)
+
+    key = session_key(room_code)
+    frage = question_bank.get(state.get('current_question')) if state.get('current_question') else None
+    new = False
+    if not frage:
+        frage_id = next_due(user_id, now)
+        if frage_id is None and int(state['new_cards']) < current_app.config['PRACTICE_NEW_PER_SESSION']:
+            pool = tuple(deck_service.candidate_ids(
+                schwierigkeit=state['schwierigkeit'] or None,
+                lernfelder=[state['lernfeld']] if state['lernfeld'] else None
+            ))
+            frage_id = pick_new(user_id, pool)
+            new = frage_id is not None
+        if frage_id is None:
+            upcoming = redis_client.client.zrange(due_key(user_id), 0, 0, withscores=True)
+            return dict(_progress(state, user_id, now), status='done',
+                        next_due_at=upcoming[0][1] if upcoming else None)
+
+        frage = question_bank.get(frage_id)
+        pipe = redis_client.client.pipeline(transaction=False)
+        pipe.hset(key, mapping={'current_question': frage.id, 'question_start_time': now})
+        if new:
+            pipe.hincrby(key, 'new_cards', 1)
+        pipe.execute()
+
+    return dict(_progress(state, user_id, now), status='ok', question=question_fields(frage), new=new)
+
+
+def submit_answer(room_code, user_id, antwort_id, now=None):
+    """
+    Grade the current question, reschedule its card and log the answer
+
+    The card update, the dirty mark for the next flush, the session counters
+    and the answer event (answer_log buffer) go out in one pipeline; nothing
+    touches Postgres.
+
+    Returns:
+        dict: 'status' ('ok', 'stale', 'not_in_game', 'finished') plus for
+        'ok' the result ('correct', 'correct_ids', 'erklaerung'), the card's
+        new schedule ('quality', 'interval_days', 'due_at') and the progress
+    """
+    now = now or time.time()
+    state, status = _session(room_code, user_id)
+    if not state:
+        return {'status': status}
+
+    # Claim the question once (double submits, parallel tabs)
+    key = session_key(room_code)
+    if not state.get('current_question') or not redis_client.hdel(key, 'current_question'):
+        return {'status': 'stale'}
+    frage = question_bank.get(state.get('current_question'))
+    if not frage:
+        return {'status': 'stale'}
+
+    try:
+        antwort_id = int(antwort_id) if antwort_id is not None else None
+    except (TypeError, ValueError):
+        antwort_id = None
+    correct = antwort_id in frage.correct_ids
+    time_taken = min(max(now - float(state['question_start_time']), 0.0), float(frage.zeit_sekunden))
+    quality = grade(correct, time_taken, frage.zeit_sekunden)
+
+    raw = redis_client.client.hget(cards_key(user_id), frage.id)
+    card = Card.decode(raw) if raw else Card(START_EASE, 0.0, 0, 0, now, 0.0)
+    card = schedule(card, quality, now, current_app.config['PRACTICE_RELEARN_DELAY'])
+
+    ttl = current_app.config['PRACTICE_STATE_TTL']
+    pipe = redis_client.client.pipeline(transaction=True)
+    pipe.hset(cards_key(user_id), frage.id, card.encode())
+    pipe.zadd(due_key(user_id), {frage.id: card.due})
+    pipe.sadd(DIRTY_KEY, f'{user_id}:{frage.id}')
+    pipe.expire(cards_key(user_id), ttl)
+    pipe.expire(due_key(user_id), ttl)
+    pipe.expire(loaded_key(user_id), ttl)
+    pipe.hincrby(key, 'answered', 1)
+    pipe.hincrby(key, 'correct', 1 if correct else 0)
+    pipe.rpush(answer_log.BUFFER_KEY, json.dumps({
+        'user_id': user_id,
+        'spiel_id': int(state['spiel_id']),
+        'frage_id': frage.id,
+        'lernfeld_id': frage.lernfeld_id,
+        'antwort_id': antwort_id,
+        'correct': correct,
+        'time_taken': round(time_taken, 3),
+        'score': 0,
+        'answered_at': now
+    }))
+    pipe.zcount(due_key(user_id), '-inf', now)
+    results = pipe.execute()
+
+    return {
+        'status': 'ok',
+        'correct': correct,
+        'correct_ids': sorted(frage.correct_ids),
+        'erklaerung': frage.erklaerung,
+        'quality': quality,
+        'interval_days': round(card.interval_days, 2),
+        'due_at': card.due,
+        'answered': results[6],
+        'correct_count': results[7],
+        'due': results[-1]
+    }
+
+
+def _close(spiel_id, user_id, correct):
+    """Mark a practice session finished and fold its answers into the rollups"""
+    from app.models import SpielSitzung, Teilnahme
+    from app.services.stats_service import rollup_finished_game
+
+    spiel = db.session.get(SpielSitzung, spiel_id)
+    spiel.status = 'finished'
+    spiel.finished_at = datetime.utcnow()
+    Teilnahme.query.filter_by(spiel_id=spiel_id, user_id=user_id).update({'punkte': correct})
+    db.session.commit()
+
+    # Radar chart and percentiles see the practiced answers right away
+    rollup_finished_game(spiel_id)
+
+
+def finish_session(room_code, user_id):
+    """
+    End a practice session once: persist it and fold its answers into the rollups
+
+    Returns:
+        dict: 'status' plus the session's 'answered' and 'correct_count'
+    """
+    state, status = _session(room_code, user_id)
+    if not state:
+        return {'status': status}
+    if not redis_client.set(f'{session_key(room_code)}:finished', 1, nx=True,
+                            ex=current_app.config['PRACTICE_SESSION_TTL']):
+        return {'status': 'finished'}
+    redis_client.hset(session_key(room_code), 'status', 'finished')
+
+    _close(int(state['spiel_id']), user_id, int(state['correct']))
+
+    return {'status': 'ok', 'answered': int(state['answered']), 'correct_count': int(state['correct'])}
+
+
+def close_abandoned_sessions():
+    """
+    Finish practice sessions nobody finished within PRACTICE_SESSION_TTL
+
+    Their Redis state has expired by then, so the score is counted from the
+    answer log. Claims each session through the same marker as
+    finish_session, so a late finish and this job never both close it.
+
+    Returns:
+        int: Number of sessions closed
+    """
+    from app.models import SpielSitzung, AnswerEvent
+
+    ttl = current_app.config['PRACTICE_SESSION_TTL']
+    abandoned = db.session.query(SpielSitzung.id, SpielSitzung.room_code, SpielSitzung.host_user_id).filter(
+        SpielSitzung.modus == 'practice',
+        SpielSitzung.status == 'active',
+        SpielSitzung.started_at < datetime.utcnow() - timedelta(seconds=ttl)
+    ).all()
+    if not abandoned:
+        return 0
+
+    # Scores are counted from the answer log: wait until it is written
+    if answer_log.flush() is None:
+        return 0
+    closed = 0
+    for spiel_id, room_code, user_id in abandoned:
+        if not redis_client.set(f'{session_key(room_code)}:finished', 1, nx=True, ex=ttl):
+            continue
+        correct = db.session.query(db.func.count(AnswerEvent.id)).filter(
+            AnswerEvent.spiel_id == spiel_id, AnswerEvent.correct.is_(True)
+        ).scalar()
+        _close(spiel_id, user_id, correct)
+        closed += 1
+    return closed
+
+
+def flush_schedules():
+    """
+    Bulk upsert all cards changed since the last flush into wiederholungen
+
+    Takes up to PRACTICE_FLUSH_BATCH dirty marks at a time, reads their
+    current state in one pipeline and writes them with one multi-row upsert.
+    Reviews arriving meanwhile mark their card again for the next flush.
+
+    Returns:
+        int: Number of cards written
+    """
+    if not redis_client.client:
+        return 0
+
+    batch_size = current_app.config['PRACTICE_FLUSH_BATCH']
+    if db.engine.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+
+    table = Wiederholung.__table__
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.frage_id],
+        set_={column: statement.excluded[column] for column in (
+            'ease_factor', 'interval_days', 'repetitions', 'lapses', 'due_at', 'last_reviewed_at'
+        )}
+    )
+    written = 0
+
+    while True:
+        members = redis_client.client.spop(DIRTY_KEY, batch_size)
+        if not members:
+            break
+
+        pairs = [tuple(int(part) for part in member.split(':')) for member in members]
+        pipe = redis_client.client.pipeline(transaction=False)
+        for user_id, frage_id in pairs:
+            pipe.hget(cards_key(user_id), frage_id)
+
+        rows = []
+        for (user_id, frage_id), raw in zip(pairs, pipe.execute()):
+            if raw is None:
+                continue  # Question deleted meanwhile
+            card = Card.decode(raw)
+            rows.append({
+                'user_id': user_id,
+                'frage_id': frage_id,
+                'ease_factor': card.ease_factor,
+                'interval_days': card.interval_days,
+                'repetitions': card.repetitions,
+                'lapses': card.lapses,
+                'due_at': datetime.utcfromtimestamp(card.due),
+                'last_reviewed_at': datetime.utcfromtimestamp(card.reviewed) if card.reviewed else None
+            })
+
+        if rows:
+            try:
+                db.session.execute(statement, rows)
+                db.session.commit()
+            except Exception:
+                # Mark the batch again so the next flush retries it
+                db.session.rollback()
+                redis_client.client.sadd(DIRTY_KEY, *members)
+                raise
+        written += len(rows)
+
+        if len(members) < batch_size:
+            break
+
+    return written
+
+
+def refresh_schedules():
+    """
+    Periodic job: persist changed practice cards and close abandoned
+    sessions (one worker per interval), then reschedule
+    """
+    from app.services.game_scheduler import game_scheduler
+
+    interval = current_app.config['PRACTICE_FLUSH_INTERVAL']
+    try:
+        if redis_client.set(f'{DIRTY_KEY}:lock', 1, nx=True, ex=interval):
+            flush_schedules()
+            close_abandoned_sessions()
+    finally:
+        game_scheduler.call_later(interval, refresh_schedules)
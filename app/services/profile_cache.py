@@ -0,0 +1,75 @@
+from flask import current_app
+from app.extensions import db, redis_client
+from app.models import User
+import json
+
+
+def profile_key(user_id):
+    """Redis string caching a user's public profile (JSON, avatar already decoded)"""
+    return f'user:{user_id}:profile:json'
+
+
+def get_profiles(user_ids):
+    """
+    Resolve public player profiles in bulk
+
+    Cached profiles are read with one MGET and decoded with a single
+    json.loads each; misses are loaded with a single IN query and written
+    back to the cache.
+
+    Args:
+        user_ids: Iterable of user ids
+
+    Returns:
+        dict: {user_id: {'user_id', 'username', 'avatar'}}
+    """
+    user_ids = [int(uid) for uid in user_ids]
+    if not user_ids:
+        return {}
+
+    cached = [None] * len(user_ids)
+    if redis_client.client:
+        cached = redis_client.client.mget([profile_key(uid) for uid in user_ids])
+
+    profiles = {}
+    missing = []
+    for uid, entry in zip(user_ids, cached):
+        if entry:
+            profiles[uid] = json.loads(entry)
+        else:
+            missing.append(uid)
+
+    if missing:
+        rows = db.session.query(User.id, User.username, User.avatar_config).filter(
+            User.id.in_(missing)
+        ).all()
+
+        ttl = current_app.config['PROFILE_CACHE_TTL']
+        pipe = redis_client.client.pipeline(transaction=False) if redis_client.client else None
+        for row in rows:
+            profiles[row.id] = _profile(row.id, row.username, row.avatar_config)
+            if pipe is not None:
+                pipe.set(profile_key(row.id), json.dumps(profiles[row.id]), ex=ttl)
+        if pipe is not None:
+            pipe.execute()
+
+    return profiles
+
+
+def get_profile(user_id):
+    """Single profile (None if the user does not exist)"""
+    return get_profiles([user_id]).get(int(user_id))
+
+
+def invalidate(user_id):
+    """Drop a cached profile after username/avatar changes"""
+    redis_client.delete(profile_key(user_id))
+
+
+def _profile(user_id, username, avatar_json):
+    """Profile dict with the avatar config decoded (invalid JSON becomes {})"""
+    try:
+        avatar = json.loads(avatar_json or '{}')
+    except ValueError:
+        avatar = {}
+    return {'user_id': user_id, 'username': username, 'avatar': avatar}
@@ -0,0 +1,258 @@
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from types import MappingProxyType
+import json
+import mmap
+import os
+import struct
+
+
+# Binary question bank artifact, built and read on the same host. Header and
+# sections are all in native byte order ('=' header, array/memoryview.cast
+# sections); a file from a host of the other byte order fails the format
+# check and is rebuilt.
+#
+#   header   magic, format, content version, counts and section offsets
+#   q_ids    u32[n]  sorted question ids
+#   q_offs   u64[n]  blob offset per question (relative to the blob section)
+#   q_lens   u32[n]  blob length per question
+#   a_ids    u32[m]  sorted answer ids
+#   a_frage  u32[m]  question id per answer
+#   idx_ids  u32[k]  id lists of all filter indexes, back to back
+#   meta     JSON    Lernfelder, tag names, ratings + filter index directory
+#   blobs    JSON    one pre-encoded record per question
+MAGIC = b'NMQB'
+FORMAT = 3
+HEADER = struct.Struct('=4sH2x16s3I8Q')
+
+# Decoded questions kept per worker (the rest stays in the shared pages)
+DECODED_CACHE_SIZE = 2048
+
+
+class ArtifactError(Exception):
+    """Artifact missing, truncated or of an unknown format"""
+
+
+def _align(buf):
+    buf.extend(b'\0' * (-len(buf) % 8))
+    return len(buf)
+
+
+def _encode(q):
+    """Question record as compact JSON (answers as [id, text, korrekt, reihenfolge])"""
+    return json.dumps([
+        q.id, q.lernfeld_id, q.lernfeld, q.frage_text, q.themenbereich, q.schwierigkeit,
+        q.typ, q.zeit_sekunden, q.code_snippet, q.bild_idee, q.erklaerung, list(q.tags),
+        [[a.id, a.text, a.korrekt, a.reihenfolge] for a in q.antworten], q.rating
+    ], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def write(path, questions, lernfelder, version, indexes, tag_names):
+    """
+    Write the artifact atomically (readers keep their old mapping)
+
+    Args:
+        path: Target file
+        questions: QuestionRecords
+        lernfelder: (id, name, beschreibung) rows
+        version: Content hash of the bank (16 hex chars)
+        indexes: {field: {value: sorted ids}} filter indexes
+        tag_names: {slug: tag name}
+    """
+    questions = sorted(questions, key=lambda q: q.id)
+    answers = sorted((a.id, q.id) for q in questions for a in q.antworten)
+
+    blobs = [_encode(q) for q in questions]
+    offsets, position = [], 0
+    for blob in blobs:
+        offsets.append(position)
+        position += len(blob)
+
+    index_ids = array('I')
+    directory = {}
+    for field, groups in indexes.items():
+        directory[field] = []
+        for value, ids in groups.items():
+            directory[field].append([value, len(index_ids), len(ids)])
+            index_ids.extend(ids)
+
+    meta = json.dumps({
+        'lernfelder': [[lf.id, lf.name, lf.beschreibung] for lf in lernfelder],
+        'tag_names': dict(tag_names),
+        'ratings': {q.id: q.rating for q in questions if q.rating is not None},
+        'indexes': directory
+    }, ensure_ascii=False).encode('utf-8')
+
+    body = bytearray(b'\0' * HEADER.size)
+    sections = []
+    for part in (
+        array('I', [q.id for q in questions]),
+        array('Q', offsets),
+        array('I', [len(blob) for blob in blobs]),
+        array('I', [aid for aid, _ in answers]),
+        array('I', [fid for _, fid in answers]),
+        index_ids,
+    ):
+        sections.append(_align(body))
+        body.extend(part.tobytes())
+    sections.append(_align(body))
+    body.extend(meta)
+    sections.append(_align(body))
+
+    HEADER.pack_into(
+        body, 0, MAGIC, FORMAT, version.encode('ascii'),
+        len(questions), len(answers), len(meta), *sections
+    )
+
+    tmp = f'{path}.{os.getpid()}.tmp'
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(tmp, 'wb') as f:
+        f.write(body)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, path)
+
+
+def file_identity(path):
+    """Cheap change marker of the artifact file, None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class _Questions:
+    """Read-only id -> QuestionRecord mapping over the mapped blobs (a short-lived view)"""
+
+    def __init__(self, artifact):
+        self._artifact = artifact
+
+    def __len__(self):
+        return len(self._artifact.q_ids)
+
+    def get(self, frage_id, default=None):
+        return self._artifact.question(frage_id) or default
+
+
+class _Answers:
+    """Read-only id -> AnswerRecord mapping via the answer index (a short-lived view)"""
+
+    def __init__(self, artifact):
+        self._artifact = artifact
+
+    def get(self, antwort_id, default=None):
+        return self._artifact.answer(antwort_id) or default
+
+
+class ArtifactSnapshot:
+    """
+    Question bank served from a memory-mapped artifact
+
+    Same interface as the in-memory snapshot of QuestionBank. Opening only
+    maps the file and decodes the small meta section; questions are decoded
+    on access from pages that all workers share through the page cache.
+
+    The snapshot holds no references to itself, so its file is unmapped as
+    soon as the last reference is dropped.
+    """
+
+    def __init__(self, path, record_types):
+        self.path = path
+        self.identity = file_identity(path)
+        self._question_type, self._answer_type, lernfeld_type = record_types
+
+        try:
+            with open(path, 'rb') as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError) as e:
+            raise ArtifactError(f'Cannot map {path}: {e}')
+        if len(self._mm) < HEADER.size:
+            raise ArtifactError(f'{path} is truncated')
+
+        (magic, fmt, version, n_questions, n_answers, meta_len,
+         q_ids, q_offs, q_lens, a_ids, a_frage, idx_ids, meta, blobs) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or fmt != FORMAT:
+            raise ArtifactError(f'{path} is not a question bank artifact (format {FORMAT})')
+
+        view = memoryview(self._mm)
+        self.version = version.decode('ascii')
+        self.q_ids = view[q_ids:q_ids + 4 * n_questions].cast('I')
+        self._q_offs = view[q_offs:q_offs + 8 * n_questions].cast('Q')
+        self._q_lens = view[q_lens:q_lens + 4 * n_questions].cast('I')
+        self._a_ids = view[a_ids:a_ids + 4 * n_answers].cast('I')
+        self._a_frage = view[a_frage:a_frage + 4 * n_answers].cast('I')
+        self._blobs = blobs
+
+        index_view = view[idx_ids:meta].cast('I')
+        meta = json.loads(bytes(view[meta:meta + meta_len]))
+        self.lernfelder = tuple(lernfeld_type(*lf) for lf in meta['lernfelder'])
+        indexes = {
+            field: MappingProxyType({
+                value: index_view[start:start + count] for value, start, count in entries
+            })
+            for field, entries in meta['indexes'].items()
+        }
+        self.by_schwierigkeit = indexes['schwierigkeit']
+        self.by_lernfeld = indexes['lernfeld']
+        self.by_themenbereich = indexes['themenbereich']
+        self.by_typ = indexes['typ']
+        self.by_tag = indexes['tag']
+        self.tag_names = MappingProxyType(meta['tag_names'])
+        self.ratings = MappingProxyType({int(frage_id): rating for frage_id, rating in meta['ratings'].items()})
+        self.all_ids = self.q_ids
+        self._decoded = OrderedDict()
+
+    @property
+    def questions(self):
+        return _Questions(self)
+
+    @property
+    def answers(self):
+        return _Answers(self)
+
+    def _find(self, ids, value):
+        """Position of value in a sorted id array, or None"""
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            return None
+        position = bisect_left(ids, value)
+        if position < len(ids) and ids[position] == value:
+            return position
+        return None
+
+    def _decode_at(self, position):
+        start = self._blobs + self._q_offs[position]
+        (fid, lernfeld_id, lernfeld, frage_text, themenbereich, schwierigkeit, typ, zeit_sekunden,
+         code_snippet, bild_idee, erklaerung, tags, antworten, rating) = json.loads(
+            self._mm[start:start + self._q_lens[position]]
+        )
+        antworten = tuple(self._answer_type(aid, fid, text, korrekt, reihenfolge)
+                          for aid, text, korrekt, reihenfolge in antworten)
+        return self._question_type(
+            id=fid, lernfeld_id=lernfeld_id, lernfeld=lernfeld, frage_text=frage_text,
+            themenbereich=themenbereich, schwierigkeit=schwierigkeit, typ=typ,
+            zeit_sekunden=zeit_sekunden, code_snippet=code_snippet, bild_idee=bild_idee,
+            erklaerung=erklaerung, tags=tuple(tags), antworten=antworten,
+            correct_ids=frozenset(a.id for a in antworten if a.korrekt), rating=rating
+        )
+
+    def question(self, frage_id):
+        position = self._find(self.q_ids, frage_id)
+        if position is None:
+            return None
+        record = self._decoded.get(position)
+        if record is None:
+            record = self._decoded[position] = self._decode_at(position)
+            if len(self._decoded) > DECODED_CACHE_SIZE:
+                self._decoded.popitem(last=False)
+        return record
+
+    def answer(self, antwort_id):
+        position = self._find(self._a_ids, antwort_id)
+        if position is None:
+            return None
+        frage = self.question(self._a_frage[position])
+        return next((a for a in frage.antworten if a.id == int(antwort_id)), None)
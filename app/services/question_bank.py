@@ -0,0 +1,447 @@
+from collections import namedtuple
+from types import MappingProxyType
+import hashlib
+import json
+import threading
+import time
+
+from app.extensions import db, redis_client
+from app.services import question_artifact
+
+
+# Redis key holding the bank generation; bumped on every invalidation so all
+# workers drop their in-process copy on their next access
+GENERATION_KEY = 'question_bank:generation'
+
+# Redis key holding the content version of the database as of the last
+# invalidation; a mapped artifact of any other version is stale
+VERSION_KEY = 'question_bank:version'
+
+# Single-valued QuestionRecord fields with a filter index (tags are indexed
+# separately, by slug)
+INDEX_FIELDS = ('schwierigkeit', 'lernfeld', 'themenbereich', 'typ')
+
+# Filters with precomputed counts, see QuestionBank.facets()
+FACET_FIELDS = {'lernfeld': 'by_lernfeld', 'schwierigkeit': 'by_schwierigkeit', 'typ': 'by_typ'}
+
+
+class AnswerRecord(namedtuple('AnswerRecord', ['id', 'frage_id', 'text', 'korrekt', 'reihenfolge'])):
+    """Read-only snapshot of an Antwort row"""
+    __slots__ = ()
+
+    def to_dict(self):
+        """Same shape as Antwort.to_dict (without revealing correct answer)"""
+        return {
+            'id': self.id,
+            'text': self.text,
+            'reihenfolge': self.reihenfolge
+        }
+
+
+class LernfeldRecord(namedtuple('LernfeldRecord', ['id', 'name', 'beschreibung'])):
+    """Read-only snapshot of a Lernfeld row"""
+    __slots__ = ()
+
+
+class QuestionRecord(namedtuple('QuestionRecord', [
+    'id', 'lernfeld_id', 'lernfeld', 'frage_text', 'themenbereich', 'schwierigkeit',
+    'typ', 'zeit_sekunden', 'code_snippet', 'bild_idee', 'erklaerung', 'tags',
+    'antworten', 'correct_ids', 'rating'
+])):
+    """Read-only snapshot of a Frage row including its answers (rating: calibrated difficulty or None)"""
+    __slots__ = ()
+
+    def to_dict(self):
+        """Same shape as Frage.to_dict"""
+        return {
+            'id': self.id,
+            'frage_text': self.frage_text,
+            'themenbereich': self.themenbereich,
+            'schwierigkeit': self.schwierigkeit,
+            'typ': self.typ,
+            'zeit_sekunden': self.zeit_sekunden,
+            'code_snippet': self.code_snippet,
+            'bild_idee': self.bild_idee,
+            'erklaerung': self.erklaerung,
+            'tags': list(self.tags),
+            'lernfeld': self.lernfeld,
+            'antworten': [a.to_dict() for a in self.antworten]
+        }
+
+
+class _Snapshot:
+    """Immutable set of questions plus lookup indexes"""
+
+    def __init__(self, questions, lernfelder):
+        self.questions = MappingProxyType({q.id: q for q in questions})
+        self.answers = MappingProxyType({a.id: a for q in questions for a in q.antworten})
+        self.lernfelder = tuple(lernfelder)
+
+        indexes, tag_names = build_indexes(questions)
+        self.by_schwierigkeit = indexes['schwierigkeit']
+        self.by_lernfeld = indexes['lernfeld']
+        self.by_themenbereich = indexes['themenbereich']
+        self.by_typ = indexes['typ']
+        self.by_tag = indexes['tag']
+        self.tag_names = tag_names
+        self.ratings = MappingProxyType({q.id: q.rating for q in questions if q.rating is not None})
+        self.all_ids = tuple(sorted(self.questions))
+
+        self.version = _content_hash(questions)
+
+
+def build_indexes(questions):
+    """
+    Group question ids by every filter field
+
+    Returns:
+        tuple: ({field: {value: (id, ...)}} for INDEX_FIELDS plus 'tag'
+        keyed by tag slug, {slug: tag name})
+    """
+    from app.models import Tag
+
+    groups = {field: {} for field in INDEX_FIELDS + ('tag',)}
+    tag_names = {}
+    for q in questions:
+        for field in INDEX_FIELDS:
+            groups[field].setdefault(getattr(q, field), []).append(q.id)
+        for slug, name in {Tag.slugify(name): name for name in q.tags}.items():
+            groups['tag'].setdefault(slug, []).append(q.id)
+            tag_names.setdefault(slug, name)
+
+    indexes = {
+        field: MappingProxyType({key: tuple(sorted(ids)) for key, ids in index.items()})
+        for field, index in groups.items()
+    }
+    return indexes, MappingProxyType(tag_names)
+
+
+def _content_hash(questions):
+    """Stable hash over the bank content, changes whenever any question changes"""
+    digest = hashlib.sha1()
+    for q in sorted(questions, key=lambda q: q.id):
+        digest.update(json.dumps(q, ensure_ascii=False, default=sorted).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def _parse_tags(raw):
+    try:
+        return tuple(json.loads(raw or '[]'))
+    except (TypeError, ValueError):
+        return ()
+
+
+class QuestionBank:
+    """
+    In-process, read-only cache of all questions and answers.
+
+    The bank is loaded lazily with a few queries and then serves the live game
+    hot path without touching the database. Call invalidate() after questions
+    change; every worker reloads on its next access.
+
+    With QUESTION_BANK_ARTIFACT set, the bank is compiled into a binary
+    artifact instead (see question_artifact) that every worker memory-maps,
+    so all workers share one copy of the pages and startup only opens the
+    file. invalidate() recompiles it and publishes the database version;
+    workers notice the replaced file and swap to it. An artifact whose version
+    does not match the database (failed compile, file copied from another
+    host) is rebuilt, or the bank is served from memory if that fails.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.artifact_path = None
+        self._snapshot = None
+        self._generation = None
+        self._checked_at = 0.0
+        self._facets = (None, None)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Bind the bank to the app and map an existing artifact"""
+        self.app = app
+        self.artifact_path = app.config.get('QUESTION_BANK_ARTIFACT')
+        app.extensions['question_bank'] = self
+
+        if self.artifact_path and question_artifact.file_identity(self.artifact_path):
+            try:
+                generation, version = self._published()
+                snapshot = self._open_artifact()
+            except question_artifact.ArtifactError as e:
+                app.logger.warning(f'⚠️  Question bank artifact unusable, will rebuild: {e}')
+                return
+            # Without a published version the first access checks it against the database
+            if version is not None and snapshot.version == version:
+                self._snapshot, self._generation = snapshot, generation
+                self._checked_at = time.monotonic()
+
+    def _load_records(self):
+        """All questions (with answers) and Lernfelder from the database"""
+        from app.models import Frage, Antwort, Lernfeld, Tag, frage_tags, FrageStatistik
+
+        lernfelder = [LernfeldRecord(*row) for row in db.session.query(
+            Lernfeld.id, Lernfeld.name, Lernfeld.beschreibung
+        ).order_by(Lernfeld.id)]
+        lernfeld_names = {lf.id: lf.name for lf in lernfelder}
+
+        answers_by_frage = {}
+        for a in db.session.query(
+            Antwort.id, Antwort.frage_id, Antwort.text, Antwort.korrekt, Antwort.reihenfolge
+        ).order_by(Antwort.frage_id, Antwort.id):
+            answers_by_frage.setdefault(a.frage_id, []).append(
+                AnswerRecord(a.id, a.frage_id, a.text, bool(a.korrekt), a.reihenfolge)
+            )
+
+        # Normalized tags; questions without frage_tags rows keep their JSON tags
+        tags_by_frage = {}
+        for frage_id, name in db.session.query(frage_tags.c.frage_id, Tag.name).join(
+            Tag, frage_tags.c.tag_id == Tag.id
+        ).order_by(frage_tags.c.frage_id, Tag.name):
+            tags_by_frage.setdefault(frage_id, []).append(name)
+
+        # Calibrated difficulty from the item calibration job
+        ratings = dict(db.session.query(FrageStatistik.frage_id, FrageStatistik.rating).filter(
+            FrageStatistik.rating.isnot(None)
+        ))
+
+        questions = []
+        for f in db.session.query(
+            Frage.id, Frage.lernfeld_id, Frage.frage_text, Frage.themenbereich,
+            Frage.schwierigkeit, Frage.typ, Frage.zeit_sekunden, Frage.code_snippet,
+            Frage.bild_idee, Frage.erklaerung, Frage.tags
+        ):
+            antworten = tuple(answers_by_frage.get(f.id, ()))
+            questions.append(QuestionRecord(
+                id=f.id,
+                lernfeld_id=f.lernfeld_id,
+                lernfeld=lernfeld_names.get(f.lernfeld_id),
+                frage_text=f.frage_text,
+                themenbereich=f.themenbereich,
+                schwierigkeit=f.schwierigkeit,
+                typ=f.typ,
+                zeit_sekunden=f.zeit_sekunden,
+                code_snippet=f.code_snippet,
+                bild_idee=f.bild_idee,
+                erklaerung=f.erklaerung,
+                tags=tuple(tags_by_frage[f.id]) if f.id in tags_by_frage else _parse_tags(f.tags),
+                antworten=antworten,
+                correct_ids=frozenset(a.id for a in antworten if a.korrekt),
+                rating=ratings.get(f.id)
+            ))
+        return questions, lernfelder
+
+    def compile(self, records=None):
+        """
+        Build the artifact from the database (needs app context)
+
+        Args:
+            records: (questions, lernfelder) already loaded by _load_records
+
+        Returns:
+            str: Version (content hash) of the written artifact
+        """
+        questions, lernfelder = records or self._load_records()
+        version = _content_hash(questions)
+        indexes, tag_names = build_indexes(questions)
+        question_artifact.write(self.artifact_path, questions, lernfelder, version, indexes, tag_names)
+        return version
+
+    def _published(self):
+        """(generation, database version) as last published by invalidate()"""
+        if not redis_client.client:
+            return None, None
+        return tuple(redis_client.client.mget(GENERATION_KEY, VERSION_KEY))
+
+    def _open_artifact(self):
+        """
+        Map the artifact file
+
+        A superseded snapshot is never closed explicitly: requests still
+        running may hold it or memoryviews into its mapping (all_ids, the
+        filter indexes), and mmap.close() fails while views are exported. Its
+        file is unmapped when the last reference is dropped.
+        """
+        return question_artifact.ArtifactSnapshot(
+            self.artifact_path, (QuestionRecord, AnswerRecord, LernfeldRecord)
+        )
+
+    def _load_artifact(self, version):
+        """
+        Map the artifact, rebuilding it if it is missing, unreadable or not
+        of the database version (checked against the database if None)
+        """
+        records = None
+        try:
+            snapshot = self._open_artifact()
+        except question_artifact.ArtifactError:
+            snapshot = None
+        if snapshot is not None and version is None:
+            records = self._load_records()
+            version = _content_hash(records[0])
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        records = records or self._load_records()
+        try:
+            self.compile(records)
+            return self._open_artifact()
+        except (OSError, question_artifact.ArtifactError) as e:
+            # Read-only or broken artifact location: serve from memory
+            self.app.logger.warning(f'⚠️  Question bank artifact not available: {e}')
+            return _Snapshot(*records)
+
+    def reload(self):
+        """Load all questions and answers (needs app context)"""
+        with self._lock:
+            generation, version = self._published()
+
+            if self.artifact_path:
+                snapshot = self._load_artifact(version)
+            else:
+                snapshot = _Snapshot(*self._load_records())
+
+            self._snapshot = snapshot
+            self._generation = generation
+            self._checked_at = time.monotonic()
+
+        if self.app:
+            self.app.logger.info(
+                f'Question bank loaded: {len(snapshot.questions)} questions (version {snapshot.version})'
+            )
+        return snapshot
+
+    def invalidate(self):
+        """Drop the cached bank here and signal all other workers to reload"""
+        version = None
+        if self.artifact_path:
+            records = self._load_records()
+            version = _content_hash(records[0])
+            try:
+                self.compile(records)
+            except OSError as e:
+                # Workers see the version mismatch and serve from memory
+                self.app.logger.warning(f'⚠️  Could not write question bank artifact: {e}')
+        self._snapshot = None
+        if redis_client.client:
+            pipe = redis_client.client.pipeline()
+            if version:
+                pipe.set(VERSION_KEY, version)
+            else:
+                pipe.delete(VERSION_KEY)
+            pipe.incr(GENERATION_KEY)
+            pipe.execute()
+
+    def _current(self):
+        """Return the loaded snapshot, reloading if this or another worker invalidated it"""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            interval = self.app.config.get('QUESTION_BANK_CHECK_INTERVAL', 5) if self.app else 5
+            now = time.monotonic()
+            if now - self._checked_at < interval:
+                return snapshot
+            self._checked_at = now
+            generation, version = self._published()
+            if self.artifact_path and question_artifact.file_identity(self.artifact_path) not in (
+                None, getattr(snapshot, 'identity', None)
+            ):
+                # A newer artifact replaced the mapped one: swap to it if it is current
+                try:
+                    fresh = self._open_artifact()
+                    if fresh.version == version:
+                        with self._lock:
+                            self._snapshot, self._generation = fresh, generation
+                        return fresh
+                except question_artifact.ArtifactError as e:
+                    self.app.logger.warning(f'⚠️  Question bank artifact unusable: {e}')
+            if generation == self._generation:
+                return snapshot
+        return self.reload()
+
+    @property
+    def version(self):
+        """Content hash of the currently loaded bank"""
+        return self._current().version
+
+    def __len__(self):
+        return len(self._current().questions)
+
+    def get(self, frage_id):
+        """Question record by id, or None"""
+        try:
+            return self._current().questions.get(int(frage_id))
+        except (TypeError, ValueError):
+            return None
+
+    def get_answer(self, antwort_id):
+        """Answer record by id, or None"""
+        try:
+            return self._current().answers.get(int(antwort_id))
+        except (TypeError, ValueError):
+            return None
+
+    def lernfelder(self):
+        """All Lernfelder as LernfeldRecord (id, name, beschreibung)"""
+        return self._current().lernfelder
+
+    def facets(self):
+        """
+        Question counts per Lernfeld, Schwierigkeit, typ and tag
+
+        Computed once per bank version from the index sizes.
+
+        Returns:
+            dict: {'lernfeld': {name: count}, 'schwierigkeit': {...},
+            'typ': {...}, 'tags': {tag name: count}} (tags most used first)
+        """
+        snapshot = self._current()
+        version, facets = self._facets
+        if version == snapshot.version:
+            return facets
+
+        facets = {
+            facet: {value: len(ids) for value, ids in sorted(getattr(snapshot, index).items()) if value}
+            for facet, index in FACET_FIELDS.items()
+        }
+        facets['tags'] = {
+            snapshot.tag_names[slug]: len(ids)
+            for slug, ids in sorted(snapshot.by_tag.items(), key=lambda item: (-len(item[1]), item[0]))
+        }
+        self._facets = (snapshot.version, facets)
+        return facets
+
+    def ratings(self):
+        """Calibrated difficulty ratings {frage_id: rating} (calibrated questions only)"""
+        return self._current().ratings
+
+    def ids(self, schwierigkeit=None, lernfeld=None, themenbereich=None, typ=None, tags=None):
+        """
+        Sorted sequence of question ids matching all given filters
+
+        tags (names or slugs) match questions carrying any of them.
+        """
+        snapshot = self._current()
+        filters = [
+            (snapshot.by_schwierigkeit, schwierigkeit),
+            (snapshot.by_lernfeld, lernfeld),
+            (snapshot.by_themenbereich, themenbereich),
+            (snapshot.by_typ, typ),
+        ]
+        selected = [index.get(value, ()) for index, value in filters if value]
+        if tags:
+            from app.models import Tag
+            tagged = [snapshot.by_tag.get(slug, ()) for slug in {Tag.slugify(tag) for tag in tags}]
+            selected.append(tagged[0] if len(tagged) == 1 else tuple(sorted(set().union(*tagged))))
+        if not selected:
+            return snapshot.all_ids
+        if len(selected) == 1:
+            return selected[0]
+
+        # Intersect starting from the smallest candidate list
+        selected.sort(key=len)
+        result = set(selected[0])
+        for ids in selected[1:]:
+            result.intersection_update(ids)
+        return tuple(sorted(result))
+
+
+question_bank = QuestionBank()
@@ -0,0 +1,502 @@
+from flask import current_app
+from app.extensions import db
+from app.models import Lernfeld, Frage, Antwort, Tag, frage_tags
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import glob
+import hashlib
+import json
+
+
+REQUIRED_FIELDS = ('lernfeld', 'frage', 'themenbereich', 'schwierigkeit', 'typ', 'zeit_sekunden')
+QUESTION_TYPES = ('mc', 'text', 'order', 'math')
+DIFFICULTY_LEVELS = ('Leicht', 'Mittel', 'Schwer', 'Profi')
+
+# Characters read from the JSON file per chunk while streaming
+READ_CHUNK = 1 << 16
+
+# Records per validation task, and tasks in flight per worker process
+VALIDATE_CHUNK = 500
+TASKS_PER_WORKER = 2
+
+
+def iter_json_array(filepath, chunk_size=READ_CHUNK):
+    """
+    Stream the elements of a top-level JSON array
+
+    Only the current chunk and the element being decoded are held in memory,
+    not the whole file.
+    """
+    decoder = json.JSONDecoder()
+    with open(filepath, 'r', encoding='utf-8') as f:
+        buf = ''
+        pos = 0
+        started = False
+
+        def fill():
+            nonlocal buf, pos
+            chunk = f.read(chunk_size)
+            buf = buf[pos:] + chunk
+            pos = 0
+            return bool(chunk)
+
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n':
+                pos += 1
+            if pos == len(buf):
+                if not fill():
+                    raise ValueError('Unexpected end of JSON file')
+                continue
+
+            if not started:
+                if buf[pos] != '[':
+                    raise ValueError('Expected a JSON array of questions')
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == ']':
+                return
+            if buf[pos] == ',':
+                pos += 1
+                continue
+
+            try:
+                element, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Element continues in the next chunk
+                if not fill():
+                    raise
+                continue
+            pos = end
+            yield element
+
+
+def import_key(lernfeld, frage_text):
+    """Identity of a question: same Lernfeld + text is the same question"""
+    return hashlib.sha256(f'{lernfeld}\x1f{frage_text}'.encode('utf-8')).hexdigest()
+
+
+def _choice_answers(antworten):
+    """Answer rows of a multiple-choice question (at least one correct)"""
+    if not isinstance(antworten, list):
+        raise ValueError('antworten must be a list')
+    for idx, antwort in enumerate(antworten, 1):
+        if not isinstance(antwort, dict) or not antwort.get('text') or not isinstance(antwort.get('korrekt'), bool):
+            raise ValueError(f'Answer {idx} needs text and korrekt (true/false)')
+    if not any(antwort['korrekt'] for antwort in antworten):
+        raise ValueError('No correct answer')
+    return [{'text': antwort['text'], 'korrekt': antwort['korrekt'], 'reihenfolge': None} for antwort in antworten]
+
+
+def _order_answers(antworten):
+    """
+    Answer rows of an order question
+
+    Positions come from 'reihenfolge' (or 'rang'), else from the list order,
+    and must number the answers 1..n. The first element of the order is
+    marked korrekt so single-choice clients can score the question.
+    """
+    if not isinstance(antworten, list) or len(antworten) < 2:
+        raise ValueError('order questions need at least two antworten')
+    positions = []
+    for idx, antwort in enumerate(antworten, 1):
+        if not isinstance(antwort, dict) or not antwort.get('text'):
+            raise ValueError(f'Answer {idx} needs text')
+        position = antwort.get('reihenfolge', antwort.get('rang', idx))
+        if not isinstance(position, int) or isinstance(position, bool):
+            raise ValueError(f'Answer {idx}: reihenfolge must be an integer')
+        positions.append(position)
+    if sorted(positions) != list(range(1, len(antworten) + 1)):
+        raise ValueError('reihenfolge must number the answers 1..n')
+    return [
+        {'text': antwort['text'], 'korrekt': position == 1, 'reihenfolge': position}
+        for antwort, position in zip(antworten, positions)
+    ]
+
+
+def normalize(data):
+    """
+    Validate a JSON question and bring it into row shape
+
+    What a valid question needs depends on its typ: mc questions a list of
+    antworten with at least one correct one, order questions antworten in a
+    complete order, text/math questions loesung_keywords (antworten are
+    optional and validated like mc).
+
+    Returns:
+        dict: Frage columns plus 'lernfeld' (name) and 'antworten' (rows
+        without frage_id)
+
+    Raises:
+        ValueError: If required fields are missing or malformed
+    """
+    missing = [field for field in REQUIRED_FIELDS if data.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    if data['typ'] not in QUESTION_TYPES:
+        raise ValueError(f"Unknown typ: {data['typ']}")
+    if data['schwierigkeit'] not in DIFFICULTY_LEVELS:
+        raise ValueError(f"Unknown schwierigkeit: {data['schwierigkeit']}")
+    if not isinstance(data['zeit_sekunden'], int) or data['zeit_sekunden'] <= 0:
+        raise ValueError('zeit_sekunden must be a positive integer')
+    tags = data.get('tags') or []
+    if not isinstance(tags, list) or not all(isinstance(tag, str) and Tag.slugify(tag) for tag in tags):
+        raise ValueError('tags must be a list of non-empty strings')
+
+    typ = data['typ']
+    record = {
+        'lernfeld': data['lernfeld'],
+        'frage_text': data['frage'],
+        'themenbereich': data['themenbereich'],
+        'schwierigkeit': data['schwierigkeit'],
+        'typ': typ,
+        'zeit_sekunden': data['zeit_sekunden'],
+        'code_snippet': data.get('code_snippet'),
+        'bild_idee': data.get('bild_idee'),
+        'erklaerung': data.get('erklaerung', ''),
+        'tags': json.dumps(tags)
+    }
+
+    if typ == 'mc':
+        record['antworten'] = _choice_answers(data.get('antworten'))
+    elif typ == 'order':
+        record['antworten'] = _order_answers(data.get('antworten'))
+    else:
+        keywords = data.get('loesung_keywords')
+        if not isinstance(keywords, list) or not keywords or not all(
+            isinstance(keyword, str) and keyword.strip() for keyword in keywords
+        ):
+            raise ValueError('loesung_keywords must be a non-empty list of strings')
+        record['loesung_keywords'] = json.dumps(keywords)
+        record['antworten'] = _choice_answers(data['antworten']) if data.get('antworten') else []
+    return record
+
+
+def content_hash(record):
+    """Hash over everything that is imported for a question (incl. answers)"""
+    return hashlib.sha256(json.dumps(record, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def validate_chunk(chunk):
+    """
+    Validate and hash a chunk of raw questions (runs in a worker process)
+
+    Args:
+        chunk: [(index, data)]
+
+    Returns:
+        list: (index, import_key, content_hash, record) per valid question,
+        (index, None, None, error message) per invalid one
+    """
+    results = []
+    for index, data in chunk:
+        try:
+            if not isinstance(data, dict):
+                raise ValueError('Question must be an object')
+            record = normalize(data)
+        except (ValueError, TypeError) as e:
+            results.append((index, None, None, str(e)))
+            continue
+        results.append((index, import_key(record['lernfeld'], record['frage_text']), content_hash(record), record))
+    return results
+
+
+def resolve_sources(specs):
+    """
+    Expand files, directories (all *.json below) and glob patterns
+
+    Returns:
+        list: Unique JSON file paths in a stable order
+
+    Raises:
+        ValueError: If a spec matches no file
+    """
+    paths = []
+    for spec in specs:
+        spec = str(spec)
+        if Path(spec).is_dir():
+            matches = sorted(Path(spec).rglob('*.json'))
+        elif glob.has_magic(spec):
+            matches = sorted(Path(match) for match in glob.glob(spec, recursive=True) if Path(match).is_file())
+        else:
+            matches = [Path(spec)] if Path(spec).is_file() else []
+        if not matches:
+            raise ValueError(f'No question files found for {spec}')
+        paths.extend(matches)
+    return list(dict.fromkeys(paths))
+
+
+def _chunks(paths):
+    """
+    Stream all files as (path, [(index, data)], error) validation chunks
+
+    A file that cannot be read or decoded ends with an error (index,
+    message) for its report; the questions before the error still count.
+    """
+    for path in paths:
+        chunk = []
+        index = 0
+        error = None
+        try:
+            for index, data in enumerate(iter_json_array(path), 1):
+                chunk.append((index, data))
+                if len(chunk) == VALIDATE_CHUNK:
+                    yield path, chunk, None
+                    chunk = []
+        except (OSError, ValueError) as e:
+            error = (index + 1, f'Unreadable JSON, rest of file skipped: {e}')
+        if chunk or error:
+            yield path, chunk, error
+
+
+def _validated(paths, workers):
+    """
+    Yield (path, validate_chunk result, file error or None) in file order
+
+    With more than one worker, chunks are validated in a process pool with
+    a bounded number of tasks in flight, so memory stays constant no matter
+    how large the sources are.
+    """
+    if workers <= 1:
+        for path, chunk, error in _chunks(paths):
+            yield path, validate_chunk(chunk), error
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for path, chunk, error in _chunks(paths):
+            pending.append((path, pool.submit(validate_chunk, chunk), error))
+            if len(pending) >= workers * TASKS_PER_WORKER:
+                path, future, error = pending.popleft()
+                yield path, future.result(), error
+        while pending:
+            path, future, error = pending.popleft()
+            yield path, future.result(), error
+
+
+def _load_existing(dry_run):
+    """
+    Preload {import_key: (frage_id, content_hash)} of all questions
+
+    Rows from before import keys existed get theirs computed once (and
+    stored, unless dry_run). Their content hash is unknown, so the next
+    import refreshes them.
+    """
+    existing = {
+        key: (frage_id, digest)
+        for frage_id, key, digest in db.session.query(Frage.id, Frage.import_key, Frage.content_hash).filter(
+            Frage.import_key.isnot(None)
+        )
+    }
+
+    backfill = []
+    legacy = db.session.query(Frage.id, Frage.frage_text, Lernfeld.name).join(
+        Lernfeld, Frage.lernfeld_id == Lernfeld.id
+    ).filter(Frage.import_key.is_(None)).order_by(Frage.id)
+    for frage_id, frage_text, lernfeld in legacy:
+        key = import_key(lernfeld, frage_text)
+        if key in existing:
+            continue  # Duplicate already in the database, keeps no key
+        existing[key] = (frage_id, None)
+        backfill.append({'b_id': frage_id, 'import_key': key})
+
+    if backfill and not dry_run:
+        table = Frage.__table__
+        db.session.execute(
+            table.update().where(table.c.id == db.bindparam('b_id')).values(import_key=db.bindparam('import_key')),
+            backfill
+        )
+        db.session.commit()
+    return existing
+
+
+def _link_tags(tag_names, tag_ids):
+    """
+    Insert the frage_tags rows (and missing tags) for some questions
+
+    Args:
+        tag_names: {frage_id: [tag name, ...]}
+        tag_ids: {slug: id}, extended with newly created tags
+    """
+    links, missing = set(), {}
+    for frage_id, names in tag_names.items():
+        for name in names:
+            slug = Tag.slugify(name)
+            if slug not in tag_ids:
+                missing.setdefault(slug, name.strip())
+            links.add((frage_id, slug))
+
+    if missing:
+        db.session.execute(Tag.__table__.insert(), [{'slug': slug, 'name': name} for slug, name in missing.items()])
+        tag_ids.update(db.session.query(Tag.slug, Tag.id).filter(Tag.slug.in_(missing)))
+    if links:
+        db.session.execute(frage_tags.insert(), [
+            {'frage_id': frage_id, 'tag_id': tag_ids[slug]} for frage_id, slug in links
+        ])
+
+
+def _backfill_tags(tag_ids, dry_run):
+    """Normalize the JSON tags of questions that have no frage_tags rows yet"""
+    unlinked = db.session.query(Frage.id, Frage.tags).filter(
+        ~db.exists().where(frage_tags.c.frage_id == Frage.id),
+        Frage.tags.isnot(None), Frage.tags.notin_(['', '[]'])
+    )
+    tag_names = {}
+    for frage_id, raw in unlinked:
+        try:
+            names = json.loads(raw)
+        except ValueError:
+            continue
+        names = [name for name in names if isinstance(name, str) and Tag.slugify(name)] if isinstance(names, list) else []
+        if names:
+            tag_names[frage_id] = names
+
+    if tag_names and not dry_run:
+        _link_tags(tag_names, tag_ids)
+        db.session.commit()
+    return len(tag_names)
+
+
+def _write_batch(inserts, updates, lernfeld_ids, tag_ids):
+    """
+    Write one batch with multi-row statements and commit it
+
+    Args:
+        inserts: [(import_key, content_hash, record)] new questions
+        updates: [(frage_id, import_key, content_hash, record)] changed questions
+        lernfeld_ids: {name: id}, extended with newly created Lernfelder
+        tag_ids: {slug: id}, extended with newly created tags
+    """
+    fragen, antworten, lernfelder = Frage.__table__, Antwort.__table__, Lernfeld.__table__
+
+    names = {record['lernfeld'] for *_, record in inserts + updates} - lernfeld_ids.keys()
+    if names:
+        db.session.execute(lernfelder.insert(), [{'name': name} for name in names])
+        lernfeld_ids.update(db.session.query(Lernfeld.name, Lernfeld.id).filter(Lernfeld.name.in_(names)))
+
+    def row(key, digest, record):
+        values = {k: v for k, v in record.items() if k not in ('lernfeld', 'antworten')}
+        values.setdefault('loesung_keywords', None)  # Same keys in every row of a multi-row statement
+        values.update(lernfeld_id=lernfeld_ids[record['lernfeld']], import_key=key, content_hash=digest)
+        return values
+
+    frage_ids = {}
+    if inserts:
+        db.session.execute(fragen.insert(), [row(*entry) for entry in inserts])
+        frage_ids.update(db.session.query(Frage.import_key, Frage.id).filter(
+            Frage.import_key.in_([key for key, _, _ in inserts])
+        ))
+
+    if updates:
+        db.session.execute(
+            fragen.update().where(fragen.c.id == db.bindparam('b_id')),
+            [dict(row(key, digest, record), b_id=frage_id) for frage_id, key, digest, record in updates]
+        )
+        updated_ids = [frage_id for frage_id, *_ in updates]
+        db.session.execute(antworten.delete().where(antworten.c.frage_id.in_(updated_ids)))
+        db.session.execute(frage_tags.delete().where(frage_tags.c.frage_id.in_(updated_ids)))
+        frage_ids.update((key, frage_id) for frage_id, key, _, _ in updates)
+
+    written = [(key, record) for key, _, record in inserts] + [(key, record) for _, key, _, record in updates]
+    answer_rows = [
+        dict(antwort, frage_id=frage_ids[key])
+        for key, record in written
+        for antwort in record['antworten']
+    ]
+    if answer_rows:
+        db.session.execute(antworten.insert(), answer_rows)
+    _link_tags({frage_ids[key]: json.loads(record['tags']) for key, record in written}, tag_ids)
+
+    db.session.commit()
+
+
+def import_questions(sources, dry_run=False, batch_size=None, workers=1, progress=None):
+    """
+    Idempotent bulk import of question JSON files
+
+    All files are streamed and validated (schema, types, difficulty levels,
+    answers per typ, see normalize), in parallel worker processes if workers
+    > 1; unreadable files are reported per file. Valid questions are matched against one preloaded set of import keys
+    and merged into a single bulk load: new questions are inserted, questions
+    whose content hash changed are updated (answers replaced), everything
+    else is skipped; the first file wins for questions that appear in
+    several files. Writes happen in batches of QUESTION_IMPORT_BATCH_SIZE
+    questions with multi-row statements, one commit per batch, so an
+    interrupted import can simply be re-run. Tags are normalized into
+    tags/frage_tags alongside (existing questions are backfilled once).
+
+    Args:
+        sources: JSON file paths (see resolve_sources)
+        dry_run: Only count what would change, write nothing
+        batch_size: Questions per batch (default QUESTION_IMPORT_BATCH_SIZE)
+        workers: Validation processes (1 = validate in this process)
+        progress: Optional callable(totals) after every written batch
+
+    Returns:
+        dict: {'inserted', 'updated', 'skipped', 'errors'} totals plus
+        'files': {path: {'inserted', 'updated', 'skipped', 'errors': [(index, message)]}}
+    """
+    batch_size = batch_size or current_app.config['QUESTION_IMPORT_BATCH_SIZE']
+    existing = _load_existing(dry_run)
+    lernfeld_ids = dict(db.session.query(Lernfeld.name, Lernfeld.id))
+    tag_ids = dict(db.session.query(Tag.slug, Tag.id))
+    backfilled = _backfill_tags(tag_ids, dry_run)
+
+    totals = Counter()
+    files = {str(path): {'inserted': 0, 'updated': 0, 'skipped': 0, 'errors': []} for path in sources}
+    seen = set()
+    inserts, updates = [], []
+
+    def flush():
+        if not dry_run:
+            _write_batch(inserts, updates, lernfeld_ids, tag_ids)
+        inserts.clear()
+        updates.clear()
+        if progress:
+            progress(totals)
+
+    for path, results, file_error in _validated(sources, workers):
+        report = files[str(path)]
+        for index, key, digest, record in results:
+            if key is None:
+                report['errors'].append((index, record))
+                totals['errors'] += 1
+                continue
+
+            if key in seen:
+                outcome = 'skipped'  # Duplicate within the sources
+            elif key not in existing:
+                inserts.append((key, digest, record))
+                outcome = 'inserted'
+            elif existing[key][1] != digest:
+                updates.append((existing[key][0], key, digest, record))
+                outcome = 'updated'
+            else:
+                outcome = 'skipped'
+            seen.add(key)
+            report[outcome] += 1
+            totals[outcome] += 1
+
+            if len(inserts) + len(updates) >= batch_size:
+                flush()
+
+        if file_error:
+            report['errors'].append(file_error)
+            totals['errors'] += 1
+
+    if inserts or updates:
+        flush()
+
+    if not dry_run and (totals['inserted'] or totals['updated'] or backfilled):
+        # Make running workers reload their in-memory question bank
+        from app.services.question_bank import question_bank
+        question_bank.invalidate()
+
+    return {
+        'inserted': totals['inserted'],
+        'updated': totals['updated'],
+        'skipped': totals['skipped'],
+        'errors': totals['errors'],
+        'files': files
+    }
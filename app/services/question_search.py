@@ -0,0 +1,264 @@
+from app.extensions import socketio
+from app.services.question_bank import question_bank
+from collections import ChainMap, Counter
+from functools import lru_cache
+import hashlib
+import heapq
+import math
+import re
+import threading
+
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Field weights (term frequency is the weighted sum over the fields)
+FIELD_WEIGHTS = {
+    'frage_text': 2.0,
+    'themenbereich': 1.5,
+    'tags': 1.5,
+    'erklaerung': 1.0,
+    'antworten': 1.0,
+}
+
+# Compound parts must be at least this long to be split off
+MIN_COMPOUND_PART = 4
+
+STOPWORDS = frozenset('''
+    aber alle als also am an auch auf aus bei bin bis bzw da damit dann das dass
+    dem den der des die dies diese dieser doch du durch ein eine einem einen
+    einer eines er es fuer hat hatte ich ihr im in ist ja kann man mit nach
+    nicht noch nur ob oder ohne sein sich sie sind so ueber um und uns von vor
+    wann war was welche welcher welches wenn werden wie wird wo zu zum zur
+'''.split())
+
+_UMLAUTS = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+_WORD = re.compile(r'\w+')
+
+# Most frequent German inflection endings, longest first
+_SUFFIXES = ('ungen', 'ern', 'en', 'er', 'es', 'e', 'n', 's')
+
+
+@lru_cache(maxsize=1 << 16)
+def _stem(token):
+    """Light German stemming: strip one inflection ending from longer words"""
+    for suffix in _SUFFIXES:
+        if len(token) - len(suffix) >= MIN_COMPOUND_PART and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text):
+    """Lowercase, fold umlauts, split, drop stopwords and stem"""
+    return [
+        _stem(word) for word in _WORD.findall((text or '').lower().translate(_UMLAUTS))
+        if word not in STOPWORDS and (len(word) > 1 or word.isdigit())
+    ]
+
+
+def split_compound(token, vocabulary):
+    """
+    Split a compound into two known words (with optional linking s)
+
+    "datenbankserv" -> ["datenbank", "serv"] if both parts are indexed words.
+    """
+    for cut in range(MIN_COMPOUND_PART, len(token) - MIN_COMPOUND_PART + 1):
+        head, tail = token[:cut], token[cut:]
+        if tail in vocabulary:
+            if head in vocabulary:
+                return [head, tail]
+            if head.endswith('s') and head[:-1] in vocabulary:
+                return [head[:-1], tail]
+    return []
+
+
+def _fields(frage):
+    return {
+        'frage_text': frage.frage_text,
+        'themenbereich': frage.themenbereich,
+        'tags': ' '.join(frage.tags),
+        'erklaerung': frage.erklaerung,
+        'antworten': ' '.join(a.text for a in frage.antworten),
+    }
+
+
+def _signature(fields):
+    return hashlib.sha1('\x1f'.join(fields[f] or '' for f in FIELD_WEIGHTS).encode('utf-8')).digest()
+
+
+class _Index:
+    """
+    One version of the inverted index (term -> {frage_id: weighted tf})
+
+    Derived from the previous version: unchanged posting lists are shared,
+    touched ones are copied first. Never changed once published, so searches
+    read it without locking.
+    """
+
+    def __init__(self, previous=None, version=None):
+        self.version = version
+        self.postings = dict(previous.postings) if previous else {}
+        self.doc_terms = dict(previous.doc_terms) if previous else {}
+        self.doc_len = dict(previous.doc_len) if previous else {}
+        self.signatures = dict(previous.signatures) if previous else {}
+        self.total_len = previous.total_len if previous else 0.0
+        self._copied = set()
+
+    def _writable(self, term):
+        """Posting list of a term that is private to this version"""
+        if term not in self._copied:
+            self.postings[term] = dict(self.postings.get(term, ()))
+            self._copied.add(term)
+        return self.postings[term]
+
+    def remove(self, frage_id):
+        for term in self.doc_terms.pop(frage_id, ()):
+            postings = self._writable(term)
+            del postings[frage_id]
+            if not postings:
+                del self.postings[term]
+                self._copied.discard(term)
+        self.total_len -= self.doc_len.pop(frage_id, 0)
+        self.signatures.pop(frage_id, None)
+
+    def add(self, frage_id, signature, tf):
+        for term, weight in tf.items():
+            self._writable(term)[frage_id] = weight
+        self.doc_terms[frage_id] = tuple(tf)
+        self.doc_len[frage_id] = sum(tf.values())
+        self.total_len += self.doc_len[frage_id]
+        self.signatures[frage_id] = signature
+
+
+def _base_tf(frage):
+    """Weighted term frequencies of a question's words"""
+    tf = Counter()
+    for field, text in _fields(frage).items():
+        for token in tokenize(text):
+            tf[token] += FIELD_WEIGHTS[field]
+    return tf
+
+
+def _add_compound_parts(tf, vocabulary):
+    """Compound parts count like the words themselves"""
+    for token, weight in list(tf.items()):
+        if len(token) >= 2 * MIN_COMPOUND_PART:
+            for part in split_compound(token, vocabulary):
+                tf[part] += weight
+    return tf
+
+
+def _build(previous, version, questions):
+    """New index of a bank version, re-indexing only added, edited and deleted questions"""
+    index = _Index(previous, version)
+    current = set()
+    changed = []
+    for frage in questions:
+        signature = _signature(_fields(frage))
+        current.add(frage.id)
+        if index.signatures.get(frage.id) != signature:
+            changed.append((frage, signature))
+
+    for frage_id in [fid for fid in index.signatures if fid not in current]:
+        index.remove(frage_id)
+    for frage, _ in changed:
+        index.remove(frage.id)
+
+    # Words of the whole batch are known before compounds are split
+    base = [(frage, signature, _base_tf(frage)) for frage, signature in changed]
+    batch_words = {}
+    for _, _, tf in base:
+        batch_words.update(dict.fromkeys(tf))
+    vocabulary = ChainMap(batch_words, index.postings)
+    for frage, signature, tf in base:
+        index.add(frage.id, signature, _add_compound_parts(tf, vocabulary))
+
+    index._copied = None
+    return index
+
+
+def _offload(func, *args):
+    """Run CPU-heavy work in a native thread under eventlet (the hub keeps serving)"""
+    if getattr(socketio, 'async_mode', None) == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute(func, *args)
+    return func(*args)
+
+
+class QuestionSearch:
+    """
+    BM25 full-text search over the question bank
+
+    An in-process inverted index over frage_text, themenbereich, tags,
+    erklaerung and answer texts. It follows the question bank version: on a
+    change a new index is built from the previous one (only added, edited
+    and deleted questions are re-indexed) off the eventlet hub and swapped
+    in; searches meanwhile use the previous version. warm() builds the
+    first one at worker start.
+    """
+
+    def __init__(self):
+        self._index = _Index()
+        self._lock = threading.Lock()
+
+    def _sync(self):
+        """
+        The index of the current question bank version, building it if needed
+
+        Only the first build makes callers wait; later ones are done by one
+        caller while the others keep searching the previous version.
+        """
+        index = self._index
+        version = question_bank.version
+        if version == index.version:
+            return index
+        if not self._lock.acquire(blocking=index.version is None):
+            return index
+        try:
+            index = self._index
+            if version != index.version:
+                # Records are read here; tokenizing and indexing leave the hub
+                questions = [question_bank.get(frage_id) for frage_id in question_bank.ids()]
+                index = self._index = _offload(_build, index, version, questions)
+            return index
+        finally:
+            self._lock.release()
+
+    def warm(self):
+        """Build the index ahead of the first search (needs app context)"""
+        self._sync()
+
+    def search(self, query, limit=20):
+        """
+        BM25-ranked question ids for a query
+
+        Returns:
+            list: (frage_id, score) best first
+        """
+        index = self._sync()
+        terms = tokenize(query)
+        vocabulary = index.postings.keys()
+        for term in list(terms):
+            if term not in vocabulary:
+                terms.extend(split_compound(term, vocabulary))
+
+        n = len(index.doc_len)
+        if not n:
+            return []
+        avgdl = index.total_len / n
+
+        scores = Counter()
+        for term in set(terms):
+            postings = index.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for frage_id, tf in postings.items():
+                norm = K1 * (1 - B + B * index.doc_len[frage_id] / avgdl)
+                scores[frage_id] += idf * tf * (K1 + 1) / (tf + norm)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+question_search = QuestionSearch()
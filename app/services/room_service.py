@@ -0,0 +1,117 @@
+from flask import current_app
+from app.extensions import redis_client
+from app.services.question_bank import question_bank
+from app.services import scoring_service
+from app.services.payload_cache import payload_cache, RawJSON, SocketJSON
+
+
+# Atomic capacity check: members may always rejoin, new players only while
+# the room is below its capacity
+ADMIT_PLAYER_LUA = """
+if redis.call('SISMEMBER', KEYS[1], ARGV[1]) == 1 then
+    return 1
+end
+if redis.call('SCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('SADD', KEYS[1], ARGV[1])
+return 1
+"""
+
+_admit_script = None
+
+
+def spectator_room(room_code):
+    """SocketIO room of read-only spectator screens"""
+    return f'room:{room_code}:spectators'
+
+
+def snapshot_key(room_code):
+    """Redis string caching the spectator snapshot of a room"""
+    return f'room:{room_code}:snapshot'
+
+
+def capacity(room):
+    """Maximum number of players of a room (from its Redis hash)"""
+    if room.get('large_room') == '1':
+        return current_app.config['LARGE_ROOM_MAX_PLAYERS']
+    return current_app.config['MAX_PLAYERS_PER_ROOM']
+
+
+def is_large(room):
+    """True for lecture-hall rooms (aggregated progress, no per-player fan-out)"""
+    return room.get('large_room') == '1'
+
+
+def admit_player(room_code, user_id, room=None):
+    """
+    Add a player to the room's player set if there is space left
+
+    Args:
+        room_code: Room to join
+        user_id: Joining player
+        room: Room hash if already loaded
+
+    Returns:
+        bool: False if the room is full
+    """
+    global _admit_script
+    if not redis_client.client:
+        return True
+    if _admit_script is None:
+        _admit_script = redis_client.client.register_script(ADMIT_PLAYER_LUA)
+
+    if room is None:
+        room = redis_client.hgetall(f'room:{room_code}')
+    return bool(_admit_script(keys=[f'room:{room_code}:players'], args=[user_id, capacity(room)]))
+
+
+def answer_progress(room_code, room):
+    """Answered count and answer distribution of the running question"""
+    counts = scoring_service.answer_counts(room_code, room.get('current_question'))
+    return {
+        'question_number': int(room.get('question_number', 0)),
+        'answered': sum(counts.values()),
+        'total': redis_client.scard(f'room:{room_code}:players'),
+        'distribution': counts
+    }
+
+
+def get_snapshot(room_code):
+    """
+    Cached read-only room snapshot for spectators
+
+    Built from a handful of O(1)/O(log N) Redis reads and shared by all
+    spectators for SPECTATOR_SNAPSHOT_TTL seconds, so spectators joining a
+    large room never trigger the full player list build. The question is
+    the cached player payload of payload_cache.
+
+    Returns:
+        RawJSON: Encoded snapshot or None if the room does not exist
+    """
+    cached = redis_client.get(snapshot_key(room_code))
+    if cached:
+        return RawJSON(cached)
+
+    room = redis_client.hgetall(f'room:{room_code}')
+    if not room:
+        return None
+
+    snapshot = {
+        'status': room.get('status'),
+        'player_count': redis_client.scard(f'room:{room_code}:players'),
+        'question': None,
+        'progress': None,
+        'leaderboard': scoring_service.top(room_code, current_app.config['LEADERBOARD_TOP_N'])
+    }
+
+    frage = question_bank.get(room.get('current_question'))
+    if room.get('status') == 'active' and frage:
+        snapshot['question'] = payload_cache.question(
+            frage, int(room.get('question_number', 0)), int(room.get('deck_size', 0)), room.get('locale')
+        )
+        snapshot['progress'] = answer_progress(room_code, room)
+
+    encoded = SocketJSON.dumps(snapshot)
+    redis_client.set(snapshot_key(room_code), encoded, ex=current_app.config['SPECTATOR_SNAPSHOT_TTL'])
+    return RawJSON(encoded)
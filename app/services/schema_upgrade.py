@@ -0,0 +1,59 @@
+from app.extensions import db
+from app.models import Frage, User, AnswerEvent
+import sqlalchemy as sa
+
+
+# Columns added to tables that deployed databases already have;
+# db.create_all() creates missing tables but never alters existing ones.
+# All of them are nullable, so ADD COLUMN needs no default.
+ADDED_COLUMNS = [
+    (Frage.__table__, 'import_key'),
+    (Frage.__table__, 'content_hash'),
+    (Frage.__table__, 'loesung_keywords'),
+    (AnswerEvent.__table__, 'antwort_id'),
+]
+
+# Indexes on pre-existing columns or on the added columns above
+ADDED_INDEXES = [
+    (Frage.__table__, 'import_key'),
+    (User.__table__, 'xp'),
+]
+
+
+def _index(table, column):
+    """Index object the model declares for a single column"""
+    return next(index for index in table.indexes if list(index.columns.keys()) == [column])
+
+
+def upgrade_schema():
+    """
+    Bring an existing database up to the current models
+
+    Creates missing tables, then adds the columns and indexes of
+    ADDED_COLUMNS/ADDED_INDEXES where they are missing. Idempotent: safe to
+    run on every deploy (seed.py runs it). Existing questions get their
+    import_key from the next import (question_import backfills it).
+
+    Returns:
+        list: Descriptions of the changes applied
+    """
+    db.create_all()
+    applied = []
+
+    inspector = sa.inspect(db.engine)
+    with db.engine.begin() as connection:
+        for table, name in ADDED_COLUMNS:
+            if name in {column['name'] for column in inspector.get_columns(table.name)}:
+                continue
+            column_type = table.c[name].type.compile(dialect=db.engine.dialect)
+            connection.execute(sa.text(f'ALTER TABLE {table.name} ADD COLUMN {name} {column_type}'))
+            applied.append(f'{table.name}.{name}')
+
+        for table, name in ADDED_INDEXES:
+            index = _index(table, name)
+            if index.name in {existing['name'] for existing in inspector.get_indexes(table.name)}:
+                continue
+            index.create(connection)
+            applied.append(index.name)
+
+    return applied
@@ -0,0 +1,384 @@
+from flask import current_app
+from app.extensions import db, redis_client
+from app.models import User, Teilnahme
+from app.services import answer_log, xp_leaderboard
+from sqlalchemy import bindparam
+import json
+
+
+# Seconds an answer marker is kept (double submission protection)
+ANSWER_TTL = 300
+
+# Atomic per-answer processing: dedup, correctness, streak, score, XP and
+# room totals in one round-trip. The score formula mirrors
+# stats_service.calculate_score; level = floor(sqrt(xp / 100)) + 1. XP only
+# changes here, so the users row and the XP leaderboard are written together
+# by flush_room.
+SUBMIT_ANSWER_LUA = """
+local room, players, answers, leaderboard, streaks, best_streaks, eliminated, xp, levels, xp_pending, totals, counts, events =
+    KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[5], KEYS[6], KEYS[7], KEYS[8], KEYS[9], KEYS[10], KEYS[11], KEYS[12], KEYS[13]
+local uid, frage_id, answer_id = ARGV[1], ARGV[2], ARGV[3]
+local client_time, max_time = tonumber(ARGV[5]), tonumber(ARGV[6])
+local now, buffer = tonumber(ARGV[8]), tonumber(ARGV[9])
+
+local state = redis.call('HMGET', room, 'current_question', 'question_deadline', 'question_start_time', 'modus', 'question_number', 'large_room', 'spiel_id')
+local stream = KEYS[14]
+if stream then
+    -- Personal question stream (survival): question, deadline, start and
+    -- number belong to the player instead of the room
+    local own = redis.call('HMGET', stream, 'current_question', 'question_deadline', 'question_start_time', 'question_number')
+    state[1], state[2], state[3], state[5] = own[1], own[2], own[3], own[4]
+end
+if state[1] ~= frage_id then
+    return cjson.encode({status = 'stale'})
+end
+if not state[2] or now > tonumber(state[2]) then
+    return cjson.encode({status = 'late'})
+end
+if redis.call('SISMEMBER', players, uid) == 0 then
+    return cjson.encode({status = 'not_in_game'})
+end
+if redis.call('SISMEMBER', eliminated, uid) == 1 then
+    return cjson.encode({status = 'eliminated'})
+end
+if redis.call('HSETNX', answers, uid, answer_id) == 0 then
+    return cjson.encode({status = 'duplicate'})
+end
+redis.call('EXPIRE', answers, tonumber(ARGV[7]))
+if stream then
+    redis.call('HSET', stream, 'question_deadline', 0)
+end
+
+-- Per-answer counters so progress/distribution reads stay O(answers per question)
+redis.call('HINCRBY', counts, answer_id, 1)
+redis.call('EXPIRE', counts, tonumber(ARGV[7]))
+
+local correct = false
+for id in string.gmatch(ARGV[4], '[^,]+') do
+    if id == answer_id then
+        correct = true
+    end
+end
+
+local function trunc(x)
+    if x >= 0 then return math.floor(x) end
+    return math.ceil(x)
+end
+
+-- Server clock decides; the client value only compensates network latency
+-- within the buffer
+local elapsed = now - tonumber(state[3])
+local time_taken = math.min(math.max(client_time, elapsed - buffer, 0), max_time)
+
+local answered = redis.call('HLEN', answers)
+local active = redis.call('SCARD', players) - redis.call('SCARD', eliminated)
+
+local streak = tonumber(redis.call('HGET', streaks, uid) or '0')
+local result = {
+    status = 'ok',
+    correct = correct,
+    time_taken = time_taken,
+    question_number = tonumber(state[5]),
+    answered = answered,
+    all_answered = not stream and answered >= active,
+    large_room = state[6] == '1'
+}
+redis.call('HINCRBY', totals, 'answers', 1)
+
+if correct then
+    local base = 1000
+    local time_bonus = trunc(base * (1 - time_taken / max_time) * 0.5)
+    local streak_bonus = trunc(base * (streak * 0.1))
+    local score = math.max(0, base + time_bonus + streak_bonus)
+
+    streak = streak + 1
+    redis.call('HSET', streaks, uid, streak)
+    if streak > tonumber(redis.call('HGET', best_streaks, uid) or '0') then
+        redis.call('HSET', best_streaks, uid, streak)
+    end
+
+    local xp_gained = math.floor(score / 10)
+    local total_xp = redis.call('HINCRBY', xp, uid, xp_gained)
+    redis.call('HINCRBY', xp_pending, uid, xp_gained)
+    local level = tonumber(redis.call('HGET', levels, uid) or '1')
+    local new_level = math.floor(math.sqrt(total_xp / 100)) + 1
+    local leveled_up = new_level > level
+    if leveled_up then
+        level = new_level
+        redis.call('HSET', levels, uid, level)
+    end
+
+    redis.call('HINCRBY', totals, 'correct', 1)
+    redis.call('HINCRBY', totals, 'points', score)
+
+    result.score = score
+    result.total_score = tonumber(redis.call('ZINCRBY', leaderboard, score, uid))
+    result.streak = streak
+    result.xp_gained = xp_gained
+    result.level = level
+    result.leveled_up = leveled_up
+else
+    redis.call('HSET', streaks, uid, 0)
+    local eliminated_now = false
+    if state[4] == 'survival_hardcore' then
+        redis.call('SADD', eliminated, uid)
+        eliminated_now = true
+    end
+
+    result.score = 0
+    result.total_score = tonumber(redis.call('ZSCORE', leaderboard, uid) or '0')
+    result.streak = 0
+    result.eliminated = eliminated_now
+end
+
+-- Competition rank (players with a higher score + 1)
+result.rank = redis.call('ZCOUNT', leaderboard, '(' .. result.total_score, '+inf') + 1
+
+-- Append to the answer event log buffer (bulk inserted at question end)
+redis.call('RPUSH', events, cjson.encode({
+    user_id = tonumber(uid),
+    spiel_id = tonumber(state[7]),
+    frage_id = tonumber(frage_id),
+    lernfeld_id = tonumber(ARGV[10]),
+    antwort_id = tonumber(answer_id),
+    correct = correct,
+    time_taken = time_taken,
+    score = result.score,
+    answered_at = now
+}))
+
+return cjson.encode(result)
+"""
+
+_submit_script = None
+
+
+def _keys(room_code):
+    """Redis keys holding the live score state of a room"""
+    prefix = f'room:{room_code}'
+    return {
+        'room': prefix,
+        'players': f'{prefix}:players',
+        'leaderboard': f'{prefix}:leaderboard',
+        'prev_ranks': f'{prefix}:prev_ranks',
+        'names': f'{prefix}:names',
+        'streaks': f'{prefix}:streaks',
+        'best_streaks': f'{prefix}:best_streaks',
+        'eliminated': f'{prefix}:eliminated',
+        'xp': f'{prefix}:xp',
+        'levels': f'{prefix}:levels',
+        'xp_pending': f'{prefix}:xp_pending',
+        'totals': f'{prefix}:totals',
+    }
+
+
+def register_player(room_code, user_id, username):
+    """Put the player on the room leaderboard and seed XP/level for level-ups"""
+    keys = _keys(room_code)
+    pipe = redis_client.client.pipeline(transaction=False)
+    pipe.zadd(keys['leaderboard'], {user_id: 0}, nx=True)
+    pipe.hset(keys['names'], user_id, username)
+    pipe.hexists(keys['xp'], user_id)
+    already_seeded = pipe.execute()[-1]
+
+    # XP/level are loaded once per player and room, not on every rejoin
+    if not already_seeded:
+        user = db.session.query(User.xp, User.level).filter_by(id=user_id).first()
+        if user:
+            pipe.hsetnx(keys['xp'], user_id, user.xp)
+            pipe.hsetnx(keys['levels'], user_id, user.level)
+            pipe.execute()
+
+
+def submit_answer(room_code, user_id, frage, antwort_id, client_time, now, stream_key=None):
+    """
+    Process an answer atomically in Redis
+
+    Args:
+        room_code: Room the answer belongs to
+        user_id: Answering player
+        frage: QuestionRecord the answer belongs to
+        antwort_id: Chosen answer id
+        client_time: Seconds the player reports to have needed
+        now: Server time the answer arrived
+        stream_key: Hash of the player's own question stream (survival);
+            the answer closes the player's question
+
+    Returns:
+        dict: 'status' ('ok', 'stale', 'late', 'not_in_game', 'eliminated',
+              'duplicate') plus the answer result, current rank and room
+              progress ('question_number', 'answered', 'all_answered',
+              'large_room') for 'ok'
+    """
+    global _submit_script
+    if _submit_script is None:
+        _submit_script = redis_client.client.register_script(SUBMIT_ANSWER_LUA)
+
+    keys = _keys(room_code)
+    script_keys = [
+        keys['room'], keys['players'], f"{keys['room']}:answers:{frage.id}",
+        keys['leaderboard'], keys['streaks'], keys['best_streaks'], keys['eliminated'],
+        keys['xp'], keys['levels'], keys['xp_pending'], keys['totals'],
+        f"{keys['room']}:answer_counts:{frage.id}", answer_log.BUFFER_KEY
+    ]
+    if stream_key:
+        script_keys.append(stream_key)
+    raw = _submit_script(
+        keys=script_keys,
+        args=[
+            user_id, frage.id, antwort_id,
+            ','.join(str(a) for a in frage.correct_ids),
+            repr(float(client_time)), frage.zeit_sekunden, ANSWER_TTL,
+            repr(now), current_app.config['QUESTION_TIME_BUFFER'], frage.lernfeld_id
+        ]
+    )
+    return json.loads(raw)
+
+
+def player_state(room_code, user_id):
+    """Current score and streak of a player (for reconnects)"""
+    keys = _keys(room_code)
+    pipe = redis_client.client.pipeline(transaction=False)
+    pipe.zscore(keys['leaderboard'], user_id)
+    pipe.hget(keys['streaks'], user_id)
+    punkte, streak = pipe.execute()
+    return {'score': int(punkte or 0), 'streak': int(streak or 0)}
+
+
+def flush_room(room_code, spiel_id):
+    """
+    Write the room's Redis score state back to Postgres in bulk
+
+    Teilnahme rows get their absolute punkte/streak/ueberlebt values, users get
+    the XP accumulated since the last flush and buffered answer events are
+    inserted. Called at question and game end.
+    """
+    keys = _keys(room_code)
+    pipe = redis_client.client.pipeline(transaction=True)
+    pipe.zrange(keys['leaderboard'], 0, -1, withscores=True)
+    pipe.hgetall(keys['streaks'])
+    pipe.smembers(keys['eliminated'])
+    pipe.hgetall(keys['xp_pending'])
+    pipe.hgetall(keys['levels'])
+    pipe.delete(keys['xp_pending'])
+    leaderboard, streaks, eliminated, xp_pending, levels, _ = pipe.execute()
+    punkte = dict(leaderboard)
+
+    teilnahme_rows = [{
+        'b_spiel_id': spiel_id,
+        'b_user_id': int(uid),
+        'b_punkte': int(punkte.get(uid, 0)),
+        'b_streak': int(streaks.get(uid, 0)),
+        'b_ueberlebt': uid not in eliminated
+    } for uid in set(punkte) | set(streaks) | set(eliminated)]
+
+    xp_rows = [{
+        'b_user_id': int(uid),
+        'b_xp': int(amount),
+        'b_level': int(levels.get(uid, 1))
+    } for uid, amount in xp_pending.items() if int(amount)]
+
+    if teilnahme_rows:
+        table = Teilnahme.__table__
+        db.session.execute(
+            table.update()
+            .where(table.c.spiel_id == bindparam('b_spiel_id'))
+            .where(table.c.user_id == bindparam('b_user_id'))
+            .values(
+                punkte=bindparam('b_punkte'),
+                streak=bindparam('b_streak'),
+                ueberlebt=bindparam('b_ueberlebt')
+            ),
+            teilnahme_rows
+        )
+
+    if xp_rows:
+        table = User.__table__
+        db.session.execute(
+            table.update()
+            .where(table.c.id == bindparam('b_user_id'))
+            .values(
+                xp=table.c.xp + bindparam('b_xp'),
+                level=db.case(
+                    (table.c.level < bindparam('b_level'), bindparam('b_level')),
+                    else_=table.c.level
+                )
+            ),
+            xp_rows
+        )
+
+    if teilnahme_rows or xp_rows:
+        db.session.commit()
+    
+    xp_leaderboard.record((row['b_user_id'], row['b_xp'], row['b_level']) for row in xp_rows)
+    
+    answer_log.flush()
+
+    return len(teilnahme_rows)
+
+
+def standings(room_code):
+    """
+    Full room ranking from the leaderboard sorted set
+
+    Equal scores share a rank. 'delta' is the movement since the previous
+    call (positive = moved up); the current ranks become the new baseline.
+
+    Returns:
+        list: Entries ordered by rank
+    """
+    keys = _keys(room_code)
+    pipe = redis_client.client.pipeline(transaction=False)
+    pipe.zrevrange(keys['leaderboard'], 0, -1, withscores=True)
+    pipe.hgetall(keys['prev_ranks'])
+    pipe.hgetall(keys['names'])
+    pipe.hgetall(keys['best_streaks'])
+    entries, prev_ranks, names, best_streaks = pipe.execute()
+
+    ranking = []
+    rank, last_score = 0, None
+    for position, (uid, score) in enumerate(entries, 1):
+        if score != last_score:
+            rank, last_score = position, score
+        prev = prev_ranks.get(uid)
+        ranking.append({
+            'user_id': int(uid),
+            'username': names.get(uid),
+            'score': int(score),
+            'rank': rank,
+            'delta': int(prev) - rank if prev else 0,
+            'streak_max': int(best_streaks.get(uid, 0))
+        })
+
+    if ranking:
+        redis_client.hset(keys['prev_ranks'], mapping={e['user_id']: e['rank'] for e in ranking})
+    return ranking
+
+
+def top(room_code, n):
+    """Top n of the room leaderboard without touching the rank-delta baseline"""
+    keys = _keys(room_code)
+    entries = redis_client.client.zrevrange(keys['leaderboard'], 0, n - 1, withscores=True)
+    names = redis_client.client.hmget(keys['names'], [uid for uid, _ in entries]) if entries else []
+
+    ranking = []
+    rank, last_score = 0, None
+    for position, ((uid, score), name) in enumerate(zip(entries, names), 1):
+        if score != last_score:
+            rank, last_score = position, score
+        ranking.append({'user_id': int(uid), 'username': name, 'score': int(score), 'rank': rank})
+    return ranking
+
+
+def answer_counts(room_code, frage_id):
+    """Number of players per chosen answer id for one question"""
+    counts = redis_client.hgetall(f'room:{room_code}:answer_counts:{frage_id}')
+    return {antwort_id: int(n) for antwort_id, n in counts.items()}
+
+
+def expire_room(room_code, seconds):
+    """Let the room's score state expire after the game"""
+    pipe = redis_client.client.pipeline(transaction=False)
+    for key in _keys(room_code).values():
+        pipe.expire(key, seconds)
+    pipe.execute()
@@ -1,12 +1,39 @@
 from flask_socketio import emit, join_room, leave_room, rooms
-from flask import request, session
+from flask import request, session, current_app
 from app.extensions import db, redis_client
-from app.models import User, SpielSitzung, Teilnahme, Frage, Antwort
-from app.services.stats_service import calculate_score, award_xp
+from app.models import User, SpielSitzung
+from app.services.question_bank import question_bank
+from app.services import deck_service, scoring_service, profile_cache, socket_metrics, room_service
+from app.services import stats_service
+from app.services.room_service import spectator_room
+from app.services.socket_metrics import broadcast
+from app.services.game_scheduler import game_scheduler
+from app.services.achievement_engine import achievement_engine
+from app.services.payload_cache import payload_cache
+from app.services.adaptive_engine import adaptive_engine, SURVIVAL_MODES
 import json
+import math
 import time
 
 
+# Error messages for rejected answers (keyed by scoring_service status)
+ANSWER_ERRORS = {
+    'stale': 'Invalid answer',
+    'late': 'Time is up',
+    'not_in_game': 'Not in game',
+    'eliminated': 'Eliminated',
+    'duplicate': 'Already answered'
+}
+
+# Seconds the live score state of a finished room is kept (reconnects)
+FINISHED_ROOM_TTL = 3600
+
+
+def host_room(room_code):
+    """SocketIO room of the host/admin screens (control-plane events)"""
+    return f'room:{room_code}:host'
+
+
 def register_handlers(socketio):
     """Register all SocketIO event handlers"""
     
@@ -38,42 +65,70 @@ def register_handlers(socketio):
             return
         
         # Check if room exists
-        if not redis_client.exists(f'room:{room_code}'):
+        room = redis_client.hgetall(f'room:{room_code}')
+        if not room:
             emit('error', {'message': 'Room not found'})
             return
         
+        # Add player to Redis (atomic capacity check, rejoins always pass)
+        if not room_service.admit_player(room_code, user_id, room):
+            emit('error', {'message': 'Room is full'})
+            return
+        
         # Join SocketIO room
         join_room(room_code)
         
-        # Add player to Redis
-        redis_client.sadd(f'room:{room_code}:players', user_id)
+        # Get user info (cached profile)
+        profile = profile_cache.get_profile(user_id)
         
-        # Get user info
-        user = User.query.get(user_id)
+        # Put player onto the live leaderboard
+        scoring_service.register_player(room_code, user_id, profile['username'])
         
-        # Notify room
-        emit('player_joined', {
-            'user_id': user_id,
-            'username': user.username,
-            'avatar': user.get_avatar_config()
-        }, room=room_code)
-        
-        # Send current room state to new player
-        players = redis_client.smembers(f'room:{room_code}:players')
-        player_list = []
-        for pid in players:
-            p = User.query.get(int(pid))
-            if p:
-                player_list.append({
-                    'user_id': p.id,
-                    'username': p.username,
-                    'avatar': p.get_avatar_config()
-                })
-        
-        emit('room_state', {
-            'players': player_list,
-            'status': redis_client.hget(f'room:{room_code}', 'status')
-        })
+        # Late joiners of a running survival game get their own stream
+        if room.get('status') == 'active' and room.get('modus') in SURVIVAL_MODES:
+            start_player_stream(room_code, user_id)
+        
+        # One debounced room_state broadcast per burst of joins
+        schedule_room_state(room_code)
+    
+    
+    @socketio.on('join_host')
+    def handle_join_host(data):
+        """Host (or admin) screen subscribes to the room's control-plane events"""
+        from app.routes.admin_routes import is_admin
+        
+        room_code = data.get('room_code')
+        user_id = session.get('user_id')
+        
+        if not user_id or not room_code:
+            emit('error', {'message': 'Invalid request'})
+            return
+        
+        host_id = redis_client.hget(f'room:{room_code}', 'host_id')
+        if host_id is None:
+            emit('error', {'message': 'Room not found'})
+            return
+        
+        if host_id != str(user_id) and not is_admin():
+            emit('error', {'message': 'Not authorized'})
+            return
+        
+        join_room(host_room(room_code))
+        emit('room_state', build_room_state(room_code))
+    
+    
+    @socketio.on('join_spectator')
+    def handle_join_spectator(data):
+        """Read-only screen (e.g. a second beamer) follows a room"""
+        room_code = data.get('room_code')
+        
+        snapshot = room_service.get_snapshot(room_code) if room_code else None
+        if snapshot is None:
+            emit('error', {'message': 'Room not found'})
+            return
+        
+        join_room(spectator_room(room_code))
+        emit('room_snapshot', snapshot)
     
     
     @socketio.on('start_game')
@@ -98,10 +153,37 @@ def register_handlers(socketio):
         spiel.started_at = datetime.utcnow()
         db.session.commit()
         
-        redis_client.hset(f'room:{room_code}', 'status', 'active')
+        deck_config = deck_service.parse_deck_config(redis_client.hget(f'room:{room_code}', 'deck_config'))
+        
+        # Survival: every player answers their own adaptive question stream
+        if spiel.modus in SURVIVAL_MODES:
+            redis_client.hset(f'room:{room_code}', mapping={
+                'status': 'active',
+                'question_number': 0,
+                'deck_size': deck_config.get('anzahl_fragen') or current_app.config['QUESTIONS_PER_GAME']
+            })
+            for player_id in redis_client.smembers(f'room:{room_code}:players'):
+                start_player_stream(room_code, player_id)
+            check_survival_finished(room_code)
+            return
+        
+        # Build the shuffled, duplicate-free question deck once per game
+        deck = deck_service.build_deck(
+            deck_config.get('anzahl_fragen') or current_app.config['QUESTIONS_PER_GAME'],
+            schwierigkeit=spiel.schwierigkeit,
+            lernfelder=deck_config.get('lernfelder'),
+            typen=deck_config.get('typen'),
+            tags=deck_config.get('tags')
+        )
+        deck_service.store_deck(room_code, deck)
+        
+        redis_client.hset(f'room:{room_code}', mapping={
+            'status': 'active',
+            'question_number': 0
+        })
         
         # Load first question
-        load_next_question(room_code, spiel)
+        load_next_question(room_code)
     
     
     @socketio.on('submit_answer')
@@ -116,86 +198,73 @@ def register_handlers(socketio):
             emit('error', {'message': 'Invalid request'})
             return
         
-        # Get current question
-        spiel = SpielSitzung.query.filter_by(room_code=room_code).first()
-        if not spiel or not spiel.frage_id:
-            emit('error', {'message': 'No active question'})
-            return
+        now = time.time()
         
-        frage = Frage.query.get(spiel.frage_id)
-        antwort = Antwort.query.get(answer_id)
+        # Question and answer come from the in-memory question bank
+        antwort = question_bank.get_answer(answer_id)
+        frage = question_bank.get(antwort.frage_id) if antwort else None
         
-        if not antwort or antwort.frage_id != frage.id:
+        if not frage:
             emit('error', {'message': 'Invalid answer'})
             return
         
-        # Check if already answered (prevent double submission)
-        answer_key = f'room:{room_code}:question:{frage.id}:user:{user_id}'
-        if redis_client.exists(answer_key):
-            emit('error', {'message': 'Already answered'})
+        # Reject late answers before any other work (question closed on this worker)
+        if game_scheduler.is_late(room_code, frage.id, now):
+            emit('error', {'message': ANSWER_ERRORS['late']})
             return
         
-        # Mark as answered
-        redis_client.set(answer_key, answer_id, ex=300)  # Expire after 5 minutes
+        if not redis_client.client:
+            emit('error', {'message': 'Game service unavailable'})
+            return
         
-        # Get user's current streak
-        teilnahme = Teilnahme.query.filter_by(
-            spiel_id=spiel.id,
-            user_id=user_id
-        ).first()
+        try:
+            time_taken = float(time_taken)
+        except (TypeError, ValueError):
+            time_taken = 0.0
         
-        if not teilnahme:
-            emit('error', {'message': 'Not in game'})
+        # 'nan'/'inf' parse as floats but would poison the score in the script
+        if not math.isfinite(time_taken) or time_taken < 0:
+            emit('error', {'message': 'Invalid request'})
             return
         
-        # Check if answer is correct
-        is_correct = antwort.korrekt
+        # Survival answers belong to the player's own question stream
+        personal = redis_client.hget(f'room:{room_code}', 'modus') in SURVIVAL_MODES
+        stream_key = adaptive_engine.stream_key(room_code, user_id) if personal else None
         
-        if is_correct:
-            # Calculate score
-            score = calculate_score(time_taken, frage.zeit_sekunden, teilnahme.streak)
-            teilnahme.punkte += score
-            teilnahme.streak += 1
-            
-            # Award XP
-            user = User.query.get(user_id)
-            xp_info = award_xp(user, score)
-            
-            result = {
-                'correct': True,
-                'score': score,
-                'total_score': teilnahme.punkte,
-                'streak': teilnahme.streak,
-                'xp_gained': xp_info['xp_gained'],
-                'level': xp_info['level'],
-                'leveled_up': xp_info['leveled_up']
-            }
-        else:
-            # Wrong answer
-            teilnahme.streak = 0
-            
-            # In survival hardcore mode, eliminate player
-            if spiel.modus == 'survival_hardcore':
-                teilnahme.ueberlebt = False
-            
-            result = {
-                'correct': False,
-                'score': 0,
-                'total_score': teilnahme.punkte,
-                'streak': 0,
-                'eliminated': not teilnahme.ueberlebt
-            }
+        # Deadline, dedup, correctness, streak, score and XP in one atomic
+        # Redis call; Postgres is updated in bulk at question/game end
+        result = scoring_service.submit_answer(room_code, user_id, frage, antwort.id, time_taken, now, stream_key)
+        status = result.pop('status')
         
-        db.session.commit()
+        if status != 'ok':
+            emit('error', {'message': ANSWER_ERRORS[status]})
+            return
+        
+        question_number = result.pop('question_number')
+        result.pop('answered')
+        large_room = result.pop('large_room')
+        
+        # Everybody answered: close the question right away (survival: the
+        # player's own question)
+        all_answered = result.pop('all_answered')
+        if personal:
+            game_scheduler.call_later(0, close_player_question, room_code, user_id, question_number)
+        elif all_answered:
+            game_scheduler.call_later(0, close_question, room_code, question_number)
         
         # Send result to player
         emit('answer_result', result)
+        socket_metrics.record('answer_result')
         
-        # Notify host of answer submission
-        emit('player_answered', {
+        # Large rooms get aggregated answer_progress ticks instead
+        if large_room:
+            return
+        
+        # Notify host of answer submission (host channel only)
+        broadcast('player_answered', {
             'user_id': user_id,
-            'correct': is_correct
-        }, room=room_code)
+            'correct': result['correct']
+        }, host_room(room_code))
     
     
     @socketio.on('next_question')
@@ -208,12 +277,25 @@ def register_handlers(socketio):
             emit('error', {'message': 'Invalid request'})
             return
         
-        spiel = SpielSitzung.query.filter_by(room_code=room_code).first()
-        if not spiel or spiel.host_user_id != user_id:
+        room = redis_client.hgetall(f'room:{room_code}')
+        if room.get('host_id') != str(user_id):
             emit('error', {'message': 'Not authorized'})
             return
         
-        load_next_question(room_code, spiel)
+        if room.get('status') != 'active':
+            emit('error', {'message': 'Game not active'})
+            return
+        
+        if room.get('modus') in SURVIVAL_MODES:
+            emit('error', {'message': 'Players advance on their own in survival'})
+            return
+        
+        # Host skips ahead: close the running question first (no-op if closed)
+        question_number = int(room.get('question_number', 0))
+        if question_number:
+            close_question(room_code, question_number)
+        
+        load_next_question(room_code)
     
     
     @socketio.on('use_jammer')
@@ -230,10 +312,10 @@ def register_handlers(socketio):
         # TODO: Implement jammer cooldown check
         
         # Send glitch effect to target
-        emit('jammer_attack', {
+        broadcast('jammer_attack', {
             'from_user_id': user_id,
             'duration': 3000  # 3 seconds
-        }, room=f'user_{target_user_id}')
+        }, f'user_{target_user_id}')
     
     
     @socketio.on('reconnect_game')
@@ -249,81 +331,334 @@ def register_handlers(socketio):
         # Rejoin room
         join_room(room_code)
         
-        # Send current game state
-        spiel = SpielSitzung.query.filter_by(room_code=room_code).first()
-        if spiel and spiel.frage_id:
-            frage = Frage.query.get(spiel.frage_id)
-            teilnahme = Teilnahme.query.filter_by(
-                spiel_id=spiel.id,
-                user_id=user_id
-            ).first()
+        # Send current game state (survival: the player's own question)
+        room = redis_client.hgetall(f'room:{room_code}')
+        current = room
+        if room.get('modus') in SURVIVAL_MODES:
+            current = redis_client.hgetall(adaptive_engine.stream_key(room_code, user_id))
+        frage = question_bank.get(current.get('current_question'))
+        if frage:
+            state = scoring_service.player_state(room_code, user_id)
             
             emit('game_state', {
-                'question': frage.to_dict() if frage else None,
-                'score': teilnahme.punkte if teilnahme else 0,
-                'streak': teilnahme.streak if teilnahme else 0,
-                'status': spiel.status
+                'question': payload_cache.question(
+                    frage, int(current.get('question_number', 0)), int(room.get('deck_size', 0)), room.get('locale')
+                ),
+                'score': state['score'],
+                'streak': state['streak'],
+                'status': room.get('status')
             })
 
 
-def load_next_question(room_code, spiel):
+def load_next_question(room_code):
     """Load and broadcast next question to room"""
-    from app.extensions import socketio
-    
-    # Get next question based on game settings
-    query = Frage.query
+    room = redis_client.hgetall(f'room:{room_code}')
     
-    if spiel.schwierigkeit:
-        query = query.filter_by(schwierigkeit=spiel.schwierigkeit)
-    
-    # Get random question
-    frage = query.order_by(db.func.random()).first()
+    # Next question from the room's pre-shuffled deck
+    frage = deck_service.draw_question(room_code)
     
     if not frage:
         # No more questions, end game
-        spiel.status = 'finished'
-        from datetime import datetime
-        spiel.finished_at = datetime.utcnow()
-        db.session.commit()
-        
-        redis_client.hset(f'room:{room_code}', 'status', 'finished')
-        
-        # Get final scores
-        teilnahmen = Teilnahme.query.filter_by(spiel_id=spiel.id).order_by(
-            Teilnahme.punkte.desc()
-        ).all()
-        
-        leaderboard = [{
-            'user_id': t.user_id,
-            'username': t.user.username,
-            'score': t.punkte,
-            'streak_max': t.streak
-        } for t in teilnahmen]
-        
-        socketio.emit('game_finished', {
-            'leaderboard': leaderboard
-        }, room=room_code)
-        
+        finish_game(room_code)
         return
     
-    # Update game state
-    spiel.frage_id = frage.id
-    spiel.frage_nummer += 1
+    # Update game state (Redis only, persisted to SpielSitzung at game end)
+    start = time.time()
+    deadline = start + frage.zeit_sekunden + current_app.config['QUESTION_TIME_BUFFER']
+    question_number = redis_client.hincrby(f'room:{room_code}', 'question_number', 1)
+    redis_client.hset(f'room:{room_code}', mapping={
+        'current_question': frage.id,
+        'question_start_time': start,
+        'question_deadline': deadline
+    })
+    
+    # The server owns the question lifecycle: close it at the deadline
+    game_scheduler.set_deadline(room_code, frage.id, deadline)
+    game_scheduler.call_at(deadline, close_question, room_code, question_number)
+    
+    if room_service.is_large(room):
+        game_scheduler.call_later(
+            current_app.config['ANSWER_PROGRESS_INTERVAL'], send_answer_progress, room_code, question_number, 0
+        )
+    
+    # Pre-encoded question data (no correct answers), serialized once per question
+    question_data = payload_cache.question(frage, question_number, int(room.get('deck_size', 0)), room.get('locale'))
+    
+    # Broadcast to all players and the host/spectator screens
+    broadcast('new_question', question_data, room_code)
+    broadcast_screens('new_question', question_data, room_code)
+
+
+def finish_game(room_code):
+    """End a game once (even if host, timers and players race): persist, rank, unlock"""
+    if not redis_client.set(f'room:{room_code}:finished', 1, nx=True, ex=FINISHED_ROOM_TTL):
+        return
+    room = redis_client.hgetall(f'room:{room_code}')
+    
+    spiel = SpielSitzung.query.filter_by(room_code=room_code).first()
+    spiel.status = 'finished'
+    from datetime import datetime
+    spiel.finished_at = datetime.utcnow()
+    spiel.frage_id = int(room.get('current_question') or 0) or None
+    spiel.frage_nummer = int(room.get('question_number', 0))
     db.session.commit()
     
-    redis_client.hset(f'room:{room_code}', 'current_question', frage.id)
-    redis_client.hset(f'room:{room_code}', 'question_start_time', time.time())
-    
-    # Prepare question data (hide correct answers)
-    question_data = {
-        'id': frage.id,
-        'frage_text': frage.frage_text,
-        'typ': frage.typ,
-        'zeit_sekunden': frage.zeit_sekunden,
-        'code_snippet': frage.code_snippet,
-        'antworten': [a.to_dict() for a in frage.antworten.all()],
-        'question_number': spiel.frage_nummer
+    # Survival scores are flushed periodically, write the last answers now
+    if room.get('modus') in SURVIVAL_MODES:
+        scoring_service.flush_room(room_code, spiel.id)
+    
+    # Fold the game's answers into the dashboard rollups
+    stats_service.rollup_finished_game(spiel.id)
+    
+    # Unlock achievements for all participants in one batch
+    achievement_engine.evaluate_game(room_code)
+    
+    redis_client.hset(f'room:{room_code}', 'status', 'finished')
+    redis_client.delete(deck_service.deck_key(room_code))
+    scoring_service.expire_room(room_code, FINISHED_ROOM_TTL)
+    if room.get('modus') in SURVIVAL_MODES:
+        adaptive_engine.expire_room(
+            room_code, redis_client.smembers(f'room:{room_code}:players'), FINISHED_ROOM_TTL
+        )
+    game_scheduler.clear_deadline(room_code)
+    
+    # Final standings come straight from the room leaderboard
+    ranking = scoring_service.standings(room_code)
+    
+    game_finished = {'leaderboard': ranking}
+    broadcast('game_finished', game_finished, room_code)
+    broadcast_screens('game_finished', game_finished, room_code)
+
+
+def start_player_stream(room_code, user_id):
+    """Enter a player into a running survival game (no-op if already playing)"""
+    if not redis_client.client.hsetnx(adaptive_engine.stream_key(room_code, user_id), 'question_number', 0):
+        return
+    
+    schwierigkeit = redis_client.hget(f'room:{room_code}', 'schwierigkeit')
+    adaptive_engine.start_ability(room_code, user_id, schwierigkeit or None)
+    load_player_question(room_code, user_id)
+
+
+def load_player_question(room_code, user_id):
+    """Pick the next adaptive question of a survival player and send it to them"""
+    room = redis_client.hgetall(f'room:{room_code}')
+    if room.get('status') != 'active':
+        return
+    
+    stream_key = adaptive_engine.stream_key(room_code, user_id)
+    question_number = int(redis_client.hget(stream_key, 'question_number') or 0)
+    deck_size = int(room.get('deck_size', 0))
+    
+    frage = None
+    if question_number < deck_size and not redis_client.client.sismember(f'room:{room_code}:eliminated', user_id):
+        frage_id = adaptive_engine.next_question(
+            room_code, user_id, deck_service.parse_deck_config(room.get('deck_config'))
+        )
+        frage = question_bank.get(frage_id) if frage_id else None
+    
+    if not frage:
+        # Deck length reached, eliminated or no unseen question left
+        redis_client.sadd(adaptive_engine.done_key(room_code), user_id)
+        check_survival_finished(room_code)
+        return
+    
+    start = time.time()
+    deadline = start + frage.zeit_sekunden + current_app.config['QUESTION_TIME_BUFFER']
+    question_number += 1
+    redis_client.hset(stream_key, mapping={
+        'current_question': frage.id,
+        'question_number': question_number,
+        'question_start_time': start,
+        'question_deadline': deadline
+    })
+    game_scheduler.call_at(deadline, close_player_question, room_code, user_id, question_number)
+    
+    broadcast('new_question', payload_cache.question(frage, question_number, deck_size, room.get('locale')),
+              f'user_{user_id}')
+
+
+def close_player_question(room_code, user_id, question_number):
+    """Close a survival player's question (answered or timed out), adapt and deal the next one"""
+    stream_key = adaptive_engine.stream_key(room_code, user_id)
+    stream = redis_client.hgetall(stream_key)
+    if int(stream.get('question_number', 0)) != question_number:
+        return
+    
+    # Answer and timeout may race; only the first one closes
+    if not redis_client.set(f'room:{room_code}:closed:{user_id}:{question_number}', 1, nx=True, ex=FINISHED_ROOM_TTL):
+        return
+    redis_client.hset(stream_key, 'question_deadline', 0)
+    
+    room = redis_client.hgetall(f'room:{room_code}')
+    frage = question_bank.get(stream.get('current_question'))
+    if frage:
+        # No answer counts as a wrong one for the ability estimate
+        chosen = redis_client.hget(f'room:{room_code}:answers:{frage.id}', user_id)
+        correct = chosen is not None and int(chosen) in frage.correct_ids
+        adaptive_engine.record_answer(room_code, user_id, frage, correct)
+        
+        broadcast('question_closed', payload_cache.reveal(frage, room.get('locale'), question_number=question_number),
+                  f'user_{user_id}')
+    
+    broadcast_screens('leaderboard_update', {
+        'top': scoring_service.top(room_code, current_app.config['LEADERBOARD_TOP_N']),
+        'total_players': redis_client.scard(f'room:{room_code}:players')
+    }, room_code)
+    schedule_survival_flush(room_code)
+    
+    game_scheduler.call_later(current_app.config['SURVIVAL_NEXT_DELAY'], load_player_question, room_code, user_id)
+
+
+def check_survival_finished(room_code):
+    """End a survival game once every player's stream is over"""
+    if redis_client.scard(adaptive_engine.done_key(room_code)) >= redis_client.scard(f'room:{room_code}:players'):
+        finish_game(room_code)
+
+
+def schedule_survival_flush(room_code):
+    """Write survival scores to Postgres at most every SURVIVAL_FLUSH_INTERVAL seconds"""
+    interval = current_app.config['SURVIVAL_FLUSH_INTERVAL']
+    if redis_client.set(f'room:{room_code}:flush_pending', 1, nx=True, px=int(interval * 1000)):
+        game_scheduler.call_later(interval, flush_survival_room, room_code)
+
+
+def flush_survival_room(room_code):
+    room = redis_client.hgetall(f'room:{room_code}')
+    if room.get('status') == 'active':
+        scoring_service.flush_room(room_code, int(room['spiel_id']))
+
+
+def send_answer_progress(room_code, question_number, last_answered):
+    """
+    Aggregated answer progress tick of a large room
+    
+    Sends answered count and distribution to the screens every
+    ANSWER_PROGRESS_INTERVAL while the question is open, and only when
+    something changed, so the cost per question depends on the number of
+    ticks instead of the number of players.
+    """
+    room = redis_client.hgetall(f'room:{room_code}')
+    if (room.get('status') != 'active' or int(room.get('question_number', 0)) != question_number
+            or not float(room.get('question_deadline') or 0)):
+        return
+    
+    progress = room_service.answer_progress(room_code, room)
+    if progress['answered'] != last_answered:
+        broadcast_screens('answer_progress', progress, room_code)
+    
+    game_scheduler.call_later(
+        current_app.config['ANSWER_PROGRESS_INTERVAL'], send_answer_progress,
+        room_code, question_number, progress['answered']
+    )
+
+
+def close_question(room_code, question_number):
+    """Stop accepting answers, persist scores, reveal the solution and rank players"""
+    room = redis_client.hgetall(f'room:{room_code}')
+    if room.get('status') != 'active' or int(room.get('question_number', 0)) != question_number:
+        return
+    
+    # Timer, "all answered" and the host may race; only the first one closes
+    if not redis_client.set(f'room:{room_code}:closed:{question_number}', 1, nx=True, ex=FINISHED_ROOM_TTL):
+        return
+    
+    redis_client.hset(f'room:{room_code}', 'question_deadline', 0)
+    game_scheduler.set_deadline(room_code, int(room.get('current_question') or 0), 0)
+    
+    # Question over: write scores and XP back to Postgres in one batch
+    scoring_service.flush_room(room_code, int(room['spiel_id']))
+    
+    # Reveal with answer summary
+    frage = question_bank.get(room.get('current_question'))
+    if frage:
+        distribution = scoring_service.answer_counts(room_code, frage.id)
+        
+        # Cached solution part (correct ids + erklaerung) plus this room's numbers
+        summary = payload_cache.reveal(
+            frage, room.get('locale'),
+            question_number=question_number,
+            answered=sum(distribution.values()),
+            correct=sum(n for aid, n in distribution.items() if int(aid) in frage.correct_ids),
+            distribution=distribution
+        )
+        broadcast('question_closed', summary, room_code)
+        broadcast_screens('question_closed', summary, room_code)
+    
+    emit_leaderboard_update(room_code, room, scoring_service.standings(room_code))
+    
+    if room.get('auto_advance') == '1':
+        game_scheduler.call_later(
+            current_app.config['AUTO_ADVANCE_DELAY'], advance_question, room_code, question_number
+        )
+
+
+def advance_question(room_code, question_number):
+    """Auto-advance: load the next question unless the host already did"""
+    room = redis_client.hgetall(f'room:{room_code}')
+    if room.get('status') == 'active' and int(room.get('question_number', 0)) == question_number:
+        load_next_question(room_code)
+
+
+def emit_leaderboard_update(room_code, room, ranking):
+    """Send the top-N to the screens and top-N plus own rank/movement to each player"""
+    top = ranking[:current_app.config['LEADERBOARD_TOP_N']]
+    total_players = len(ranking)
+    
+    leaderboard = {
+        'top': top,
+        'total_players': total_players
+    }
+    broadcast_screens('leaderboard_update', leaderboard, room_code)
+    
+    # Large rooms: one room broadcast, players know their rank from answer_result
+    if room_service.is_large(room):
+        broadcast('leaderboard_update', leaderboard, room_code)
+        return
+    
+    for entry in ranking:
+        broadcast('leaderboard_update', {
+            'top': top,
+            'total_players': total_players,
+            'you': entry
+        }, f"user_{entry['user_id']}")
+
+
+def broadcast_screens(event, data, room_code):
+    """Send an event to the host and the spectator screens of a room"""
+    broadcast(event, data, host_room(room_code))
+    broadcast(event, data, spectator_room(room_code))
+
+
+def build_room_state(room_code):
+    """Player list (one bulk profile lookup) and status of a room"""
+    players = redis_client.smembers(f'room:{room_code}:players')
+    profiles = profile_cache.get_profiles(players)
+    
+    return {
+        'players': sorted(profiles.values(), key=lambda p: p['user_id']),
+        'player_count': len(players),
+        'status': redis_client.hget(f'room:{room_code}', 'status')
     }
+
+
+def schedule_room_state(room_code):
+    """Broadcast room_state to the host channel once after a short debounce window"""
+    from app.extensions import socketio
+    
+    debounce = current_app.config['ROOM_STATE_DEBOUNCE']
+    
+    # Only the first join of a burst (across all workers) schedules the broadcast
+    if not redis_client.set(f'room:{room_code}:room_state_pending', 1, nx=True, px=int(debounce * 1000)):
+        return
+    
+    app = current_app._get_current_object()
+    
+    def send_room_state():
+        socketio.sleep(debounce)
+        with app.app_context():
+            broadcast('room_state', build_room_state(room_code), host_room(room_code))
+            redis_client.delete(room_service.snapshot_key(room_code))
+            broadcast('room_snapshot', room_service.get_snapshot(room_code), spectator_room(room_code))
     
-    # Broadcast to all players
-    socketio.emit('new_question', question_data, room=room_code)
+    socketio.start_background_task(send_room_state)
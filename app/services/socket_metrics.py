@@ -0,0 +1,52 @@
+from collections import Counter
+from app.extensions import socketio
+import threading
+import time
+
+
+# Per-event counters of this worker: emits and websocket messages delivered
+_emits = Counter()
+_deliveries = Counter()
+_lock = threading.Lock()
+_since = time.time()
+
+
+def room_size(room, namespace='/'):
+    """Number of sockets of this worker currently in a SocketIO room"""
+    manager = socketio.server.manager if socketio.server else None
+    if manager is None:
+        return 0
+    return len(manager.rooms.get(namespace, {}).get(room, {}))
+
+
+def record(event, recipients=1):
+    """Count one emit of an event reaching the given number of sockets"""
+    with _lock:
+        _emits[event] += 1
+        _deliveries[event] += recipients
+
+
+def broadcast(event, data, room):
+    """socketio.emit to a room and record how many sockets it reached"""
+    record(event, room_size(room))
+    socketio.emit(event, data, room=room)
+
+
+def snapshot():
+    """Counters since start/reset, e.g. to compare fan-out before and after a change"""
+    with _lock:
+        return {
+            'since': _since,
+            'emits': dict(_emits),
+            'deliveries': dict(_deliveries),
+            'total_deliveries': sum(_deliveries.values())
+        }
+
+
+def reset():
+    """Clear all counters"""
+    global _since
+    with _lock:
+        _emits.clear()
+        _deliveries.clear()
+        _since = time.time()
@@ -1,33 +1,158 @@
-from app.models import User, Lernfeld, Frage, Teilnahme, SpielSitzung
-from app.extensions import db
+from flask import current_app
+from app.models import User, Frage, SpielSitzung, AnswerEvent, UserLernfeldStats
+from app.extensions import db, redis_client
+from app.services import answer_log
+from app.services.question_bank import question_bank
 from sqlalchemy import func
+import numpy as np
+import json
+import time
 
 
-def get_user_radar_data(user_id):
+# Redis keys of the player-base percentile snapshot (JSON) and its build time
+PERCENTILE_KEY = 'stats:percentiles'
+PERCENTILE_BUILT_KEY = 'stats:percentiles:built_at'
+
+# Redis set of finished games whose answer events were still buffered when
+# they ended (answer log flush failed); rolled up by the percentile job
+PENDING_ROLLUPS_KEY = 'stats:pending_rollups'
+
+# Quantile grid resolution (0.1 %) and histogram size of a snapshot
+QUANTILE_POINTS = 1001
+HISTOGRAM_BINS = 20
+
+# Decoded snapshot of this worker (numpy arrays)
+_percentiles = {'built_at': None, 'xp': None, 'lernfelder': {}, 'xp_histogram': None}
+
+
+def stats_version_key(user_id):
+    """Redis counter bumped whenever a user's Lernfeld rollup changes"""
+    return f'user:{user_id}:stats_version'
+
+
+def update_lernfeld_rollups(spiel_id):
     """
-    Get user performance data for radar chart visualization
-    Returns data grouped by Lernfeld
+    Fold a finished game's answer events into user_lernfeld_stats
+    
+    One GROUP BY over the game's events (indexed by spiel_id) and one bulk
+    upsert that adds the game's counts to the existing rollup rows. Bumps the
+    stats version of every affected user so cached radar payloads expire.
+    
+    Returns:
+        int: Number of rollup rows touched
     """
-    # Query to calculate performance per Lernfeld
-    stats = db.session.query(
-        Lernfeld.name,
-        Lernfeld.id,
-        func.count(Teilnahme.id).label('total_answered'),
-        func.sum(db.case((Teilnahme.punkte > 0, 1), else_=0)).label('correct_answers')
-    ).join(
-        SpielSitzung, Teilnahme.spiel_id == SpielSitzung.id
-    ).join(
-        Frage, SpielSitzung.frage_id == Frage.id
-    ).join(
-        Lernfeld, Frage.lernfeld_id == Lernfeld.id
+    rows = db.session.query(
+        AnswerEvent.user_id,
+        AnswerEvent.lernfeld_id,
+        func.count(AnswerEvent.id).label('answered'),
+        func.sum(db.case((AnswerEvent.correct, 1), else_=0)).label('correct'),
+        func.sum(AnswerEvent.time_taken).label('total_time'),
+        func.max(AnswerEvent.answered_at).label('last_played_at')
     ).filter(
-        Teilnahme.user_id == user_id
+        AnswerEvent.spiel_id == spiel_id
     ).group_by(
-        Lernfeld.id, Lernfeld.name
+        AnswerEvent.user_id, AnswerEvent.lernfeld_id
     ).all()
     
-    # Get all Lernfelder to ensure complete radar chart
-    all_lernfelder = Lernfeld.query.all()
+    if not rows:
+        return 0
+    
+    if db.engine.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    
+    table = UserLernfeldStats.__table__
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.lernfeld_id],
+        set_={
+            'answered': table.c.answered + statement.excluded.answered,
+            'correct': table.c.correct + statement.excluded.correct,
+            'total_time': table.c.total_time + statement.excluded.total_time,
+            'last_played_at': statement.excluded.last_played_at
+        }
+    )
+    db.session.execute(statement, [{
+        'user_id': row.user_id,
+        'lernfeld_id': row.lernfeld_id,
+        'answered': row.answered,
+        'correct': int(row.correct or 0),
+        'total_time': float(row.total_time or 0),
+        'last_played_at': row.last_played_at
+    } for row in rows])
+    db.session.commit()
+    
+    if redis_client.client:
+        pipe = redis_client.client.pipeline(transaction=False)
+        for user_id in {row.user_id for row in rows}:
+            pipe.incr(stats_version_key(user_id))
+        pipe.execute()
+    
+    return len(rows)
+
+
+def rollup_finished_game(spiel_id):
+    """
+    Flush the answer log, then fold a finished game into the rollups
+    
+    A game whose events could not all be written stays out of the rollups
+    (they add, so a partial rollup cannot be completed later) and is queued
+    for retry_pending_rollups instead.
+    
+    Returns:
+        bool: True if the game was rolled up
+    """
+    if answer_log.flush() is None:
+        redis_client.sadd(PENDING_ROLLUPS_KEY, spiel_id)
+        return False
+    update_lernfeld_rollups(spiel_id)
+    return True
+
+
+def retry_pending_rollups():
+    """
+    Roll up the queued games once the answer log flushes cleanly
+    
+    Returns:
+        int: Number of games rolled up
+    """
+    pending = redis_client.smembers(PENDING_ROLLUPS_KEY)
+    if not pending or answer_log.flush() is None:
+        return 0
+    
+    done = 0
+    for spiel_id in pending:
+        # Claim the game so no other worker rolls it up twice
+        if not redis_client.srem(PENDING_ROLLUPS_KEY, spiel_id):
+            continue
+        try:
+            update_lernfeld_rollups(int(spiel_id))
+        except Exception:
+            db.session.rollback()
+            redis_client.sadd(PENDING_ROLLUPS_KEY, spiel_id)
+            raise
+        done += 1
+    return done
+
+
+def get_user_radar_data(user_id):
+    """
+    Get user performance data for radar chart visualization
+    Returns data grouped by Lernfeld
+    
+    Served from a Redis cache keyed by the user's stats version; a miss costs
+    one primary-key range lookup on user_lernfeld_stats (Lernfelder come from
+    the question bank).
+    """
+    version = redis_client.get(stats_version_key(user_id)) or '0'
+    cache_key = f'user:{user_id}:radar:{version}'
+    
+    cached = redis_client.get(cache_key)
+    if cached:
+        return json.loads(cached)
+    
+    stats = UserLernfeldStats.query.filter_by(user_id=user_id).all()
     
     # Build data structure
     radar_data = {
@@ -41,36 +166,167 @@ def get_user_radar_data(user_id):
             'pointBorderColor': '#fff',
             'pointHoverBackgroundColor': '#fff',
             'pointHoverBorderColor': 'rgba(0, 255, 255, 1)'
-        }]
+        }],
+        'details': []
     }
     
     # Create lookup for stats
-    stats_dict = {stat.name: stat for stat in stats}
+    stats_dict = {stat.lernfeld_id: stat for stat in stats}
     
-    # Fill data for all Lernfelder
-    for lernfeld in all_lernfelder:
+    # Fill data for all Lernfelder to ensure complete radar chart
+    for lernfeld in question_bank.lernfelder():
         radar_data['labels'].append(lernfeld.name)
         
-        if lernfeld.name in stats_dict:
-            stat = stats_dict[lernfeld.name]
-            if stat.total_answered > 0:
-                percentage = (stat.correct_answers / stat.total_answered) * 100
-            else:
-                percentage = 0
+        stat = stats_dict.get(lernfeld.id)
+        if stat and stat.answered > 0:
+            percentage = (stat.correct / stat.answered) * 100
         else:
             percentage = 0
         
         radar_data['datasets'][0]['data'].append(round(percentage, 1))
+        radar_data['details'].append({
+            'lernfeld': lernfeld.name,
+            'answered': stat.answered if stat else 0,
+            'correct': stat.correct if stat else 0,
+            'avg_time': round(stat.avg_time, 2) if stat else 0,
+            'last_played_at': stat.last_played_at.isoformat() if stat and stat.last_played_at else None
+        })
+    
+    redis_client.set(cache_key, json.dumps(radar_data), ex=current_app.config['STATS_CACHE_TTL'])
     
     return radar_data
 
 
+def _distribution(values):
+    """Quantile grid and histogram of a 1-d sample"""
+    values = np.asarray(values, dtype=np.float64)
+    counts, edges = np.histogram(values, bins=HISTOGRAM_BINS)
+    return {
+        'n': int(values.size),
+        'quantiles': np.quantile(values, np.linspace(0, 1, QUANTILE_POINTS)).round(4).tolist(),
+        'histogram': {'edges': edges.round(4).tolist(), 'counts': counts.tolist()}
+    }
+
+
+def build_percentile_snapshot():
+    """
+    Build quantile/histogram snapshots of XP and per-Lernfeld accuracy
+    
+    XP comes from users, accuracy (correct / answered) from the Lernfeld
+    rollups of players with at least PERCENTILE_MIN_ANSWERS answers. The
+    snapshot is published in Redis for all workers.
+    
+    Returns:
+        dict: The snapshot
+    """
+    from app.services.green_db import green_db
+    
+    xp = np.array([row.xp for row in green_db.fetch_all(db.select(User.xp))], dtype=np.float64)
+    
+    rows = green_db.fetch_all(
+        db.select(UserLernfeldStats.lernfeld_id, UserLernfeldStats.correct, UserLernfeldStats.answered).where(
+            UserLernfeldStats.answered >= current_app.config['PERCENTILE_MIN_ANSWERS']
+        )
+    )
+    lernfeld_ids = np.array([row.lernfeld_id for row in rows], dtype=np.int64)
+    accuracy = np.array([row.correct / row.answered for row in rows], dtype=np.float64)
+    
+    snapshot = {
+        'built_at': time.time(),
+        'xp': _distribution(xp) if xp.size else None,
+        'lernfelder': {
+            str(lernfeld_id): _distribution(accuracy[lernfeld_ids == lernfeld_id])
+            for lernfeld_id in np.unique(lernfeld_ids).tolist()
+        }
+    }
+    
+    if redis_client.client:
+        pipe = redis_client.client.pipeline(transaction=True)
+        pipe.set(PERCENTILE_KEY, json.dumps(snapshot))
+        pipe.set(PERCENTILE_BUILT_KEY, snapshot['built_at'])
+        pipe.execute()
+    return snapshot
+
+
+def refresh_percentile_snapshot():
+    """
+    Periodic job: roll up pending games and rebuild the snapshot (one worker
+    per interval), then reschedule
+    """
+    from app.services.game_scheduler import game_scheduler
+    
+    interval = current_app.config['PERCENTILE_SNAPSHOT_INTERVAL']
+    try:
+        if redis_client.set(f'{PERCENTILE_KEY}:lock', 1, nx=True, ex=interval):
+            retry_pending_rollups()
+            build_percentile_snapshot()
+    finally:
+        game_scheduler.call_later(interval, refresh_percentile_snapshot)
+
+
+def _load_percentiles():
+    """Decoded current snapshot (reloaded when a newer one was published)"""
+    built_at = redis_client.get(PERCENTILE_BUILT_KEY)
+    if built_at and built_at != _percentiles['built_at']:
+        snapshot = json.loads(redis_client.get(PERCENTILE_KEY) or '{}')
+        xp = snapshot.get('xp')
+        _percentiles.update({
+            'built_at': built_at,
+            'xp': np.array(xp['quantiles']) if xp else None,
+            'xp_histogram': xp['histogram'] if xp else None,
+            'lernfelder': {
+                int(lernfeld_id): np.array(dist['quantiles'])
+                for lernfeld_id, dist in snapshot.get('lernfelder', {}).items()
+            }
+        })
+    return _percentiles
+
+
+def percentile_rank(quantiles, value):
+    """Share of players (in %) below value - binary search on the quantile grid"""
+    if quantiles is None or not len(quantiles):
+        return None
+    below = int(np.searchsorted(quantiles, value, side='left'))
+    return round(100.0 * below / len(quantiles), 1)
+
+
+def get_user_percentiles(xp, lernfeld_details):
+    """
+    "Better than X %" for a user's XP and per-Lernfeld accuracy
+    
+    Args:
+        xp: The user's XP
+        lernfeld_details: Entries with 'lernfeld', 'answered', 'correct' (radar details)
+    
+    Returns:
+        dict: {'xp': pct, 'lernfelder': {name: pct}, 'xp_histogram', 'built_at'}
+    """
+    snapshot = _load_percentiles()
+    ids = {lf.name: lf.id for lf in question_bank.lernfelder()}
+    min_answers = current_app.config['PERCENTILE_MIN_ANSWERS']
+    
+    lernfelder = {}
+    for detail in lernfeld_details:
+        quantiles = snapshot['lernfelder'].get(ids.get(detail['lernfeld']))
+        if detail['answered'] >= min_answers and quantiles is not None:
+            lernfelder[detail['lernfeld']] = percentile_rank(quantiles, detail['correct'] / detail['answered'])
+    
+    return {
+        'xp': percentile_rank(snapshot['xp'], xp) if xp is not None else None,
+        'lernfelder': lernfelder,
+        'xp_histogram': snapshot['xp_histogram'],
+        'built_at': float(snapshot['built_at']) if snapshot['built_at'] else None
+    }
+
+
 def get_global_stats():
     """Get global platform statistics"""
     total_users = User.query.count()
     total_questions = Frage.query.count()
     total_games = SpielSitzung.query.count()
-    active_games = SpielSitzung.query.filter_by(status='active').count()
+    active_games = SpielSitzung.query.filter(
+        SpielSitzung.status == 'active', SpielSitzung.modus != 'practice'
+    ).count()
     
     return {
         'total_users': total_users,
@@ -105,26 +361,3 @@ def calculate_score(time_taken, max_time, streak=0):
     total_score = base_score + time_bonus + streak_bonus
     
     return max(0, total_score)  # Ensure non-negative
-
-
-def award_xp(user, score):
-    """
-    Award XP to user based on score
-    
-    Args:
-        user: User object
-        score: Score earned
-    
-    Returns:
-        dict: Info about XP gain and level up
-    """
-    xp_gain = score // 10  # 1 XP per 10 points
-    
-    leveled_up = user.add_xp(xp_gain)
-    
-    return {
-        'xp_gained': xp_gain,
-        'total_xp': user.xp,
-        'level': user.level,
-        'leveled_up': leveled_up
-    }
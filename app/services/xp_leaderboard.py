@@ -0,0 +1,145 @@
+from flask import current_app
+from app.extensions import db, redis_client
+from app.models import User
+
+
+# Global XP ranking: sorted set user id -> XP plus a hash user id -> level
+XP_KEY = 'leaderboard:xp'
+LEVELS_KEY = 'leaderboard:levels'
+
+# Set while the last consistency check is recent (see ensure)
+CHECKED_KEY = 'leaderboard:xp:checked'
+
+# Users loaded per round-trip when rebuilding from Postgres
+REBUILD_CHUNK = 5000
+
+
+def record(entries):
+    """
+    Apply XP gains to the global ranking
+
+    Args:
+        entries: Iterable of (user_id, xp_gained, level)
+    """
+    if not redis_client.client:
+        return
+    pipe = redis_client.client.pipeline(transaction=False)
+    for user_id, xp_gained, level in entries:
+        pipe.zincrby(XP_KEY, xp_gained, user_id)
+        pipe.hset(LEVELS_KEY, user_id, level)
+    pipe.execute()
+
+
+def rebuild():
+    """
+    Rebuild the ranking from users.xp
+
+    Users are streamed in chunks into a temporary key which then replaces
+    the live set atomically (readers never see a half-built ranking).
+
+    Returns:
+        int: Number of users in the ranking
+    """
+    if not redis_client.client:
+        return 0
+
+    tmp_xp, tmp_levels = f'{XP_KEY}:rebuild', f'{LEVELS_KEY}:rebuild'
+    redis_client.client.delete(tmp_xp, tmp_levels)
+
+    count = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(User.id, User.xp, User.level).filter(
+            User.id > last_id
+        ).order_by(User.id).limit(REBUILD_CHUNK).all()
+        if not rows:
+            break
+
+        pipe = redis_client.client.pipeline(transaction=False)
+        pipe.zadd(tmp_xp, {row.id: row.xp for row in rows})
+        pipe.hset(tmp_levels, mapping={row.id: row.level for row in rows})
+        pipe.execute()
+
+        count += len(rows)
+        last_id = rows[-1].id
+
+    pipe = redis_client.client.pipeline(transaction=True)
+    if count:
+        pipe.rename(tmp_xp, XP_KEY)
+        pipe.rename(tmp_levels, LEVELS_KEY)
+    else:
+        pipe.delete(XP_KEY, LEVELS_KEY)
+    pipe.execute()
+    return count
+
+
+def ensure():
+    """
+    Rebuild the ranking if it is missing or has drifted from Postgres
+
+    Checks at most every LEADERBOARD_CHECK_INTERVAL seconds (across workers):
+    the member count must match the user count and the top score the highest
+    XP in users.
+    """
+    if not redis_client.client:
+        return
+    if not redis_client.set(CHECKED_KEY, 1, nx=True, ex=current_app.config['LEADERBOARD_CHECK_INTERVAL']):
+        return
+
+    users, max_xp = db.session.query(db.func.count(User.id), db.func.max(User.xp)).one()
+    top = redis_client.client.zrevrange(XP_KEY, 0, 0, withscores=True)
+    top_xp = int(top[0][1]) if top else None
+
+    if redis_client.client.zcard(XP_KEY) != users or top_xp != max_xp:
+        current_app.logger.info('XP leaderboard out of sync with users, rebuilding')
+        rebuild()
+
+
+def rank(user_id):
+    """
+    Global rank of a user (equal XP shares a rank)
+
+    Returns:
+        dict: {'rank', 'xp'} or None if the user is not ranked
+    """
+    xp = redis_client.client.zscore(XP_KEY, user_id)
+    if xp is None:
+        return None
+    higher = redis_client.client.zcount(XP_KEY, f'({xp}', '+inf')
+    return {'rank': higher + 1, 'xp': int(xp)}
+
+
+def page(limit, cursor=None):
+    """
+    One page of the ranking, best first
+
+    Args:
+        limit: Page size
+        cursor: User id of the last entry of the previous page (None = top)
+
+    Returns:
+        tuple: (entries [{'user_id', 'xp', 'level', 'rank'}], next_cursor)
+    """
+    start = 0
+    if cursor is not None:
+        position = redis_client.client.zrevrank(XP_KEY, cursor)
+        if position is None:
+            return [], None
+        start = position + 1
+
+    members = redis_client.client.zrevrange(XP_KEY, start, start + limit - 1, withscores=True)
+    if not members:
+        return [], None
+
+    levels = redis_client.client.hmget(LEVELS_KEY, [uid for uid, _ in members])
+
+    # Competition rank of the first entry, the rest follows from the order
+    rank_value = redis_client.client.zcount(XP_KEY, f'({members[0][1]}', '+inf') + 1
+    entries = []
+    for position, ((uid, xp), level) in enumerate(zip(members, levels)):
+        if position and xp != members[position - 1][1]:
+            rank_value = start + position + 1
+        entries.append({'user_id': int(uid), 'xp': int(xp), 'level': int(level or 1), 'rank': rank_value})
+
+    next_cursor = entries[-1]['user_id'] if len(members) == limit else None
+    return entries, next_cursor
@@ -71,10 +71,22 @@ class GameController {
             this.handleAnswerResult(data);
         });
         
+        this.socket.on('question_closed', (data) => {
+            this.handleQuestionClosed(data);
+        });
+        
+        this.socket.on('leaderboard_update', (data) => {
+            this.handleLeaderboardUpdate(data);
+        });
+        
         this.socket.on('game_finished', (data) => {
             this.handleGameFinished(data);
         });
         
+        this.socket.on('achievement_unlocked', (data) => {
+            this.handleAchievementUnlocked(data);
+        });
+        
         this.socket.on('jammer_attack', (data) => {
             this.handleJammerAttack(data);
         });
@@ -98,6 +110,7 @@ class GameController {
     handleNewQuestion(data) {
         this.currentQuestion = data;
         this.questionStartTime = Date.now();
+        this.answered = false;
         
         // Hide waiting/result screens
         document.getElementById('waitingScreen').classList.add('hidden');
@@ -160,7 +173,6 @@ class GameController {
             
             if (remaining <= 0) {
                 clearInterval(this.timerInterval);
-                this.handleTimeout();
             }
         }, 1000);
     }
@@ -170,6 +182,7 @@ class GameController {
         
         // Calculate time taken
         const timeTaken = (Date.now() - this.questionStartTime) / 1000;
+        this.answered = true;
         
         // Disable all answer buttons
         const buttons = document.querySelectorAll('#answersContainer button');
@@ -188,6 +201,17 @@ class GameController {
         });
     }
     
+    handleQuestionClosed(data) {
+        // Server closed the question before we answered
+        if (this.timerInterval) {
+            clearInterval(this.timerInterval);
+        }
+        if (!this.answered && this.currentQuestion && this.currentQuestion.id === data.frage_id) {
+            this.answered = true;
+            this.handleTimeout();
+        }
+    }
+    
     handleTimeout() {
         // Show timeout message
         document.getElementById('questionScreen').classList.add('hidden');
@@ -213,6 +237,9 @@ class GameController {
         document.getElementById('playerScore').innerText = this.score;
         document.getElementById('playerStreak').innerText = this.streak;
         document.getElementById('playerLevel').innerText = this.level;
+        if (data.rank) {
+            document.getElementById('playerRank').innerText = data.rank;
+        }
         
         // Show result
         document.getElementById('questionScreen').classList.add('hidden');
@@ -253,6 +280,24 @@ class GameController {
         }, 3000);
     }
     
+    handleLeaderboardUpdate(data) {
+        if (!data.you) return;
+        
+        const movement = data.you.delta > 0 ? ` ▲${data.you.delta}` : (data.you.delta < 0 ? ` ▼${-data.you.delta}` : '');
+        document.getElementById('playerRank').innerText = `${data.you.rank}/${data.total_players}${movement}`;
+    }
+    
+    handleAchievementUnlocked(data) {
+        const list = document.getElementById('achievementsList');
+        data.achievements.forEach(a => {
+            const item = document.createElement('p');
+            item.className = 'text-cyber-blue';
+            item.innerText = `${a.icon || '🏆'} ${a.name} – ${a.beschreibung}`;
+            list.appendChild(item);
+        });
+        document.getElementById('achievementsBox').classList.remove('hidden');
+    }
+    
     handleGameFinished(data) {
         // Show final screen
         document.getElementById('questionScreen').classList.add('hidden');
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+NeonMind - Socket latency under dashboard load
+
+Measures how long socket events wait while concurrent dashboard queries run
+in the same eventlet worker. A probe green thread handles a socket event
+(join_spectator through the SocketIO test client) every --interval seconds
+and records how late it ran plus how long the handler took.
+
+Modes:
+    blocking  psycopg2 without wait callback (every query freezes the hub)
+    green     green wait callback, queries on the session (default setup)
+    tpool     green wait callback, queries through green_db.fetch_all
+
+Usage:
+    python benchmark_db.py --mode blocking --workers 20 --pg-sleep 0.2
+    python benchmark_db.py --mode green --workers 20 --pg-sleep 0.2
+    python benchmark_db.py --mode tpool --workers 20
+"""
+
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import os
+import statistics
+import time
+
+
+def percentile(values, p):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Socket event latency while dashboard queries run')
+    parser.add_argument('--mode', choices=['blocking', 'green', 'tpool'], default='green')
+    parser.add_argument('--workers', type=int, default=20, help='Concurrent dashboard query loops')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds to measure')
+    parser.add_argument('--interval', type=float, default=0.02, help='Seconds between probe events')
+    parser.add_argument('--pg-sleep', type=float, default=0,
+                        help='Run an extra pg_sleep(x) per dashboard query to emulate a slow analytic query')
+    args = parser.parse_args()
+
+    from app import create_app
+    from app.extensions import db, socketio
+    from app.models import User
+    from app.services.green_db import green_db
+    from psycopg2 import extensions
+    from sqlalchemy import func, select
+
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+
+    if args.mode == 'blocking':
+        extensions.set_wait_callback(None)
+        green_db.enabled = False
+    elif not green_db.enabled:
+        raise SystemExit('Green DB access is not enabled (needs eventlet + Postgres + DB_GREEN)')
+
+    with app.app_context():
+        user_ids = [uid for (uid,) in db.session.query(User.id).all()]
+    if not user_ids:
+        raise SystemExit('No users found, run seed.py first')
+
+    stop = time.time() + args.duration
+    queries = [0]
+
+    def dashboard_load(worker):
+        with app.app_context():
+            while time.time() < stop:
+                user = db.session.get(User, user_ids[(worker + queries[0]) % len(user_ids)])
+                statements = [user.stats_by_lernfeld_query().statement]
+                if args.pg_sleep:
+                    statements.append(select(func.pg_sleep(args.pg_sleep)))
+                for statement in statements:
+                    if args.mode == 'tpool':
+                        green_db.fetch_all(statement)
+                    else:
+                        db.session.execute(statement).all()
+                db.session.remove()
+                queries[0] += 1
+
+    latencies = []
+
+    def probe():
+        client = socketio.test_client(app)
+        while time.time() < stop:
+            scheduled = time.time() + args.interval
+            eventlet.sleep(args.interval)
+            client.emit('join_spectator', {})
+            client.get_received()
+            latencies.append(time.time() - scheduled)
+        client.disconnect()
+
+    pool = eventlet.GreenPool(args.workers + 1)
+    for worker in range(args.workers):
+        pool.spawn(dashboard_load, worker)
+    pool.spawn(probe)
+    pool.waitall()
+
+    ms = [latency * 1000 for latency in latencies]
+    print(f'Mode: {args.mode}, {args.workers} query loops, pg_sleep={args.pg_sleep}s')
+    print(f'  Dashboard queries: {queries[0]} ({queries[0] / args.duration:.1f}/s)')
+    print(f'  Socket events:     {len(ms)}')
+    print(f'  Latency p50: {statistics.median(ms):.1f} ms  p95: {percentile(ms, 95):.1f} ms  '
+          f'p99: {percentile(ms, 99):.1f} ms  max: {max(ms):.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,9 @@
+"""
+Gunicorn settings (read automatically from the working directory)
+"""
+
+
+def post_worker_init(worker):
+    """Start the periodic jobs in every serving worker (they coordinate via Redis locks)"""
+    from run import start_periodic_jobs
+    start_periodic_jobs()
@@ -14,7 +14,30 @@ config_name = os.getenv('FLASK_ENV', 'development')
 # Create Flask app
 app = create_app(config_name)
 
+
+def start_periodic_jobs():
+    """
+    Start the periodic percentile snapshots and practice schedule writes,
+    and build the question search index ahead of the first search
+
+    Called by serving processes only: below for `python run.py` and from
+    gunicorn.conf.py for gunicorn workers. Importing this module (flask CLI
+    commands, FLASK_APP=run.py) starts nothing.
+    """
+    from app.services.game_scheduler import game_scheduler
+    from app.services.stats_service import refresh_percentile_snapshot
+    from app.services.practice_service import refresh_schedules
+    from app.services.question_search import question_search
+    game_scheduler.call_later(0, refresh_percentile_snapshot)
+    game_scheduler.call_later(0, refresh_schedules)
+    game_scheduler.call_later(0, question_search.warm)
+
+
 if __name__ == '__main__':
+    # The reloader re-runs this file in a child process that does the serving
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_periodic_jobs()
+    
     # Run with SocketIO
     socketio.run(
         app,
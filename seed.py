@@ -1,10 +1,16 @@
 #!/usr/bin/env python3
 """
 Seed script to import quiz questions from JSON into database
-Usage: python seed.py
+Usage: python seed.py [SOURCE ...] [--dry-run] [--workers N] [--batch-size N]
+
+SOURCE can be a JSON file, a directory (all *.json below it) or a glob
+pattern; default is the bundled question file.
+
+Re-running is safe: only new or changed questions are written.
 """
 
-import json
+import argparse
+import os
 import sys
 from pathlib import Path
 
@@ -14,115 +20,42 @@ sys.path.insert(0, str(Path(__file__).parent))
 from app import create_app
 from app.extensions import db
 from app.models import Lernfeld, Frage, Antwort
+from app.services.question_import import import_questions, resolve_sources
+from app.services.schema_upgrade import upgrade_schema
 
 
-def load_json_data(filepath):
-    """Load quiz data from JSON file"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-
-def get_or_create_lernfeld(session, name):
-    """Get existing Lernfeld or create new one"""
-    lernfeld = session.query(Lernfeld).filter_by(name=name).first()
-    if not lernfeld:
-        lernfeld = Lernfeld(name=name)
-        session.add(lernfeld)
-        session.flush()  # Get ID without committing
-    return lernfeld
-
-
-def import_question(session, question_data):
-    """Import a single question with its answers"""
-    
-    # Get or create Lernfeld
-    lernfeld = get_or_create_lernfeld(session, question_data['lernfeld'])
-    
-    # Check if question already exists (avoid duplicates)
-    existing = session.query(Frage).filter_by(
-        frage_text=question_data['frage'],
-        lernfeld_id=lernfeld.id
-    ).first()
-    
-    if existing:
-        print(f"  ⏭️  Skipping duplicate: {question_data['frage'][:50]}...")
-        return False
-    
-    # Create Frage
-    frage = Frage(
-        lernfeld_id=lernfeld.id,
-        frage_text=question_data['frage'],
-        themenbereich=question_data['themenbereich'],
-        schwierigkeit=question_data['schwierigkeit'],
-        typ=question_data['typ'],
-        zeit_sekunden=question_data['zeit_sekunden'],
-        code_snippet=question_data.get('code_snippet'),
-        bild_idee=question_data.get('bild_idee'),
-        erklaerung=question_data.get('erklaerung', '')
-    )
-    
-    # Set tags
-    if 'tags' in question_data:
-        frage.set_tags(question_data['tags'])
-    
-    session.add(frage)
-    session.flush()  # Get ID for answers
-    
-    # Create Antworten
-    for idx, antwort_data in enumerate(question_data['antworten']):
-        antwort = Antwort(
-            frage_id=frage.id,
-            text=antwort_data['text'],
-            korrekt=antwort_data['korrekt'],
-            reihenfolge=idx + 1 if question_data['typ'] == 'order' else None
-        )
-        session.add(antwort)
-    
-    return True
-
-
-def seed_database(json_filepath):
+def seed_database(sources, dry_run=False, batch_size=None, workers=1):
     """Main seeding function"""
     print("🚀 Starting database seeding...")
     
-    # Load JSON data
-    print(f"📂 Loading data from {json_filepath}...")
-    questions_data = load_json_data(json_filepath)
-    print(f"✅ Loaded {len(questions_data)} questions")
-    
     # Create app and database
     app = create_app('development')
     
     with app.app_context():
-        # Create tables if they don't exist
-        print("🔧 Creating database tables...")
-        db.create_all()
+        # Create missing tables and upgrade existing ones
+        print("🔧 Creating/upgrading database tables...")
+        for change in upgrade_schema():
+            print(f"  ➕ {change}")
         
-        # Import questions
-        print("📝 Importing questions...")
-        imported_count = 0
-        skipped_count = 0
+        # Stream and import questions
+        print(f"📝 Importing questions from {len(sources)} file(s){' (dry run)' if dry_run else ''}...")
         
-        for idx, question_data in enumerate(questions_data, 1):
-            try:
-                if import_question(db.session, question_data):
-                    imported_count += 1
-                    if imported_count % 100 == 0:
-                        print(f"  ✓ Imported {imported_count} questions...")
-                        db.session.commit()  # Commit in batches
-                else:
-                    skipped_count += 1
-            except Exception as e:
-                print(f"  ❌ Error importing question {idx}: {e}")
-                db.session.rollback()
-                continue
+        def progress(counts):
+            print(f"  ✓ {counts['inserted']} new, {counts['updated']} updated so far...")
         
-        # Final commit
-        db.session.commit()
+        report = import_questions(sources, dry_run=dry_run, batch_size=batch_size, workers=workers, progress=progress)
+        
+        for path, result in report['files'].items():
+            print(f"  📄 {path}: {result['inserted']} new, {result['updated']} updated, "
+                  f"{result['skipped']} skipped, {len(result['errors'])} errors")
+            for index, message in result['errors']:
+                print(f"    ❌ Question {index}: {message}")
         
-        print(f"\n✅ Seeding complete!")
-        print(f"  📊 Imported: {imported_count} questions")
-        print(f"  ⏭️  Skipped: {skipped_count} duplicates")
+        print(f"\n✅ {'Dry run' if dry_run else 'Seeding'} complete!")
+        print(f"  📊 Inserted: {report['inserted']} questions")
+        print(f"  🔄 Updated: {report['updated']} questions")
+        print(f"  ⏭️  Skipped: {report['skipped']} unchanged/duplicates")
+        print(f"  ❌ Errors: {report['errors']}")
         
         # Print statistics
         total_lernfelder = db.session.query(Lernfeld).count()
@@ -192,26 +125,41 @@ def create_sample_users():
                 xp=user_data['xp'],
                 level=user_data['level']
             )
-            user.set_password(user_data['password'])  # Use secure password hashing
+            user.set_password(user_data['password'])  # Configured cost profile, hashed in the native pool
             db.session.add(user)
         
         db.session.commit()
         print(f"  ✅ Created {len(sample_users)} sample users")
+        
+        # Users were created with XP directly: rank them in the global leaderboard
+        from app.services import xp_leaderboard
+        xp_leaderboard.rebuild()
         print("  📝 Login credentials:")
         for user_data in sample_users:
             print(f"     {user_data['username']} / {user_data['password']}")
 
 
 if __name__ == '__main__':
-    # Path to JSON file
-    json_file = Path(__file__).parent / 'data' / 'ihk_quiz_fragen_4_schwierigkeiten_final1.0.json'
-    
-    if not json_file.exists():
-        print(f"❌ Error: JSON file not found at {json_file}")
+    parser = argparse.ArgumentParser(description='Import quiz questions from JSON')
+    parser.add_argument('sources', nargs='*',
+                        default=[str(Path(__file__).parent / 'data' / 'ihk_quiz_fragen_4_schwierigkeiten_final1.0.json')],
+                        help='JSON files, directories or glob patterns')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would change')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Validation processes')
+    parser.add_argument('--batch-size', type=int, help='Questions per bulk batch')
+    args = parser.parse_args()
+    
+    try:
+        sources = resolve_sources(args.sources)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
         sys.exit(1)
     
     # Run seeding
-    seed_database(json_file)
+    seed_database(sources, dry_run=args.dry_run, batch_size=args.batch_size, workers=args.workers)
+    
+    if args.dry_run:
+        sys.exit(0)
     
     # Create sample users
     create_sample_users()
@@ -0,0 +1,42 @@
+import fakeredis
+import pytest
+
+from app import create_app
+from app.extensions import db, redis_client
+from app.services.question_bank import QuestionRecord, AnswerRecord
+
+
+# One fake server for the whole run: registered Lua scripts stay bound to it
+_redis = fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def app():
+    """App on an in-memory database and an empty fake Redis"""
+    app = create_app('testing')
+    redis_client.client = _redis
+    _redis.flushall()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def redis():
+    return _redis
+
+
+def make_question(frage_id, answers=((1, True), (2, False), (3, False)), schwierigkeit='Mittel', rating=None):
+    """QuestionRecord whose answers (offset, korrekt) get the ids frage_id * 10 + offset"""
+    antworten = tuple(
+        AnswerRecord(frage_id * 10 + offset, frage_id, f'Antwort {offset}', korrekt, None)
+        for offset, korrekt in answers
+    )
+    return QuestionRecord(
+        id=frage_id, lernfeld_id=1, lernfeld='LF1', frage_text=f'Frage {frage_id}',
+        themenbereich='Netzwerke', schwierigkeit=schwierigkeit, typ='mc', zeit_sekunden=30,
+        code_snippet=None, bild_idee=None, erklaerung='Weil.', tags=('Netzwerk',),
+        antworten=antworten, correct_ids=frozenset(a.id for a in antworten if a.korrekt), rating=rating
+    )
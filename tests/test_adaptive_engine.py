@@ -0,0 +1,59 @@
+import pytest
+
+from app.services.adaptive_engine import (
+    _Ladder, expected, target_rating, update, SEEN_CHECK_BATCH, TARGET_SUCCESS
+)
+
+
+def seen_set(ids):
+    """seen callback over a plain set, recording every batch asked for"""
+    calls = []
+
+    def seen(batch):
+        calls.append(tuple(batch))
+        return [frage_id in ids for frage_id in batch]
+    return seen, calls
+
+
+def test_pick_from_closest_bucket():
+    ladder = _Ladder({1: 800, 2: 810, 3: 1000, 4: 1210})
+    seen, _ = seen_set(set())
+
+    assert ladder.pick(1000, seen) == 3
+    assert ladder.pick(1190, seen) == 4
+    assert ladder.pick(700, seen) in (1, 2)
+
+
+def test_pick_skips_seen_questions_outward():
+    ladder = _Ladder({1: 800, 3: 1000, 4: 1300})
+
+    # 800 is closer to 1000 than 1300
+    assert ladder.pick(1000, seen_set({3})[0]) == 1
+    assert ladder.pick(1000, seen_set({1, 3})[0]) == 4
+
+
+def test_pick_returns_none_when_everything_was_seen():
+    seen, _ = seen_set({1, 2})
+
+    assert _Ladder({1: 800, 2: 1000}).pick(900, seen) is None
+    assert _Ladder({}).pick(1000, seen) is None
+
+
+def test_pick_checks_seen_in_batches():
+    ids = range(1, 3 * SEEN_CHECK_BATCH + 1)
+    ladder = _Ladder({frage_id: 1000 for frage_id in ids})
+    seen, calls = seen_set(set(ids) - {2 * SEEN_CHECK_BATCH})
+
+    assert ladder.pick(1000, seen) == 2 * SEEN_CHECK_BATCH
+    assert all(len(batch) <= SEEN_CHECK_BATCH for batch in calls)
+    assert len(calls) <= 3
+
+
+def test_target_rating_hits_target_success():
+    assert expected(1000, target_rating(1000)) == pytest.approx(TARGET_SUCCESS)
+
+
+def test_ability_moves_towards_the_result():
+    assert update(1000, 1000, True) == pytest.approx(1016)
+    assert update(1000, 1000, False) == pytest.approx(984)
+    assert update(1000, 1400, True) > update(1000, 800, True)
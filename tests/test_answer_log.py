@@ -0,0 +1,76 @@
+import json
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import db
+from app.models import AnswerEvent, UserLernfeldStats
+from app.services import answer_log, stats_service
+
+
+def event(**fields):
+    values = {
+        'user_id': 1, 'spiel_id': 1, 'frage_id': 1, 'lernfeld_id': 1, 'antwort_id': 11,
+        'correct': True, 'time_taken': 2.5, 'score': 1200, 'answered_at': time.time()
+    }
+    values.update(fields)
+    return json.dumps(values)
+
+
+def test_flush_inserts_buffered_events(app, redis):
+    redis.rpush(answer_log.BUFFER_KEY, event(), event(user_id=2, correct=False, score=0))
+
+    assert answer_log.flush() == 2
+    assert redis.llen(answer_log.BUFFER_KEY) == 0
+    assert sorted(e.user_id for e in AnswerEvent.query) == [1, 2]
+
+
+def test_flush_drains_in_batches(app, redis):
+    app.config['ANSWER_EVENT_BATCH_SIZE'] = 2
+    redis.rpush(answer_log.BUFFER_KEY, *[event(user_id=uid) for uid in range(5)])
+
+    assert answer_log.flush() == 5
+    assert AnswerEvent.query.count() == 5
+
+
+def test_bad_events_go_to_dead_letter_list(app, redis):
+    undecodable = '{"user_id": 1'
+    rejected = event(correct=None)  # NOT NULL violation
+    redis.rpush(answer_log.BUFFER_KEY, event(), undecodable, rejected, event(user_id=2))
+
+    assert answer_log.flush() == 2
+    assert redis.llen(answer_log.BUFFER_KEY) == 0
+    assert sorted(redis.lrange(answer_log.DEAD_LETTER_KEY, 0, -1)) == sorted([undecodable, rejected])
+    assert AnswerEvent.query.count() == 2
+
+
+def test_failed_flush_keeps_the_batch(app, redis, monkeypatch):
+    buffered = [event(user_id=1), event(user_id=2)]
+    redis.rpush(answer_log.BUFFER_KEY, *buffered)
+
+    def unavailable(*args, **kwargs):
+        raise OperationalError('INSERT', {}, Exception('database unavailable'))
+
+    monkeypatch.setattr(db.session, 'execute', unavailable)
+    assert answer_log.flush() is None
+    assert redis.lrange(answer_log.BUFFER_KEY, 0, -1) == buffered
+
+    monkeypatch.undo()
+    assert answer_log.flush() == 2
+
+
+def test_game_is_rolled_up_only_after_its_events_are_written(app, redis, monkeypatch):
+    redis.rpush(answer_log.BUFFER_KEY, event(), event(correct=False))
+
+    def unavailable(*args, **kwargs):
+        raise OperationalError('INSERT', {}, Exception('database unavailable'))
+
+    monkeypatch.setattr(db.session, 'execute', unavailable)
+    assert stats_service.rollup_finished_game(1) is False
+    assert redis.smembers(stats_service.PENDING_ROLLUPS_KEY) == {'1'}
+
+    monkeypatch.undo()
+    assert stats_service.retry_pending_rollups() == 1
+    stats = UserLernfeldStats.query.one()
+    assert (stats.answered, stats.correct) == (2, 1)
+    assert not redis.smembers(stats_service.PENDING_ROLLUPS_KEY)
@@ -0,0 +1,12 @@
+from app.services.adaptive_engine import DIFFICULTY_RATINGS
+from app.services.item_calibration import LOW_DISCRIMINATION, _flags
+from conftest import make_question
+
+
+def test_undefined_discrimination_is_not_flagged():
+    frage = make_question(1)
+    rating = DIFFICULTY_RATINGS['Mittel']
+
+    assert _flags(frage, rating, None, {}) == []
+    assert _flags(frage, rating, LOW_DISCRIMINATION / 2, {}) == ['low_discrimination']
+    assert _flags(frage, rating, -0.1, {}) == ['negative_discrimination']
@@ -0,0 +1,53 @@
+import pytest
+
+from app.services.practice_service import Card, DAY, MIN_EASE, START_EASE, grade, schedule
+
+
+NOW = 1_700_000_000.0
+RELEARN = 60
+
+
+def new_card():
+    return Card(START_EASE, 0.0, 0, 0, NOW, 0.0)
+
+
+def test_passed_reviews_space_out():
+    first = schedule(new_card(), 5, NOW, RELEARN)
+    assert (first.repetitions, first.interval_days, first.due) == (1, 1.0, NOW + DAY)
+    assert first.ease_factor == pytest.approx(START_EASE + 0.1)
+
+    second = schedule(first, 4, first.due, RELEARN)
+    assert (second.repetitions, second.interval_days) == (2, 6.0)
+    assert second.ease_factor == pytest.approx(first.ease_factor)
+
+    third = schedule(second, 3, second.due, RELEARN)
+    assert third.interval_days == pytest.approx(6.0 * second.ease_factor)
+    assert third.due == pytest.approx(second.due + third.interval_days * DAY)
+    assert third.reviewed == second.due
+
+
+def test_failed_review_relearns_in_session():
+    card = schedule(schedule(new_card(), 5, NOW, RELEARN), 1, NOW + DAY, RELEARN)
+
+    assert (card.repetitions, card.interval_days, card.lapses) == (0, 0.0, 1)
+    assert card.due == NOW + DAY + RELEARN
+
+
+def test_ease_factor_never_drops_below_minimum():
+    card = new_card()
+    for _ in range(10):
+        card = schedule(card, 0, NOW, RELEARN)
+    assert card.ease_factor == MIN_EASE
+    assert card.lapses == 10
+
+
+def test_card_encoding_round_trip():
+    card = schedule(new_card(), 4, NOW, RELEARN)
+    assert Card.decode(card.encode()) == pytest.approx(card)
+
+
+@pytest.mark.parametrize('correct, time_taken, quality', [
+    (True, 5, 5), (True, 15, 4), (True, 25, 3), (False, 10, 1), (False, 30, 0)
+])
+def test_grade(correct, time_taken, quality):
+    assert grade(correct, time_taken, 30) == quality
@@ -0,0 +1,72 @@
+import weakref
+
+import pytest
+
+from app.services import question_artifact
+from app.services.question_bank import QuestionRecord, AnswerRecord, LernfeldRecord, build_indexes
+from conftest import make_question
+
+
+RECORD_TYPES = (QuestionRecord, AnswerRecord, LernfeldRecord)
+
+
+@pytest.fixture
+def questions():
+    return [
+        make_question(7, schwierigkeit='Schwer', rating=1234.5),
+        make_question(3),
+        make_question(5, answers=((1, False), (2, True)), schwierigkeit='Leicht')
+    ]
+
+
+@pytest.fixture
+def artifact_path(tmp_path, questions):
+    path = str(tmp_path / 'question_bank.bin')
+    indexes, tag_names = build_indexes(questions)
+    question_artifact.write(path, questions, [LernfeldRecord(1, 'LF1', 'Grundlagen')], 'abcdef0123456789',
+                            indexes, tag_names)
+    return path
+
+
+def test_round_trip(artifact_path, questions):
+    snapshot = question_artifact.ArtifactSnapshot(artifact_path, RECORD_TYPES)
+
+    assert snapshot.version == 'abcdef0123456789'
+    assert snapshot.lernfelder == (LernfeldRecord(1, 'LF1', 'Grundlagen'),)
+    assert list(snapshot.all_ids) == [3, 5, 7]
+    for q in questions:
+        assert snapshot.questions.get(q.id) == q
+    assert snapshot.questions.get(4) is None
+    assert len(snapshot.questions) == 3
+
+
+def test_indexes_and_answers(artifact_path):
+    snapshot = question_artifact.ArtifactSnapshot(artifact_path, RECORD_TYPES)
+
+    assert list(snapshot.by_schwierigkeit['Mittel']) == [3]
+    assert list(snapshot.by_lernfeld['LF1']) == [3, 5, 7]
+    assert list(snapshot.by_tag['netzwerk']) == [3, 5, 7]
+    assert snapshot.tag_names['netzwerk'] == 'Netzwerk'
+    assert dict(snapshot.ratings) == {7: 1234.5}
+    assert snapshot.answers.get(52) == AnswerRecord(52, 5, 'Antwort 2', True, None)
+    assert snapshot.answers.get(99) is None
+
+
+def test_truncated_or_foreign_file_is_rejected(tmp_path):
+    path = tmp_path / 'broken.bin'
+    path.write_bytes(b'NMQB')
+    with pytest.raises(question_artifact.ArtifactError):
+        question_artifact.ArtifactSnapshot(str(path), RECORD_TYPES)
+
+    path.write_bytes(b'\0' * question_artifact.HEADER.size)
+    with pytest.raises(question_artifact.ArtifactError):
+        question_artifact.ArtifactSnapshot(str(path), RECORD_TYPES)
+
+
+def test_snapshot_is_freed_without_the_cycle_collector(artifact_path):
+    snapshot = question_artifact.ArtifactSnapshot(artifact_path, RECORD_TYPES)
+    assert snapshot.questions.get(3).id == 3
+    ref = weakref.ref(snapshot)
+
+    del snapshot
+    assert ref() is None
@@ -0,0 +1,119 @@
+from app.extensions import db
+from app.models import Lernfeld, Frage, Antwort
+from app.services.question_bank import question_bank, GENERATION_KEY, VERSION_KEY
+
+
+def add_question(lernfeld, text, schwierigkeit='Mittel', typ='mc', answers=(('Ja', True), ('Nein', False))):
+    frage = Frage(lernfeld=lernfeld, frage_text=text, themenbereich='Netzwerke',
+                  schwierigkeit=schwierigkeit, typ=typ, zeit_sekunden=30, tags='["Netzwerk"]')
+    db.session.add(frage)
+    for answer_text, korrekt in answers:
+        db.session.add(Antwort(frage=frage, text=answer_text, korrekt=korrekt))
+    return frage
+
+
+def seed():
+    lf1, lf2 = Lernfeld(name='LF1'), Lernfeld(name='LF2')
+    questions = [
+        add_question(lf1, 'Frage A', 'Leicht'),
+        add_question(lf1, 'Frage B', 'Mittel'),
+        add_question(lf2, 'Frage C', 'Leicht')
+    ]
+    db.session.add_all([lf1, lf2])
+    db.session.commit()
+    question_bank.invalidate()
+    return questions
+
+
+def test_records_and_indexes(app):
+    a, b, c = seed()
+
+    record = question_bank.get(a.id)
+    assert (record.frage_text, record.lernfeld, record.tags) == ('Frage A', 'LF1', ('Netzwerk',))
+    assert record.correct_ids == {next(x.id for x in a.antworten if x.korrekt)}
+    assert 'korrekt' not in record.to_dict()['antworten'][0]
+    assert question_bank.get('nope') is None
+
+    assert question_bank.ids() == tuple(sorted((a.id, b.id, c.id)))
+    assert question_bank.ids(schwierigkeit='Leicht') == tuple(sorted((a.id, c.id)))
+    assert question_bank.ids(schwierigkeit='Leicht', lernfeld='LF1') == (a.id,)
+    assert question_bank.ids(schwierigkeit='Profi') == ()
+    assert [lf.name for lf in question_bank.lernfelder()] == ['LF1', 'LF2']
+
+
+def test_other_workers_reload_after_invalidate(app, redis):
+    seed()
+    version = question_bank.version
+    app.config['QUESTION_BANK_CHECK_INTERVAL'] = 0
+
+    frage = add_question(Lernfeld.query.first(), 'Frage D')
+    db.session.commit()
+    # Another worker invalidated: only the generation key changes here
+    redis.incr(GENERATION_KEY)
+
+    assert question_bank.get(frage.id).frage_text == 'Frage D'
+    assert question_bank.version != version
+
+
+def test_order_questions_are_not_dealt(app):
+    from app.services import deck_service
+    from app.services.payload_cache import question_fields
+
+    lf = Lernfeld(name='LF1')
+    mc = add_question(lf, 'Frage A')
+    order = add_question(lf, 'Frage B', typ='order')
+    db.session.add(lf)
+    db.session.commit()
+    question_bank.invalidate()
+
+    assert deck_service.candidate_ids() == {mc.id}
+    assert deck_service.candidate_ids(typen=['order']) == set()
+    assert deck_service.count_matching(typen=['mc', 'order']) == 1
+    fields = question_fields(question_bank.get(order.id))
+    assert set(fields['antworten'][0]) == {'id', 'text'}
+
+
+def test_stale_artifact_is_rebuilt(app, redis, tmp_path, monkeypatch):
+    monkeypatch.setattr(question_bank, 'artifact_path', str(tmp_path / 'question_bank.bin'))
+    app.config['QUESTION_BANK_CHECK_INTERVAL'] = 0
+    seed()
+    stale = tmp_path / 'stale.bin'
+    stale.write_bytes((tmp_path / 'question_bank.bin').read_bytes())
+
+    frage = add_question(Lernfeld.query.first(), 'Frage D')
+    db.session.commit()
+    question_bank.invalidate()
+    assert question_bank.get(frage.id).frage_text == 'Frage D'
+
+    # A file of an older version shows up (copied from another host)
+    stale.replace(tmp_path / 'question_bank.bin')
+    redis.incr(GENERATION_KEY)
+
+    assert question_bank.get(frage.id).frage_text == 'Frage D'
+    assert question_bank.version == redis.get(VERSION_KEY)
+
+
+def test_failed_compile_serves_from_memory(app, redis, tmp_path, monkeypatch):
+    monkeypatch.setattr(question_bank, 'artifact_path', str(tmp_path / 'question_bank.bin'))
+    seed()
+
+    def fail(records=None):
+        raise OSError('read-only file system')
+    monkeypatch.setattr(question_bank, 'compile', fail)
+    frage = add_question(Lernfeld.query.first(), 'Frage D')
+    db.session.commit()
+    question_bank.invalidate()
+
+    assert question_bank.get(frage.id).frage_text == 'Frage D'
+    assert question_bank.version == redis.get(VERSION_KEY)
+
+
+def test_sampled_questions_are_not_cached(app, client):
+    seed()
+
+    response = client.get('/api/questions')
+    assert response.headers['Cache-Control'] == 'no-store'
+    assert 'ETag' not in response.headers
+
+    etag = client.get('/api/lernfelder').headers['ETag']
+    assert client.get('/api/lernfelder', headers={'If-None-Match': etag}).status_code == 304
@@ -0,0 +1,147 @@
+import json
+
+import pytest
+
+from app.models import Frage, Antwort
+from app.services.question_import import import_questions, iter_json_array, normalize, resolve_sources
+
+
+def question(**fields):
+    data = {
+        'lernfeld': 'LF1',
+        'frage': 'Was ist ein Switch?',
+        'themenbereich': 'Netzwerke',
+        'schwierigkeit': 'Leicht',
+        'typ': 'mc',
+        'zeit_sekunden': 30,
+        'antworten': [{'text': 'Layer 2', 'korrekt': True}, {'text': 'Layer 7', 'korrekt': False}]
+    }
+    data.update(fields)
+    return data
+
+
+def write_json(tmp_path, questions, name='fragen.json'):
+    path = tmp_path / name
+    path.write_text(json.dumps(questions), encoding='utf-8')
+    return str(path)
+
+
+def test_mc_question():
+    record = normalize(question(tags=['Netzwerk']))
+
+    assert record['frage_text'] == 'Was ist ein Switch?'
+    assert json.loads(record['tags']) == ['Netzwerk']
+    assert record['antworten'] == [
+        {'text': 'Layer 2', 'korrekt': True, 'reihenfolge': None},
+        {'text': 'Layer 7', 'korrekt': False, 'reihenfolge': None}
+    ]
+
+
+@pytest.mark.parametrize('fields, message', [
+    ({'themenbereich': ''}, 'Missing fields'),
+    ({'antworten': None}, 'antworten must be a list'),
+    ({'antworten': 'Layer 2'}, 'list'),
+    ({'antworten': [{'text': 'A'}]}, 'korrekt'),
+    ({'typ': 'essay'}, 'Unknown typ'),
+    ({'schwierigkeit': 'Extrem'}, 'Unknown schwierigkeit'),
+    ({'zeit_sekunden': 0}, 'zeit_sekunden'),
+    ({'zeit_sekunden': '30'}, 'zeit_sekunden'),
+    ({'antworten': [{'text': 'A', 'korrekt': False}]}, 'No correct answer'),
+    ({'antworten': [{'text': 'A', 'korrekt': 'ja'}]}, 'korrekt'),
+    ({'tags': ['ok', '  ']}, 'tags'),
+])
+def test_invalid_question(fields, message):
+    with pytest.raises(ValueError, match=message):
+        normalize(question(**fields))
+
+
+def test_order_question_uses_given_positions():
+    record = normalize(question(typ='order', antworten=[
+        {'text': 'Transport', 'reihenfolge': 2},
+        {'text': 'Netzwerk', 'reihenfolge': 1},
+        {'text': 'Sitzung', 'reihenfolge': 3}
+    ]))
+
+    assert [(a['text'], a['reihenfolge'], a['korrekt']) for a in record['antworten']] == [
+        ('Transport', 2, False), ('Netzwerk', 1, True), ('Sitzung', 3, False)
+    ]
+
+
+def test_order_question_defaults_to_list_order():
+    record = normalize(question(typ='order', antworten=[{'text': 'A'}, {'text': 'B'}]))
+
+    assert [a['reihenfolge'] for a in record['antworten']] == [1, 2]
+
+
+@pytest.mark.parametrize('antworten', [
+    [{'text': 'A', 'reihenfolge': 1}],
+    [{'text': 'A', 'reihenfolge': 1}, {'text': 'B', 'reihenfolge': 1}],
+    [{'text': 'A', 'reihenfolge': 1}, {'text': 'B', 'reihenfolge': 3}],
+    [{'text': 'A', 'reihenfolge': '1'}, {'text': 'B', 'reihenfolge': 2}],
+])
+def test_invalid_order_question(antworten):
+    with pytest.raises(ValueError):
+        normalize(question(typ='order', antworten=antworten))
+
+
+def test_text_question_needs_keywords():
+    record = normalize(question(typ='text', antworten=None, loesung_keywords=['Switch', 'Layer 2']))
+
+    assert json.loads(record['loesung_keywords']) == ['Switch', 'Layer 2']
+    assert record['antworten'] == []
+
+    with pytest.raises(ValueError, match='loesung_keywords'):
+        normalize(question(typ='math', antworten=None))
+    with pytest.raises(ValueError, match='loesung_keywords'):
+        normalize(question(typ='text', loesung_keywords=[' ']))
+
+
+def test_streams_array_across_chunks(tmp_path):
+    questions = [question(frage=f'Frage {i}') for i in range(20)]
+    path = write_json(tmp_path, questions)
+
+    assert list(iter_json_array(path, chunk_size=64)) == questions
+
+
+def test_import_is_idempotent(app, tmp_path):
+    path = write_json(tmp_path, [question(), question(frage='Was ist ein Router?'), question(frage='')])
+
+    first = import_questions([path])
+    assert (first['inserted'], first['updated'], first['skipped'], first['errors']) == (2, 0, 0, 1)
+    assert [index for index, _ in first['files'][path]['errors']] == [3]
+
+    second = import_questions([path])
+    assert (second['inserted'], second['updated'], second['skipped']) == (0, 0, 2)
+    assert Frage.query.count() == 2
+
+
+def test_changed_question_is_updated(app, tmp_path):
+    import_questions([write_json(tmp_path, [question()])])
+
+    changed = question(antworten=[{'text': 'Layer 2', 'korrekt': True}, {'text': 'Layer 3', 'korrekt': False}])
+    result = import_questions([write_json(tmp_path, [changed], 'changed.json')])
+
+    assert (result['inserted'], result['updated']) == (0, 1)
+    assert sorted(a.text for a in Antwort.query) == ['Layer 2', 'Layer 3']
+
+
+def test_first_source_wins(app, tmp_path):
+    first = write_json(tmp_path, [question()], 'a.json')
+    second = write_json(tmp_path, [question(erklaerung='Andere Erklärung'), question(frage='Was ist ein Hub?')], 'b.json')
+
+    result = import_questions(resolve_sources([str(tmp_path)]))
+
+    assert result['files'][first]['inserted'] == 1
+    assert (result['files'][second]['inserted'], result['files'][second]['skipped']) == (1, 1)
+    assert Frage.query.filter_by(frage_text='Was ist ein Switch?').one().erklaerung == ''
+
+
+def test_malformed_file_is_reported_per_file(app, tmp_path):
+    good = write_json(tmp_path, [question()], 'a.json')
+    broken = tmp_path / 'b.json'
+    broken.write_text('[' + json.dumps(question(frage='Was ist ein Hub?')) + ', {"frage": ', encoding='utf-8')
+
+    result = import_questions([good, str(broken)])
+
+    assert result['inserted'] == 2
+    assert [index for index, _ in result['files'][str(broken)]['errors']] == [2]
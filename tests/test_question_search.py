@@ -0,0 +1,22 @@
+from app.extensions import db
+from app.models import Frage
+from app.services.question_bank import question_bank
+from app.services.question_search import QuestionSearch, tokenize
+from test_question_bank import seed
+
+
+def test_new_version_is_built_beside_the_published_index(app):
+    a, b, c = seed()
+    search = QuestionSearch()
+    search.warm()
+    old = search._index
+    postings = {term: dict(ids) for term, ids in old.postings.items()}
+
+    db.session.get(Frage, a.id).frage_text = 'Was ist ein Quantenflux-Kondensator?'
+    db.session.commit()
+    question_bank.invalidate()
+
+    assert [frage_id for frage_id, _ in search.search('Quantenflux')] == [a.id]
+    assert search._index is not old
+    assert {term: dict(ids) for term, ids in old.postings.items()} == postings
+    assert tokenize('Quantenflux')[0] not in old.postings
@@ -0,0 +1,93 @@
+import json
+import time
+
+from app.services import answer_log, scoring_service
+from conftest import make_question
+
+
+ROOM = 'TEST01'
+
+
+def start_question(redis, frage, now, modus='multiplayer', players=(2, 3)):
+    redis.hset(f'room:{ROOM}', mapping={
+        'current_question': frage.id,
+        'question_deadline': now + frage.zeit_sekunden,
+        'question_start_time': now,
+        'modus': modus,
+        'question_number': 1,
+        'spiel_id': 1
+    })
+    redis.sadd(f'room:{ROOM}:players', *players)
+
+
+def test_correct_answer_scores(app, redis):
+    frage = make_question(1)
+    now = time.time()
+    start_question(redis, frage, now)
+
+    result = scoring_service.submit_answer(ROOM, 2, frage, 11, 3.0, now + 3)
+
+    assert result['status'] == 'ok'
+    assert result['correct'] is True
+    assert result['score'] == 1000 + int(1000 * (1 - 3 / 30) * 0.5)
+    assert result['streak'] == 1
+    assert (result['answered'], result['all_answered']) == (1, False)
+    assert scoring_service.player_state(ROOM, 2) == {'score': result['score'], 'streak': 1}
+    event = json.loads(redis.lindex(answer_log.BUFFER_KEY, 0))
+    assert (event['user_id'], event['spiel_id'], event['frage_id'], event['correct']) == (2, 1, 1, True)
+
+
+def test_server_clock_bounds_the_reported_time(app, redis):
+    frage = make_question(1)
+    now = time.time()
+    start_question(redis, frage, now)
+
+    # Claims 1 s after 20 s: only the latency buffer is accepted
+    result = scoring_service.submit_answer(ROOM, 2, frage, 11, 1.0, now + 20)
+
+    assert result['time_taken'] == 20 - app.config['QUESTION_TIME_BUFFER']
+
+
+def test_wrong_answer_resets_streak_and_eliminates_in_hardcore(app, redis):
+    frage = make_question(1)
+    now = time.time()
+    start_question(redis, frage, now, modus='survival_hardcore')
+    redis.hset(f'room:{ROOM}:streaks', 2, 4)
+
+    result = scoring_service.submit_answer(ROOM, 2, frage, 12, 3.0, now + 3)
+
+    assert (result['status'], result['correct'], result['score'], result['eliminated']) == ('ok', False, 0, True)
+    assert scoring_service.player_state(ROOM, 2)['streak'] == 0
+    assert scoring_service.submit_answer(ROOM, 2, frage, 11, 1.0, now + 4)['status'] == 'eliminated'
+
+
+def test_duplicate_answer_is_rejected(app, redis):
+    frage = make_question(1)
+    now = time.time()
+    start_question(redis, frage, now)
+
+    assert scoring_service.submit_answer(ROOM, 2, frage, 12, 1.0, now + 1)['status'] == 'ok'
+    assert scoring_service.submit_answer(ROOM, 2, frage, 11, 1.0, now + 2)['status'] == 'duplicate'
+
+    # The second answer changed nothing
+    assert scoring_service.player_state(ROOM, 2) == {'score': 0, 'streak': 0}
+    assert redis.llen(answer_log.BUFFER_KEY) == 1
+
+
+def test_answer_to_previous_question_is_stale(app, redis):
+    previous, current = make_question(1), make_question(2)
+    now = time.time()
+    start_question(redis, current, now)
+
+    assert scoring_service.submit_answer(ROOM, 2, previous, 11, 1.0, now + 1)['status'] == 'stale'
+    assert redis.llen(answer_log.BUFFER_KEY) == 0
+
+
+def test_late_and_foreign_answers_are_rejected(app, redis):
+    frage = make_question(1)
+    now = time.time()
+    start_question(redis, frage, now)
+
+    late = now + frage.zeit_sekunden + 1
+    assert scoring_service.submit_answer(ROOM, 2, frage, 11, 1.0, late)['status'] == 'late'
+    assert scoring_service.submit_answer(ROOM, 9, frage, 11, 1.0, now + 1)['status'] == 'not_in_game'